@@ -1,6 +1,7 @@
 import os
 from app.core.config import settings
 from app.core.llm_providers import OpenAIProvider
+from app.core.index_version import bump_index_version
 import pinecone
 
 # Path to the all programs file
@@ -32,5 +33,6 @@ metadata = {
     'text': all_programs_text[:500] + ("..." if len(all_programs_text) > 500 else "")
 }
 index.upsert(vectors=[{'id': vector_id, 'values': vector, 'metadata': metadata}], namespace='programs')
+bump_index_version("upserted all programs list")
 
 print(f"Uploaded all programs list to Pinecone 'programs' namespace as ID '{vector_id}'.")
@@ -0,0 +1,164 @@
+import json
+import secrets
+import time
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
+from app.core.config import settings
+from app.core.index_version import get_index_version, bump_index_version
+from app.core.chat_logger import chat_log_writer
+from app.core.database import check_database_async, get_pool_stats, stream_chat_history
+from app.core.chat_partitions import run_maintenance
+from app.core.executors import ExecutorSaturated, db_executor, get_executor_stats
+from app.api.endpoints.enhanced_chat import chat_service
+from loguru import logger
+
+def require_admin(x_admin_key: Optional[str] = Header(None)):
+    """Allow the request only if it carries the configured admin key."""
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_API_KEY not set)")
+    if not x_admin_key or not secrets.compare_digest(x_admin_key, settings.ADMIN_API_KEY):
+        raise HTTPException(status_code=401, detail="Invalid admin key")
+
+admin_router = APIRouter(dependencies=[Depends(require_admin)])
+
+async def _run_cache_call(fn, *args, **kwargs):
+    """Run a response cache call; shared backends do I/O, so they run on the DB executor."""
+    if not chat_service.cache.blocking:
+        return fn(*args, **kwargs)
+    try:
+        return await db_executor.run(fn, *args, **kwargs)
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail="Database executor busy", headers=e.headers())
+
+def _cache_status(limit: int) -> dict:
+    return {
+        "stats": chat_service.get_cache_stats(),
+        "entries": chat_service.cache.list_entries(limit=limit),
+        "semantic_entries": chat_service.semantic_cache.list_entries(limit=limit),
+    }
+
+def _clear_cache() -> int:
+    removed = len(chat_service.cache)
+    chat_service.clear_cache()
+    return removed
+
+@admin_router.get("/cache")
+async def get_cache_status(limit: int = 50):
+    """Inspect response cache statistics and the most recently used entries."""
+    return {
+        **await _run_cache_call(_cache_status, limit),
+        "timestamp": time.time()
+    }
+
+@admin_router.delete("/cache")
+async def invalidate_cache(
+    key: Optional[str] = None,
+    user_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+    query: Optional[str] = None,
+    all: bool = False
+):
+    """Selectively invalidate response cache entries (or everything with all=true)."""
+    if all:
+        removed = await _run_cache_call(_clear_cache)
+    elif key or user_id or query:
+        removed = await _run_cache_call(
+            chat_service.invalidate_cache, key=key, user_id=user_id, session_id=session_id, query=query
+        )
+    else:
+        raise HTTPException(status_code=400, detail="Specify key, user_id, query or all=true")
+    logger.info(f"Admin cache invalidation removed {removed} entries")
+    return {
+        "removed": removed,
+        "timestamp": time.time()
+    }
+
+@admin_router.post("/cache/semantic/false-hit")
+async def report_semantic_false_hit(query: str):
+    """Flag the semantic cache entry for a question as a wrong reuse and drop it."""
+    removed = chat_service.semantic_cache.report_false_hit(query)
+    if not removed:
+        raise HTTPException(status_code=404, detail="No semantic cache entry for that query")
+    return {
+        "removed": removed,
+        "semantic_cache": chat_service.semantic_cache.get_stats(),
+        "timestamp": time.time()
+    }
+
+@admin_router.get("/index-version")
+async def get_index_version_endpoint():
+    """Current vector index version used in response cache keys."""
+    return {
+        "index_version": get_index_version(),
+        "timestamp": time.time()
+    }
+
+@admin_router.post("/index-version/bump")
+async def bump_index_version_endpoint(reason: str = "manual bump"):
+    """Bump the index version, e.g. after ingesting data from another machine."""
+    bump_index_version(reason)
+    return {
+        "index_version": get_index_version(),
+        "timestamp": time.time()
+    }
+
+@admin_router.get("/chat-log")
+async def get_chat_log_status():
+    """Inspect the write-behind chat log queue (pending, written and spilled records)."""
+    return {
+        "stats": chat_log_writer.get_stats(),
+        "timestamp": time.time()
+    }
+
+@admin_router.get("/executors")
+async def get_executor_status():
+    """Queue depth, in-flight calls and rejections of the bounded LLM, vector and DB executors."""
+    return {
+        "executors": get_executor_stats(),
+        "timestamp": time.time()
+    }
+
+@admin_router.get("/database")
+async def get_database_status():
+    """Database health and connection pool metrics."""
+    return {
+        "healthy": await check_database_async(),
+        "pools": get_pool_stats(),
+        "timestamp": time.time()
+    }
+
+@admin_router.get("/chat-history/export")
+async def export_chat_history(
+    user_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+    since: Optional[datetime] = None
+):
+    """Stream chat history as NDJSON (one row per line, oldest first) in constant memory."""
+    async def rows():
+        count = 0
+        async for row in stream_chat_history(user_id=user_id, session_id=session_id, since=since):
+            count += 1
+            yield json.dumps(row, default=str) + "\n"
+        logger.info(f"Admin chat history export streamed {count} rows")
+
+    filename = f"chat_history_{datetime.utcnow():%Y%m%d%H%M%S}.ndjson"
+    return StreamingResponse(
+        rows(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@admin_router.post("/chat-history/maintenance")
+async def run_chat_history_maintenance():
+    """Create upcoming chat_history partitions and archive/drop those past retention."""
+    try:
+        result = await db_executor.run(run_maintenance)
+    except Exception as e:
+        logger.error(f"Chat history maintenance failed: {e}")
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    return {
+        **result,
+        "timestamp": time.time()
+    }
@@ -2,16 +2,31 @@ import json
 import time
 import traceback
 from datetime import datetime
-from typing import Optional, Dict, Any
-from fastapi import APIRouter, HTTPException, Depends
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Union
+from fastapi import APIRouter, HTTPException, Depends, Request
 from fastapi.responses import JSONResponse
 from pydantic import ValidationError
 
 from app.schemas.schema import QueryRequest, QueryResponse, ChatHistoryResponse, HealthCheckResponse, ErrorResponse
-from app.core.database import log_chat, get_chat_history
-from app.core.vectorstore import create_vector_store, search_across_namespaces, get_category_specific_context
+from app.core.database import get_chat_history_async, check_database_async
+from app.core.chat_logger import chat_log_writer
+from app.core.session_history import session_history
+from app.core.vectorstore import create_vector_store
+from app.core.retrieval_plans import select_plan, plan_executor
+from app.core.context_compression import compress_context
+from app.core.tokenization import active_model, chunk_token_counts, context_budget, count_tokens, pack_chunks
+from app.core.relevance_gate import MATCH_SCORE, relevance_gate, no_information_answer
+from app.core.circuit_breaker import llm_circuit
+from app.core.executors import ExecutorSaturated, check_capacity, llm_executor
+from app.core.llm_scheduler import SchedulerTimeout, llm_scheduler, set_request_flow
+from app.api.endpoints.enhanced_chat import client_ip
+from app.core.extractive import extractive_answer
 from app.core.llm_providers import provider_manager
 from app.core.provider_router import provider_router
+from app.core.intent_cache import intent_cache
+from app.core.config import settings
+from app.templates.prompt_loader import prompt_version
 from app.templates.prompts import (
     INTENT_ROUTING_PROMPT, RAG_PROMPT, CAREER_PROMPT,
     AI_PROMPT, CYBER_PROMPT, PERSONAL_PROMPT, SYSTEM_PROMPT, GREETING_MESSAGE
@@ -20,6 +35,9 @@ from loguru import logger
 
 chat_router = APIRouter()
 
+# Cached intent results are only valid for the prompt/classifier that produced them
+INTENT_CACHE_VERSION = prompt_version(INTENT_ROUTING_PROMPT, settings.INTENT_CLASSIFIER_VERSION)
+
 # Global variables for singleton pattern
 _llm = None
 _vector_store = None
@@ -75,37 +93,20 @@ def get_chains(user_id: str = None, session_id: str = None):
 
 def detect_intent(query: str) -> Dict[str, Any]:
     """Detect intent using LLM with fallback."""
-    try:
-        chains = get_chains()
-        intent_chain = chains.get('intent')
-        if intent_chain:
-            result = intent_chain.invoke({"query": query})
-            try:
-                # Handle AIMessage object
-                if hasattr(result, 'content'):
-                    content = result.content
-                    # Try to parse as JSON
-                    try:
-                        intent_result = json.loads(content)
-                    except json.JSONDecodeError:
-                        intent_result = fallback_intent_detection(query)
-                # Handle string response
-                elif isinstance(result, str):
-                    intent_result = json.loads(result)
-                # Handle dictionary response
-                elif isinstance(result, dict):
-                    intent_result = result
-                else:
-                    intent_result = fallback_intent_detection(query)
-            except (json.JSONDecodeError, TypeError, AttributeError):
-                # Fallback to simple keyword matching
-                intent_result = fallback_intent_detection(query)
-        else:
-            intent_result = fallback_intent_detection(query)
-    except Exception as e:
-        logger.error(f"Intent detection failed: {str(e)}")
-        intent_result = fallback_intent_detection(query)
+    intent_result = intent_cache.get(query, INTENT_CACHE_VERSION)
+    if intent_result is None:
+        intent_result = classify_intent(query)
+    return _phrase_intent(query) or intent_result
+
+async def detect_intent_async(query: str) -> Dict[str, Any]:
+    """detect_intent() for the event loop; only the classifier call leaves it."""
+    intent_result = intent_cache.get(query, INTENT_CACHE_VERSION)
+    if intent_result is None:
+        intent_result = await classify_intent_async(query)
+    return _phrase_intent(query) or intent_result
 
+def _phrase_intent(query: str) -> Optional[Dict[str, Any]]:
+    """Intents recognised from fixed phrases, which override the classifier."""
     # Enhanced: Detect if user is sharing their name
     user_name_phrases = [
         'my name is',
@@ -127,6 +128,59 @@ def detect_intent(query: str) -> Dict[str, Any]:
     ]
     if any(phrase in q_lower for phrase in last_question_phrases):
         return {"intent": "user_last_question", "confidence": 0.95}
+    return None
+
+def classify_intent(query: str) -> Dict[str, Any]:
+    """Classify intent with the LLM, caching only results the LLM actually produced."""
+    try:
+        chains = get_chains()
+        intent_chain = chains.get('intent')
+        if not intent_chain:
+            return fallback_intent_detection(query)
+        with llm_scheduler.slot():
+            result = intent_chain.invoke({"query": query})
+    except (TypeError, AttributeError):
+        return fallback_intent_detection(query)
+    except Exception as e:
+        logger.error(f"Intent detection failed: {str(e)}")
+        return fallback_intent_detection(query)
+    return _parse_intent(query, result)
+
+async def classify_intent_async(query: str) -> Dict[str, Any]:
+    """classify_intent() for the event loop: the provider slot is taken before the call is
+    handed to the LLM executor, the same order as the enhanced chat path."""
+    try:
+        chains = await llm_executor.run(get_chains)
+        intent_chain = chains.get('intent')
+        if not intent_chain:
+            return fallback_intent_detection(query)
+        result = await llm_scheduler.run(llm_executor, intent_chain.invoke, {"query": query})
+    except ExecutorSaturated:
+        raise
+    except (TypeError, AttributeError):
+        return fallback_intent_detection(query)
+    except Exception as e:
+        logger.error(f"Intent detection failed: {str(e)}")
+        return fallback_intent_detection(query)
+    return _parse_intent(query, result)
+
+def _parse_intent(query: str, result: Any) -> Dict[str, Any]:
+    try:
+        # Handle AIMessage object, string and dictionary responses
+        if hasattr(result, 'content'):
+            intent_result = json.loads(result.content)
+        elif isinstance(result, str):
+            intent_result = json.loads(result)
+        elif isinstance(result, dict):
+            intent_result = result
+        else:
+            return fallback_intent_detection(query)
+        if not isinstance(intent_result, dict) or not intent_result.get("intent"):
+            return fallback_intent_detection(query)
+    except (json.JSONDecodeError, TypeError, AttributeError):
+        # Fallback to simple keyword matching
+        return fallback_intent_detection(query)
+    intent_cache.set(query, INTENT_CACHE_VERSION, intent_result)
     return intent_result
 
 def fallback_intent_detection(query: str) -> Dict[str, Any]:
@@ -160,8 +214,29 @@ def fallback_intent_detection(query: str) -> Dict[str, Any]:
     else:
         return {"intent": "general_rag", "confidence": 0.6}
 
+@dataclass
+class PendingGeneration:
+    """An LLM call prepared by prepare_response(); the caller runs it with a provider slot."""
+    chain: Any
+    inputs: Dict[str, str]
+    query: str
+    intent: str
+    # Retrieved context, for the extractive answer if the call fails
+    context: str
+    user_id: Optional[str] = None
+    session_id: Optional[str] = None
+    # The system-prompt retry after a failed call (not counted by the circuit breaker)
+    fallback: bool = False
+
 def get_response_by_intent(query: str, intent: str, vector_store=None, user_id=None, session_id=None) -> str:
     """Get response based on intent with fallback."""
+    prepared = prepare_response(query, intent, vector_store, user_id, session_id)
+    return prepared if isinstance(prepared, str) else generate(prepared)
+
+def prepare_response(query: str, intent: str, vector_store=None, user_id=None,
+                     session_id=None) -> Union[str, PendingGeneration]:
+    """Everything before the LLM call: a finished answer, or the generation to run."""
+    context = ""
     try:
         # Use user-specific LLM if user_id is provided
         if user_id:
@@ -174,8 +249,9 @@ def get_response_by_intent(query: str, intent: str, vector_store=None, user_id=N
             chains = get_chains(user_id, session_id)
         
         if not chains:
-            # No LLM available, use intent-based responses
-            return get_intent_based_response(query, intent, user_id, session_id)
+            # No LLM available: answer extractively from retrieved context further down
+            llm_circuit.record_failure()
+            chains = {}
         
         # Map intent to chain
         intent_map = {
@@ -215,10 +291,10 @@ def get_response_by_intent(query: str, intent: str, vector_store=None, user_id=N
         # Custom handler for user_last_question intent
         if intent == 'user_last_question' and user_id and session_id:
             try:
-                history = get_chat_history(user_id, session_id, limit=2)
-                # The most recent is the current question, so get the second most recent
-                if len(history) > 1:
-                    last_q = history[1].get('query')
+                # Turns are recorded after answering, so the newest one is the previous question
+                history = session_history.recent(user_id, session_id, limit=1)
+                if history:
+                    last_q = history[0].get('query')
                     if last_q:
                         return f"Your last question was: '{last_q}'"
                 return "I couldn't find your previous question in this session."
@@ -242,196 +318,172 @@ def get_response_by_intent(query: str, intent: str, vector_store=None, user_id=N
         contradiction_context = ""
         if user_id and session_id and any(phrase in q_lower for phrase in contradiction_phrases):
             try:
-                history = get_chat_history(user_id, session_id, limit=2)
-                if len(history) > 1:
-                    prev_q = history[1].get('query')
-                    prev_a = history[1].get('answer')
+                history = session_history.recent(user_id, session_id, limit=1)
+                if history:
+                    prev_q = history[0].get('query')
+                    prev_a = history[0].get('answer')
                     if prev_q and prev_a:
                         contradiction_context = f"Previous user question: {prev_q}\nPrevious assistant answer: {prev_a}\n"
             except Exception as e:
                 logger.error(f"Failed to fetch chat history for contradiction context: {str(e)}")
         chain_name = intent_map.get(intent, 'system')
         chain = chains.get(chain_name)
-        if not chain:
+        if not chain and chains:
             return "I apologize, but I'm having trouble processing your request right now. Please try again later."
         # Prepare context for RAG with enhanced namespace search
         context = ""
+        best_score = None
         
         # ALWAYS try to retrieve from Pinecone for any intent that might need context
         if vector_store:
             try:
-                logger.info(f"🔍 Attempting Pinecone retrieval for intent: {intent}")
-                
-                # For background-related queries, prioritize background namespace
-                if any(keyword in query.lower() for keyword in ['background', 'education', 'experience', 'degree', 'graduated', 'completed', 'hanzla']):
-                    logger.info("🎯 Detected background-related query, prioritizing background namespace")
-                    background_context = get_category_specific_context(query, 'background', top_k=3)
-                    if background_context:
-                        logger.info(f"✅ Found {len(background_context)} results from background namespace")
-                        context = "\n\n".join(background_context)
-                        logger.info(f"📝 Context length: {len(context)} characters")
-                    else:
-                        # Fallback to cross-namespace search
-                        search_results = search_across_namespaces(query, top_k=5)
-                        if search_results:
-                            logger.info(f"✅ Found {len(search_results)} results from cross-namespace search")
-                            context_parts = []
-                            for result in search_results[:3]:  # Top 3 results
-                                doc_content = result['document'].page_content
-                                category = result['category']
-                                context_parts.append(f"[{category.upper()}] {doc_content}")
-                            context = "\n\n".join(context_parts)
-                            logger.info(f"📝 Context length: {len(context)} characters")
-                
-                # For project-related queries, prioritize projects namespace
-                elif any(keyword in query.lower() for keyword in ['project', 'work', 'developed', 'built', 'created']):
-                    logger.info("🎯 Detected project-related query, prioritizing projects namespace")
-                    
-                    # For generic project queries, try specific project keywords
-                    if 'project' in query.lower() and not any(specific in query.lower() for specific in ['melanoma', 'breast', 'diabetes', 'nutrition', 'lung', 'cancer']):
-                        logger.info("🔍 Generic project query detected, trying specific project keywords")
-                        # Try multiple specific project queries to get comprehensive results
-                        project_keywords = [
-                            "melanoma cancer prediction",
-                            "breast cancer classification", 
-                            "diabetes prediction",
-                            "nutrition analyzer",
-                            "lung cancer classification"
-                        ]
-                        
-                        all_project_context = []
-                        for keyword in project_keywords:
-                            keyword_context = get_category_specific_context(keyword, 'projects', top_k=1)
-                            if keyword_context:
-                                all_project_context.extend(keyword_context)
-                        
-                        if all_project_context:
-                            logger.info(f"✅ Found {len(all_project_context)} results from specific project searches")
-                            context = "\n\n".join(all_project_context[:3])  # Limit to top 3
-                            logger.info(f"📝 Context length: {len(context)} characters")
-                        else:
-                            # Fallback to original query
-                            project_context = get_category_specific_context(query, 'projects', top_k=3)
-                            if project_context:
-                                logger.info(f"✅ Found {len(project_context)} results from projects namespace")
-                                context = "\n\n".join(project_context)
-                                logger.info(f"📝 Context length: {len(context)} characters")
-                            else:
-                                # Fallback to cross-namespace search
-                                search_results = search_across_namespaces(query, top_k=5)
-                                if search_results:
-                                    logger.info(f"✅ Found {len(search_results)} results from cross-namespace search")
-                                    context_parts = []
-                                    for result in search_results[:3]:  # Top 3 results
-                                        doc_content = result['document'].page_content
-                                        category = result['category']
-                                        context_parts.append(f"[{category.upper()}] {doc_content}")
-                                    context = "\n\n".join(context_parts)
-                                    logger.info(f"📝 Context length: {len(context)} characters")
-                    else:
-                        # For specific project queries, use original logic
-                        project_context = get_category_specific_context(query, 'projects', top_k=3)
-                        if project_context:
-                            logger.info(f"✅ Found {len(project_context)} results from projects namespace")
-                            context = "\n\n".join(project_context)
-                            logger.info(f"📝 Context length: {len(context)} characters")
-                        else:
-                            # Fallback to cross-namespace search
-                            search_results = search_across_namespaces(query, top_k=5)
-                            if search_results:
-                                logger.info(f"✅ Found {len(search_results)} results from cross-namespace search")
-                                context_parts = []
-                                for result in search_results[:3]:  # Top 3 results
-                                    doc_content = result['document'].page_content
-                                    category = result['category']
-                                    context_parts.append(f"[{category.upper()}] {doc_content}")
-                                context = "\n\n".join(context_parts)
-                                logger.info(f"📝 Context length: {len(context)} characters")
+                plan = select_plan(query, intent)
+                logger.info(f"🔍 Running retrieval plan '{plan.name}' for intent: {intent}")
+                result = plan_executor.execute(plan, query, intent)
+                # The project catalog is meant to be listed whole; everything else is compressed
+                model_name = active_model()
+                chunks = result.chunks if result.from_catalog else compress_context(
+                    query, result.chunks, lambda text: count_tokens(text, model_name)
+                )
+                chunks = pack_chunks(chunks, context_budget(model_name),
+                                     lambda chunk: chunk_token_counts.count(chunk, model_name))
+                context = "\n\n".join(chunks)
+                best_score = result.best_score
+                step_timings = ", ".join(
+                    f"{t['namespace']}={t['ms']}ms" for t in result.timings if 'ms' in t and 'namespace' in t
+                )
+                if context:
+                    logger.info(f"✅ Plan '{plan.name}' stage {result.stage} found {len(result.chunks)} results "
+                                f"in {result.total_ms}ms ({step_timings})")
+                    logger.info(f"📝 Context length: {len(context)} characters")
                 else:
-                    # Use enhanced search across namespaces for other queries
-                    search_results = search_across_namespaces(query, top_k=5)
-                    if search_results:
-                        logger.info(f"✅ Found {len(search_results)} results from Pinecone")
-                        # Combine context from different namespaces
-                        context_parts = []
-                        for result in search_results[:3]:  # Top 3 results
-                            doc_content = result['document'].page_content
-                            category = result['category']
-                            context_parts.append(f"[{category.upper()}] {doc_content}")
-                        context = "\n\n".join(context_parts)
-                        logger.info(f"📝 Context length: {len(context)} characters")
-                    else:
-                        logger.warning("⚠️ No results from enhanced search, trying direct search")
-                        # Fallback to regular search
-                        docs = vector_store.similarity_search(query, k=3)
-                        if docs:
-                            logger.info(f"✅ Direct search found {len(docs)} results")
-                            context = "\n\n".join([doc.page_content for doc in docs])
-                        else:
-                            logger.warning("⚠️ No results from direct search either")
+                    logger.warning(f"⚠️ Plan '{plan.name}' found no results in {result.total_ms}ms ({step_timings})")
+            except ExecutorSaturated:
+                raise
             except Exception as e:
-                logger.warning(f"Enhanced vector search failed: {str(e)}")
+                logger.warning(f"Retrieval plan failed: {str(e)}")
                 # Fallback to regular search
                 try:
-                    docs = vector_store.similarity_search(query, k=3)
-                    if docs:
-                        logger.info(f"✅ Fallback search found {len(docs)} results")
-                        context = "\n\n".join([doc.page_content for doc in docs])
+                    hits = vector_store.similarity_search_with_score(query, k=3)
+                    best_score = max((score for _, score in hits), default=0.0)
+                    if hits:
+                        logger.info(f"✅ Fallback search found {len(hits)} results")
+                        context = "\n\n".join([doc.page_content for doc, _ in hits])
                 except Exception as fallback_e:
                     logger.warning(f"Fallback vector search also failed: {str(fallback_e)}")
         
-        # Add category-specific context based on intent if no context found
-        if not context and intent in ['career_guidance', 'ai_advice', 'cybersecurity_advice']:
-            try:
-                category_map = {
-                    'career_guidance': 'background',
-                    'ai_advice': 'ai_ml',
-                    'cybersecurity_advice': 'cybersecurity'
-                }
-                category = category_map.get(intent)
-                if category:
-                    logger.info(f"🔍 Trying category-specific search for {category}")
-                    category_context = get_category_specific_context(query, category, top_k=2)
-                    if category_context:
-                        context = "\n\n".join(category_context)
-                        logger.info(f"✅ Category-specific search found {len(category_context)} results")
-            except Exception as e:
-                logger.warning(f"Category-specific context failed: {str(e)}")
+        # Nothing retrieved is relevant enough: answer from the template instead of the LLM
+        if not contradiction_context and relevance_gate.should_skip_llm(intent, best_score, MATCH_SCORE, query):
+            return no_information_answer(query, intent)
+        
+        # Providers down or failing: grounded extractive answer instead of an LLM call
+        if not chain or not llm_circuit.allow():
+            return degraded_response(query, intent, context, user_id, session_id)
         
+        retrieved_context = context
         # Add contradiction context if present
         if contradiction_context:
             context = f"{contradiction_context}\n{context}" if context else contradiction_context
-        # Generate response
-        if context:
-            response = chain.invoke({"query": query, "context": context})
-        else:
-            # Always provide context, even if empty, to avoid template errors
-            response = chain.invoke({"query": query, "context": ""})
-        # Extract content from response
-        if hasattr(response, 'content'):
-            return response.content
-        elif isinstance(response, str):
-            return response
-        else:
-            return str(response)
+        # Always provide context, even if empty, to avoid template errors
+        return PendingGeneration(chain, {"query": query, "context": context}, query, intent,
+                                 retrieved_context, user_id, session_id)
+    except ExecutorSaturated:
+        raise
     except Exception as e:
         logger.error(f"Response generation failed: {str(e)}")
-        # Try fallback to system prompt
-        try:
-            fallback_chains = get_chains()  # Get chains again for fallback
-            system_chain = fallback_chains.get('system') if fallback_chains else None
-            if system_chain:
-                fallback_response = system_chain.invoke({"query": query, "context": ""})
-                if hasattr(fallback_response, 'content'):
-                    return fallback_response.content
-                elif isinstance(fallback_response, str):
-                    return fallback_response
-                else:
-                    return str(fallback_response)
-        except Exception as fallback_error:
-            logger.error(f"Fallback also failed: {str(fallback_error)}")
-        # Final fallback to intent-based responses
-        return get_intent_based_response(query, intent, user_id, session_id)
+        return system_fallback(query, intent, context, user_id, session_id)
+
+def system_fallback(query: str, intent: str, context: str, user_id=None, session_id=None) -> Union[str, PendingGeneration]:
+    """The system-prompt retry after a failure, or the extractive answer if there is no chain."""
+    try:
+        fallback_chains = get_chains()  # Get chains again for fallback
+        system_chain = fallback_chains.get('system') if fallback_chains else None
+        if system_chain:
+            return PendingGeneration(system_chain, {"query": query, "context": ""}, query, intent,
+                                     context, user_id, session_id, fallback=True)
+    except Exception as fallback_error:
+        logger.error(f"Fallback also failed: {str(fallback_error)}")
+    # Final fallback: extractive answer from whatever was retrieved
+    return degraded_response(query, intent, context, user_id, session_id)
+
+def generate(pending: PendingGeneration) -> str:
+    """Run a prepared generation on the calling thread (scripts; the endpoint uses generate_async)."""
+    succeeded = None
+    try:
+        # Fair share of provider slots across clients; interactive before background work
+        with llm_scheduler.slot():
+            response = pending.chain.invoke(pending.inputs)
+        succeeded = True
+        return response_text(response)
+    except SchedulerTimeout:
+        # Waited too long behind other clients: answer without the LLM, no circuit penalty
+        return degraded_response(pending.query, pending.intent, pending.context, pending.user_id, pending.session_id)
+    except Exception as e:
+        succeeded = False
+        if pending.fallback:
+            logger.error(f"Fallback also failed: {str(e)}")
+            return degraded_response(pending.query, pending.intent, pending.context, pending.user_id, pending.session_id)
+        logger.error(f"Response generation failed: {str(e)}")
+        retry = system_fallback(pending.query, pending.intent, pending.context, pending.user_id, pending.session_id)
+        return retry if isinstance(retry, str) else generate(retry)
+    finally:
+        _record_outcome(pending, succeeded)
+
+async def generate_async(pending: PendingGeneration) -> str:
+    """generate() for the event loop. The provider slot is taken here before the call is handed
+    to the LLM executor, the same order as the enhanced chat path, so executor threads never
+    sit blocked waiting for a slot."""
+    succeeded = None
+    try:
+        response = await llm_scheduler.run(llm_executor, pending.chain.invoke, pending.inputs)
+        succeeded = True
+        return response_text(response)
+    except SchedulerTimeout:
+        # Waited too long behind other clients: answer without the LLM, no circuit penalty
+        return await llm_executor.run(degraded_response, pending.query, pending.intent, pending.context,
+                                      pending.user_id, pending.session_id)
+    except ExecutorSaturated:
+        raise
+    except Exception as e:
+        succeeded = False
+        if pending.fallback:
+            logger.error(f"Fallback also failed: {str(e)}")
+            return await llm_executor.run(degraded_response, pending.query, pending.intent, pending.context,
+                                          pending.user_id, pending.session_id)
+        logger.error(f"Response generation failed: {str(e)}")
+        retry = await llm_executor.run(system_fallback, pending.query, pending.intent, pending.context,
+                                       pending.user_id, pending.session_id)
+        return retry if isinstance(retry, str) else await generate_async(retry)
+    finally:
+        _record_outcome(pending, succeeded)
+
+def _record_outcome(pending: PendingGeneration, succeeded: Optional[bool]):
+    if pending.fallback:
+        return
+    if succeeded is True:
+        llm_circuit.record_success()
+    elif succeeded is False:
+        llm_circuit.record_failure()
+    else:
+        # Never reached the provider (queue timeout, shed, cancelled): free the half-open probe
+        llm_circuit.release_probe()
+
+def response_text(response: Any) -> str:
+    """Extract content from an LLM response."""
+    if hasattr(response, 'content'):
+        return response.content
+    elif isinstance(response, str):
+        return response
+    else:
+        return str(response)
+
+def degraded_response(query: str, intent: str, context: str, user_id=None, session_id=None) -> str:
+    """Extractive answer from retrieved context, or the intent-based reply when there is none."""
+    answer = extractive_answer(query, context.split("\n\n"), intent) if context else None
+    if answer:
+        logger.warning(f"Serving extractive answer for query: {query[:50]}...")
+        return answer
+    return get_intent_based_response(query, intent, user_id, session_id)
 
 def get_intent_based_response(query: str, intent: str, user_id=None, session_id=None) -> str:
     """Generate response based on intent when no LLM is available."""
@@ -443,7 +495,7 @@ def get_intent_based_response(query: str, intent: str, user_id=None, session_id=
     elif intent == "user_last_question":
         # Get chat history for context
         try:
-            history = get_chat_history(user_id or "default", session_id or "default", limit=5)
+            history = session_history.recent(user_id or "default", session_id or "default", limit=1)
             if history:
                 last_query = history[0].get('query', 'your previous question')
                 return f"Your last question was: '{last_query}'. How can I help you further?"
@@ -477,11 +529,13 @@ def get_intent_based_response(query: str, intent: str, user_id=None, session_id=
         return "Hello! I'm Hanzala Nawaz, an AI Engineer and Cybersecurity Analyst. I'm here to help you with career guidance, technical questions, or share my experience. What would you like to know?"
 
 @chat_router.post("/query", response_model=QueryResponse)
-async def query_chat(request: QueryRequest):
+async def query_chat(request: QueryRequest, http_request: Request):
     """Process chat query with fallback support."""
     start_time = time.time()
     log_warning = None
     try:
+        check_capacity(llm_executor)
+        set_request_flow(request.user_id, client_ip(http_request))
         # Get LLM and vector store for specific user
         llm = get_llm(request.user_id, request.session_id)
         vector_store = None
@@ -489,27 +543,19 @@ async def query_chat(request: QueryRequest):
             vector_store = get_vector_store()
         except Exception as e:
             logger.warning(f"Vector store not available: {str(e)}")
-        # Detect intent
-        intent_result = detect_intent(request.query)
+        # Detect intent (blocking work runs on the bounded LLM executor, off the event loop)
+        intent_result = await detect_intent_async(request.query)
         intent = intent_result.get("intent", "general_rag")
         confidence = intent_result.get("confidence", 0.5)
-        # Get response (pass user_id/session_id for last question intent)
-        response = get_response_by_intent(request.query, intent, vector_store, user_id=request.user_id, session_id=request.session_id)
+        # Get response (pass user_id/session_id for last question intent); retrieval runs on
+        # the executor, then the provider call is given a slot before it goes back there
+        prepared = await llm_executor.run(
+            prepare_response, request.query, intent, vector_store,
+            user_id=request.user_id, session_id=request.session_id
+        )
+        response = prepared if isinstance(prepared, str) else await generate_async(prepared)
         # Calculate response time
         response_time_ms = int((time.time() - start_time) * 1000)
-        # Log the interaction
-        try:
-            log_chat(
-                user_id=request.user_id,
-                session_id=request.session_id,
-                query=request.query,
-                answer=response,
-                intent=intent,
-                response_time_ms=response_time_ms
-            )
-        except Exception as e:
-            logger.error(f"Failed to log chat: {str(e)}")
-            log_warning = "Warning: Your message was not saved to chat history due to a server/database error."
         # Get user-specific provider information
         user_provider = provider_router.get_provider_for_user(request.user_id, request.session_id)
         provider_info = f"{user_provider}"
@@ -520,6 +566,17 @@ async def query_chat(request: QueryRequest):
         # Add fallback indicator if using intent-based response
         elif "I have knowledge about various topics" in response or "Hello! I'm Hanzala Nawaz" in response:
             provider_info = f"{user_provider} (Intent-based fallback)"
+        # Log the interaction (queued for the background writer)
+        if not chat_log_writer.log(
+            user_id=request.user_id,
+            session_id=request.session_id,
+            query=request.query,
+            answer=response,
+            intent=intent,
+            response_time_ms=response_time_ms,
+            provider=provider_info
+        ):
+            log_warning = "Warning: Your message was not saved to chat history due to a server/database error."
         
         return QueryResponse(
             response=response if not log_warning else f"{response}\n\n{log_warning}",
@@ -531,6 +588,13 @@ async def query_chat(request: QueryRequest):
         )
     except HTTPException:
         raise
+    except ExecutorSaturated as e:
+        logger.warning(f"Query shed: {e}")
+        return JSONResponse(
+            status_code=503,
+            headers=e.headers(),
+            content={"error": "Service busy", "detail": "Too many questions right now. Please try again in a few seconds."}
+        )
     except Exception as e:
         logger.error(f"Query processing failed: {str(e)}")
         logger.error(traceback.format_exc())
@@ -538,7 +602,7 @@ async def query_chat(request: QueryRequest):
         try:
             if provider_manager.fallback_to_next_provider("chat"):
                 # Retry with new provider
-                return await query_chat(request)
+                return await query_chat(request, http_request)
         except Exception as fallback_error:
             logger.error(f"Fallback also failed: {str(fallback_error)}")
         raise HTTPException(
@@ -571,7 +635,7 @@ async def get_chat_history_endpoint(
 ):
     """Get chat history for a user session."""
     try:
-        messages = get_chat_history(user_id, session_id, limit)
+        messages = await get_chat_history_async(user_id, session_id, limit)
         if not messages:
             return ChatHistoryResponse(
                 messages=[],
@@ -681,17 +745,7 @@ async def health_check():
         provider_status = provider_manager.get_provider_status()
         
         # Check database
-        db_healthy = True
-        try:
-            from app.core.database import get_connection_pool
-            pool = get_connection_pool()
-            if pool:
-                with pool.getconn() as conn:
-                    with conn.cursor() as cursor:
-                        cursor.execute("SELECT 1")
-        except Exception as e:
-            logger.error(f"Database health check failed: {str(e)}")
-            db_healthy = False
+        db_healthy = await check_database_async()
         
         # Check vector store
         vector_healthy = True
@@ -1,5 +1,10 @@
 import time
-from fastapi import APIRouter, BackgroundTasks
+from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
+from app.core.config import settings
+from app.core.executors import ExecutorSaturated, check_capacity, llm_executor, vector_executor
+from app.core.llm_scheduler import set_request_flow
 from app.schemas.schema import QueryRequest, QueryResponse
 from app.services.enhanced_chat_service import EnhancedChatService, add_debug_endpoint
 from loguru import logger
@@ -8,22 +13,58 @@ chat_service = EnhancedChatService()
 enhanced_chat_router = APIRouter()
 add_debug_endpoint(enhanced_chat_router, chat_service)
 
+def client_ip(http_request: Request) -> Optional[str]:
+    """Best-effort client address for per-IP rate limiting."""
+    if settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+        forwarded = http_request.headers.get("x-forwarded-for", "")
+        if forwarded.strip():
+            return forwarded.split(",")[0].strip()
+    return http_request.client.host if http_request.client else None
+
+def _overloaded_response(error: ExecutorSaturated) -> JSONResponse:
+    """503 for a request shed because a dependency's executor queue is full."""
+    return JSONResponse(
+        status_code=503,
+        headers=error.headers(),
+        content={
+            "error": "Service busy",
+            "detail": "HanzlaGPT is handling a lot of questions right now. Please try again in a few seconds."
+        }
+    )
+
 @enhanced_chat_router.post("/query", response_model=QueryResponse)
 async def enhanced_query_chat(
     request: QueryRequest,
-    background_tasks: BackgroundTasks
+    background_tasks: BackgroundTasks,
+    http_request: Request,
+    response: Response
 ):
     """Enhanced chat query endpoint with professional features."""
     start_time = time.time()
     try:
+        # Shed before touching the rate limiter, so a rejected request does not use up quota
+        check_capacity(vector_executor, llm_executor)
+        address = client_ip(http_request)
+        # LLM calls made for this request are queued fairly against other clients' calls
+        set_request_flow(request.user_id, address)
+        decision = await chat_service.check_rate_limit(request.user_id, request.session_id, address)
+        if not decision.allowed:
+            # User-friendly error JSON for frontend display
+            return JSONResponse(
+                status_code=429,
+                headers=decision.headers(),
+                content={
+                    "error": "Query limit reached",
+                    "detail": f"You have reached the limit of {decision.rate.describe()}. Please try again later or contact the site owner for more access."
+                }
+            )
+        response.headers.update(decision.headers())
         chat_response = await chat_service.process_chat_query(
             query=request.query,
             user_id=request.user_id,
             session_id=request.session_id,
             use_cache=True
         )
-        # If rate limit or error, return JSONResponse directly
-        from fastapi.responses import JSONResponse
         if isinstance(chat_response, JSONResponse):
             return chat_response
         response_time_ms = int((time.time() - start_time) * 1000)
@@ -37,6 +78,9 @@ async def enhanced_query_chat(
             context_used=chat_response.context_used,
             error=chat_response.error
         )
+    except ExecutorSaturated as e:
+        logger.warning(f"Enhanced chat query shed: {e}")
+        return _overloaded_response(e)
     except Exception as e:
         logger.error(f"Enhanced chat query failed: {str(e)}")
         raise
@@ -68,17 +112,24 @@ async def get_enhanced_greeting():
 async def get_chat_history_endpoint(
     user_id: str = "anonymous",
     session_id: str = "default",
-    limit: int = 50
+    limit: int = 50,
+    cursor: Optional[str] = None
 ):
-    """Get chat history for a user and session."""
+    """Get chat history for a user and session, newest first. Pass next_cursor back as cursor for older pages."""
+    from app.core.database import decode_history_cursor, get_chat_history_page_async
+    if cursor:
+        try:
+            decode_history_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
     try:
-        from app.core.database import get_chat_history
-        history = get_chat_history(user_id, session_id, limit)
+        page = await get_chat_history_page_async(user_id, session_id, limit, cursor)
         return {
             "user_id": user_id,
             "session_id": session_id,
-            "history": history,
-            "count": len(history)
+            "history": page["messages"],
+            "count": len(page["messages"]),
+            "next_cursor": page["next_cursor"]
         }
     except Exception as e:
         logger.error(f"Failed to get chat history: {str(e)}")
@@ -87,6 +138,20 @@ async def get_chat_history_endpoint(
             "session_id": session_id,
             "history": [],
             "count": 0,
+            "next_cursor": None,
             "error": "Failed to retrieve chat history"
         }
-         
\ No newline at end of file
+         
+
+@enhanced_chat_router.get("/analytics")
+async def get_chat_analytics_endpoint(
+    granularity: str = Query("hour", pattern="^(hour|day)$"),
+    window: int = Query(24, ge=1, le=24 * 31)
+):
+    """Intent mix, provider usage and latency percentiles from the pre-aggregated rollups."""
+    from app.core.analytics import get_chat_analytics
+    try:
+        return await get_chat_analytics(granularity, window)
+    except Exception as e:
+        logger.error(f"Failed to get chat analytics: {str(e)}")
+        raise HTTPException(status_code=503, detail="Analytics unavailable")
@@ -4,6 +4,10 @@ api_router = APIRouter()
 
 # Include both original and enhanced chat routers
 from app.api.endpoints.enhanced_chat import enhanced_chat_router
+from app.api.endpoints.admin import admin_router
 
 # Unified chat endpoint (streaming & non-stream)
-api_router.include_router(enhanced_chat_router, prefix="/chat", tags=["Chat"])
\ No newline at end of file
+api_router.include_router(enhanced_chat_router, prefix="/chat", tags=["Chat"])
+
+# Operational endpoints (require X-Admin-Key)
+api_router.include_router(admin_router, prefix="/admin", tags=["Admin"])
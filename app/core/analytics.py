@@ -0,0 +1,177 @@
+"""
+Chat Analytics for HanzlaGPT
+Hourly/daily rollups of chat traffic per intent and provider, maintained on the logging path
+"""
+import json
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from app.core.sketch import LatencySketch
+
+GRANULARITIES = ("hour", "day")
+# Relative error of reported latency percentiles
+SKETCH_ACCURACY = 0.01
+QUANTILES = {"p50": 0.5, "p95": 0.95, "p99": 0.99}
+
+CREATE_ROLLUPS_SQL = """
+    CREATE TABLE IF NOT EXISTS chat_rollups (
+        granularity VARCHAR(8) NOT NULL,
+        bucket_start TIMESTAMP NOT NULL,
+        intent VARCHAR(100) NOT NULL,
+        provider VARCHAR(100) NOT NULL,
+        count BIGINT NOT NULL DEFAULT 0,
+        latency_count BIGINT NOT NULL DEFAULT 0,
+        latency_sum_ms BIGINT NOT NULL DEFAULT 0,
+        latency_min_ms INTEGER,
+        latency_max_ms INTEGER,
+        latency_sketch JSONB NOT NULL DEFAULT '{}'::jsonb,
+        PRIMARY KEY (granularity, bucket_start, intent, provider)
+    );
+"""
+# Adds two {bucket: count} maps; lets concurrent workers merge sketches inside one upsert
+CREATE_MERGE_FUNCTION_SQL = """
+    CREATE OR REPLACE FUNCTION merge_count_maps(a JSONB, b JSONB) RETURNS JSONB
+    LANGUAGE sql IMMUTABLE AS $$
+        SELECT COALESCE(jsonb_object_agg(key, total), '{}'::jsonb)
+        FROM (
+            SELECT key, SUM(value::text::bigint) AS total
+            FROM (
+                SELECT * FROM jsonb_each(COALESCE(a, '{}'::jsonb))
+                UNION ALL
+                SELECT * FROM jsonb_each(COALESCE(b, '{}'::jsonb))
+            ) entries
+            GROUP BY key
+        ) merged;
+    $$;
+"""
+UPSERT_ROLLUP_SQL = """
+    INSERT INTO chat_rollups (granularity, bucket_start, intent, provider, count, latency_count,
+                              latency_sum_ms, latency_min_ms, latency_max_ms, latency_sketch)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s::jsonb)
+    ON CONFLICT (granularity, bucket_start, intent, provider) DO UPDATE SET
+        count = chat_rollups.count + EXCLUDED.count,
+        latency_count = chat_rollups.latency_count + EXCLUDED.latency_count,
+        latency_sum_ms = chat_rollups.latency_sum_ms + EXCLUDED.latency_sum_ms,
+        latency_min_ms = LEAST(chat_rollups.latency_min_ms, EXCLUDED.latency_min_ms),
+        latency_max_ms = GREATEST(chat_rollups.latency_max_ms, EXCLUDED.latency_max_ms),
+        latency_sketch = merge_count_maps(chat_rollups.latency_sketch, EXCLUDED.latency_sketch);
+"""
+SELECT_ROLLUPS_SQL = """
+    SELECT bucket_start, intent, provider, count, latency_count, latency_sum_ms,
+           latency_min_ms, latency_max_ms, latency_sketch
+    FROM chat_rollups
+    WHERE granularity = %s AND bucket_start >= %s
+    ORDER BY bucket_start;
+"""
+
+
+def bucket_start(created_at: Optional[datetime], granularity: str) -> datetime:
+    """Truncate a timestamp to its hour/day bucket (naive local time, like chat_history)."""
+    if created_at is None:
+        created_at = datetime.now()
+    elif created_at.tzinfo is not None:
+        created_at = created_at.astimezone().replace(tzinfo=None)
+    if granularity == "hour":
+        return created_at.replace(minute=0, second=0, microsecond=0)
+    return created_at.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class _Rollup:
+    __slots__ = ("count", "latency_sum", "latency_min", "latency_max", "sketch")
+
+    def __init__(self):
+        self.count = 0
+        self.latency_sum = 0
+        self.latency_min: Optional[int] = None
+        self.latency_max: Optional[int] = None
+        self.sketch = LatencySketch(SKETCH_ACCURACY)
+
+    def add_latency(self, ms: int, count: int = 1):
+        self.latency_sum += ms * count
+        self.latency_min = ms if self.latency_min is None else min(self.latency_min, ms)
+        self.latency_max = ms if self.latency_max is None else max(self.latency_max, ms)
+        self.sketch.add(ms, count)
+
+    def merge_row(self, row: Dict[str, Any]):
+        self.count += row["count"]
+        self.latency_sum += row["latency_sum_ms"]
+        for attr, key, pick in (("latency_min", "latency_min_ms", min), ("latency_max", "latency_max_ms", max)):
+            if row[key] is not None:
+                current = getattr(self, attr)
+                setattr(self, attr, row[key] if current is None else pick(current, row[key]))
+        self.sketch.merge(LatencySketch.from_dict(row["latency_sketch"], SKETCH_ACCURACY))
+
+    def summary(self) -> Dict[str, Any]:
+        latency_count = self.sketch.count
+        return {
+            "count": self.count,
+            "latency_ms": {
+                "mean": round(self.latency_sum / latency_count, 1) if latency_count else None,
+                "min": self.latency_min,
+                "max": self.latency_max,
+                **{name: _round(self.sketch.quantile(q)) for name, q in QUANTILES.items()},
+            },
+        }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 1)
+
+
+def rollup_rows(records: Iterable[Dict[str, Any]]) -> List[Tuple]:
+    """Aggregate chat log records into UPSERT_ROLLUP_SQL parameter tuples (one per bucket/intent/provider).
+
+    Rows come out sorted by their conflict key, so concurrent batches lock the same rollup
+    rows in the same order and cannot deadlock each other.
+    """
+    groups: Dict[Tuple[str, datetime, str, str], _Rollup] = defaultdict(_Rollup)
+    for record in records:
+        intent = (record.get("intent") or "unknown")[:100]
+        provider = (record.get("provider") or "unknown")[:100]
+        latency = record.get("response_time_ms")
+        for granularity in GRANULARITIES:
+            rollup = groups[(granularity, bucket_start(record.get("created_at"), granularity), intent, provider)]
+            rollup.count += 1
+            if latency is not None:
+                rollup.add_latency(int(latency))
+    return [
+        (granularity, start, intent, provider, r.count, r.sketch.count, r.latency_sum,
+         r.latency_min, r.latency_max, json.dumps(r.sketch.to_dict()))
+        for (granularity, start, intent, provider), r in sorted(groups.items(), key=lambda item: item[0])
+    ]
+
+
+def summarize_rollups(rows: List[Dict[str, Any]], granularity: str) -> Dict[str, Any]:
+    """Merge rollup rows into totals, per-intent, per-provider and per-bucket summaries."""
+    total = _Rollup()
+    by_intent: Dict[str, _Rollup] = defaultdict(_Rollup)
+    by_provider: Dict[str, _Rollup] = defaultdict(_Rollup)
+    by_bucket: Dict[datetime, _Rollup] = defaultdict(_Rollup)
+    for row in rows:
+        for rollup in (total, by_intent[row["intent"]], by_provider[row["provider"]], by_bucket[row["bucket_start"]]):
+            rollup.merge_row(row)
+    return {
+        "granularity": granularity,
+        "total": total.summary(),
+        "intents": {intent: r.summary() for intent, r in sorted(by_intent.items(), key=lambda kv: -kv[1].count)},
+        "providers": {provider: r.summary() for provider, r in sorted(by_provider.items(), key=lambda kv: -kv[1].count)},
+        "series": [{"bucket_start": start.isoformat(), **r.summary()} for start, r in sorted(by_bucket.items())],
+    }
+
+
+async def get_chat_analytics(granularity: str = "hour", window: int = 24) -> Dict[str, Any]:
+    """
+    Traffic, intent mix, provider usage and latency percentiles over the last ``window``
+    hours or days. Cost depends on the window, never on the size of chat_history.
+    """
+    from psycopg.rows import dict_row
+    from app.core.database import get_async_db_connection
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {GRANULARITIES}")
+    now = bucket_start(datetime.now(), granularity)
+    since = now - (timedelta(hours=window - 1) if granularity == "hour" else timedelta(days=window - 1))
+    async with get_async_db_connection() as conn:
+        async with conn.cursor(row_factory=dict_row) as cur:
+            await cur.execute(SELECT_ROLLUPS_SQL, (granularity, since), prepare=True)
+            rows = await cur.fetchall()
+    return {"since": since.isoformat(), "window": window, **summarize_rollups(rows, granularity)}
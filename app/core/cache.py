@@ -0,0 +1,639 @@
+"""
+Response Cache for HanzlaGPT
+Pluggable cache backends (in-process, shared SQLite, optional Redis) with per-entry TTL,
+byte budget and hit/miss/eviction metrics
+"""
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+from loguru import logger
+from app.core.config import settings
+
+# Redis client is optional – only needed for CACHE_BACKEND=redis
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis = None  # type: ignore
+    REDIS_AVAILABLE = False
+
+
+def encode_value(value: Any) -> bytes:
+    """Serialize a JSON-compatible value into a compact compressed blob."""
+    return zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"), 6)
+
+
+def decode_value(blob: bytes) -> Any:
+    """Inverse of encode_value."""
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+class CacheBackend(ABC):
+    """Base class for response cache backends.
+
+    Shared backends store values as compressed JSON, so callers should only cache
+    JSON-compatible values (dicts, lists, strings, numbers). Backends whose calls do
+    I/O set ``blocking`` so async callers run them off the event loop.
+    """
+
+    blocking = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value or None if missing or expired."""
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a value with an optional TTL override."""
+        pass
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        """Delete a single key. Returns True if it existed."""
+        pass
+
+    @abstractmethod
+    def invalidate(self, predicate: Callable[[str], bool]) -> int:
+        """Delete every key matching the predicate. Returns the number removed."""
+        pass
+
+    @abstractmethod
+    def clear(self):
+        """Remove all entries."""
+        pass
+
+    @abstractmethod
+    def list_entries(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Describe the most recently used entries, for admin inspection."""
+        pass
+
+    @abstractmethod
+    def get_stats(self) -> Dict[str, Any]:
+        """Get size and hit/miss/eviction counters."""
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    @abstractmethod
+    def get_name(self) -> str:
+        """Get backend name."""
+        pass
+
+
+@dataclass
+class CacheEntry:
+    """A single cached value with its bookkeeping."""
+    value: Any
+    size_bytes: int
+    created_at: float
+    expires_at: Optional[float]
+    hits: int = 0
+
+    def is_expired(self, now: float) -> bool:
+        return self.expires_at is not None and now >= self.expires_at
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Thread-safe in-process LRU cache bounded by entry count and total byte size.
+
+    Entries expire after their TTL and are evicted least-recently-used first when
+    either bound is exceeded, so memory stays flat regardless of traffic.
+    """
+
+    def __init__(self, max_entries: int = 2048, max_bytes: int = 32 * 1024 * 1024,
+                 default_ttl: Optional[float] = 3600):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._sets_since_sweep = 0
+
+    @staticmethod
+    def _estimate_size(value: Any) -> int:
+        """Approximate the memory footprint of a value by its pickled size."""
+        try:
+            return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            return len(repr(value).encode("utf-8"))
+
+    def _remove(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry.size_bytes
+        return entry
+
+    def _sweep_expired(self, now: float):
+        """Drop every expired entry (called periodically from set)."""
+        expired = [key for key, entry in self._entries.items() if entry.is_expired(now)]
+        for key in expired:
+            self._remove(key)
+        self.expirations += len(expired)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.is_expired(now):
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            entry.hits += 1
+            self.hits += 1
+            return entry.value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a value, evicting least recently used entries to respect the bounds."""
+        size = self._estimate_size(value)
+        if size > self.max_bytes:
+            logger.warning(f"Value for cache key {key[:60]} exceeds cache byte budget ({size} bytes), not caching")
+            return
+        ttl = self.default_ttl if ttl is None else ttl
+        now = time.time()
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = CacheEntry(
+                value=value,
+                size_bytes=size,
+                created_at=now,
+                expires_at=(now + ttl) if ttl else None,
+            )
+            self.current_bytes += size
+            self._sets_since_sweep += 1
+            if self._sets_since_sweep >= 256:
+                self._sweep_expired(now)
+                self._sets_since_sweep = 0
+            while self._entries and (len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes):
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def delete(self, key: str) -> bool:
+        """Delete a single key. Returns True if it existed."""
+        with self._lock:
+            return self._remove(key) is not None
+
+    def invalidate(self, predicate: Callable[[str], bool]) -> int:
+        """Delete every key matching the predicate. Returns the number removed."""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._remove(key)
+        if keys:
+            logger.info(f"Invalidated {len(keys)} cache entries")
+        return len(keys)
+
+    def clear(self):
+        """Remove all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and not entry.is_expired(time.time())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def list_entries(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Describe the most recently used entries, for admin inspection."""
+        now = time.time()
+        with self._lock:
+            items = list(self._entries.items())[-limit:] if limit > 0 else []
+        return [
+            {
+                "key": key,
+                "size_bytes": entry.size_bytes,
+                "hits": entry.hits,
+                "age_seconds": round(now - entry.created_at, 1),
+                "ttl_remaining_seconds": round(entry.expires_at - now, 1) if entry.expires_at else None,
+            }
+            for key, entry in reversed(items)
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get size and hit/miss/eviction counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "default_ttl_seconds": self.default_ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "backend": self.get_name(),
+            }
+
+    def get_name(self) -> str:
+        return "memory"
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """Cache shared by every worker on the host through a SQLite database in WAL mode.
+
+    Values are stored as zlib-compressed JSON. Entries (and hit/miss counters) live on
+    disk, so they survive worker restarts and deploys. Reads never take the write lock:
+    LRU touches and hit/miss counts are buffered per worker and written in batches (with
+    the next set, or every ``flush_interval`` seconds / ``max_pending`` touches). Entry
+    and byte totals are kept as counters, so writes do not rescan the table.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, max_entries: int = 2048, max_bytes: int = 32 * 1024 * 1024,
+                 default_ttl: Optional[float] = 3600, flush_interval: float = 5.0, max_pending: int = 256):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._local = threading.local()
+        # Buffered reads: key -> [last access, hits], plus hit/miss counts
+        self._pending_lock = threading.Lock()
+        self._touches: Dict[str, List[float]] = {}
+        self._pending_counts = {"hits": 0, "misses": 0}
+        self._last_flush = time.time()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL,
+                last_access REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_entries_last_access ON cache_entries(last_access)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_entries_expires_at ON cache_entries(expires_at)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        # Recount the totals once per start (also upgrades databases that predate them)
+        with self._write(conn):
+            count, total_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM cache_entries"
+            ).fetchone()
+            conn.executemany(
+                "INSERT OR REPLACE INTO cache_counters (name, value) VALUES (?, ?)",
+                [("entries", count), ("bytes", total_bytes)],
+            )
+        logger.info(f"SQLite cache backend ready at {path}")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection (sqlite3 connections are not shareable across threads)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _write(self, conn: sqlite3.Connection):
+        """A write transaction, rolled back if the block raises."""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _bump(conn: sqlite3.Connection, name: str, amount: int = 1):
+        conn.execute(
+            "INSERT INTO cache_counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount),
+        )
+
+    def _delete_keys(self, conn: sqlite3.Connection, keys: List[str]) -> int:
+        """Delete entries and keep the totals in step (call inside a write transaction)."""
+        removed = total_bytes = 0
+        for key in keys:
+            row = conn.execute("DELETE FROM cache_entries WHERE key = ? RETURNING size_bytes", (key,)).fetchone()
+            if row is not None:
+                removed += 1
+                total_bytes += row[0]
+        if removed:
+            self._bump(conn, "entries", -removed)
+            self._bump(conn, "bytes", -total_bytes)
+        return removed
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        try:
+            row = self._connect().execute(
+                "SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,)
+            ).fetchone()
+        except Exception as e:
+            logger.warning(f"SQLite cache get failed: {e}")
+            return None
+        # Expired rows are left for the next set's sweep, so reads stay read-only
+        hit = row is not None and (row[1] is None or now < row[1])
+        with self._pending_lock:
+            self._pending_counts["hits" if hit else "misses"] += 1
+            if hit:
+                touch = self._touches.setdefault(key, [now, 0])
+                touch[0] = now
+                touch[1] += 1
+            due = len(self._touches) >= self.max_pending or now - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+        return decode_value(row[0]) if hit else None
+
+    def _take_pending(self):
+        with self._pending_lock:
+            touches, counts = self._touches, self._pending_counts
+            self._touches, self._pending_counts = {}, {"hits": 0, "misses": 0}
+            self._last_flush = time.time()
+        return touches, counts
+
+    def _apply_pending(self, conn: sqlite3.Connection, touches: Dict[str, List[float]], counts: Dict[str, int]):
+        if touches:
+            conn.executemany(
+                "UPDATE cache_entries SET last_access = MAX(last_access, ?), hits = hits + ? WHERE key = ?",
+                [(last_access, hits, key) for key, (last_access, hits) in touches.items()],
+            )
+        for name, amount in counts.items():
+            if amount:
+                self._bump(conn, name, amount)
+
+    def flush(self):
+        """Write buffered LRU touches and hit/miss counts (they are dropped if the write fails)."""
+        touches, counts = self._take_pending()
+        if not touches and not any(counts.values()):
+            return
+        conn = self._connect()
+        try:
+            with self._write(conn):
+                self._apply_pending(conn, touches, counts)
+        except Exception as e:
+            logger.warning(f"SQLite cache flush failed: {e}")
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        blob = encode_value(value)
+        if len(blob) > self.max_bytes:
+            logger.warning(f"Value for cache key {key[:60]} exceeds cache byte budget ({len(blob)} bytes), not caching")
+            return
+        ttl = self.default_ttl if ttl is None else ttl
+        now = time.time()
+        touches, counts = self._take_pending()
+        conn = self._connect()
+        try:
+            with self._write(conn):
+                # Buffered touches first, so eviction sees this worker's recent reads
+                self._apply_pending(conn, touches, counts)
+                self._delete_keys(conn, [key])
+                conn.execute(
+                    "INSERT INTO cache_entries (key, value, size_bytes, created_at, expires_at, last_access, hits) "
+                    "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                    (key, blob, len(blob), now, (now + ttl) if ttl else None, now),
+                )
+                self._bump(conn, "entries")
+                self._bump(conn, "bytes", len(blob))
+                expired = [row[0] for row in conn.execute(
+                    "SELECT key FROM cache_entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)
+                )]
+                if expired:
+                    self._bump(conn, "expirations", self._delete_keys(conn, expired))
+                counters = dict(conn.execute(
+                    "SELECT name, value FROM cache_counters WHERE name IN ('entries', 'bytes')"
+                ).fetchall())
+                count, total_bytes = counters.get("entries", 0), counters.get("bytes", 0)
+                victims = []
+                if count > self.max_entries or total_bytes > self.max_bytes:
+                    for old_key, size in conn.execute(
+                        "SELECT key, size_bytes FROM cache_entries ORDER BY last_access ASC"
+                    ):
+                        if count <= self.max_entries and total_bytes <= self.max_bytes:
+                            break
+                        victims.append(old_key)
+                        count -= 1
+                        total_bytes -= size
+                if victims:
+                    self._bump(conn, "evictions", self._delete_keys(conn, victims))
+        except Exception as e:
+            logger.warning(f"SQLite cache set failed: {e}")
+
+    def delete(self, key: str) -> bool:
+        conn = self._connect()
+        with self._write(conn):
+            return self._delete_keys(conn, [key]) > 0
+
+    def invalidate(self, predicate: Callable[[str], bool]) -> int:
+        conn = self._connect()
+        keys = [row[0] for row in conn.execute("SELECT key FROM cache_entries") if predicate(row[0])]
+        if not keys:
+            return 0
+        with self._write(conn):
+            removed = self._delete_keys(conn, keys)
+        logger.info(f"Invalidated {removed} cache entries")
+        return removed
+
+    def clear(self):
+        conn = self._connect()
+        with self._write(conn):
+            conn.execute("DELETE FROM cache_entries")
+            conn.execute("UPDATE cache_counters SET value = 0 WHERE name IN ('entries', 'bytes')")
+
+    def __len__(self) -> int:
+        row = self._connect().execute("SELECT value FROM cache_counters WHERE name = 'entries'").fetchone()
+        return row[0] if row else 0
+
+    def list_entries(self, limit: int = 100) -> List[Dict[str, Any]]:
+        now = time.time()
+        rows = self._connect().execute(
+            "SELECT key, size_bytes, hits, created_at, expires_at FROM cache_entries "
+            "ORDER BY last_access DESC LIMIT ?",
+            (max(limit, 0),),
+        ).fetchall()
+        return [
+            {
+                "key": key,
+                "size_bytes": size,
+                "hits": hits,
+                "age_seconds": round(now - created_at, 1),
+                "ttl_remaining_seconds": round(expires_at - now, 1) if expires_at else None,
+            }
+            for key, size, hits, created_at, expires_at in rows
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Shared counters, plus this worker's reads that are not flushed yet."""
+        counters = dict(self._connect().execute("SELECT name, value FROM cache_counters").fetchall())
+        with self._pending_lock:
+            hits = counters.get("hits", 0) + self._pending_counts["hits"]
+            misses = counters.get("misses", 0) + self._pending_counts["misses"]
+        return {
+            "entries": counters.get("entries", 0),
+            "max_entries": self.max_entries,
+            "bytes": counters.get("bytes", 0),
+            "max_bytes": self.max_bytes,
+            "default_ttl_seconds": self.default_ttl,
+            "hits": hits,
+            "misses": misses,
+            "evictions": counters.get("evictions", 0),
+            "expirations": counters.get("expirations", 0),
+            "hit_rate": (hits / (hits + misses)) if (hits + misses) else 0.0,
+            "backend": self.get_name(),
+            "path": self.path,
+        }
+
+    def get_name(self) -> str:
+        return "sqlite"
+
+
+class RedisCacheBackend(CacheBackend):
+    """Cache backed by any Redis-protocol server.
+
+    Expiry is delegated to Redis TTLs and memory bounds to the server's maxmemory policy
+    (use allkeys-lru). A pre-built client can be injected, which lets tests run against a
+    local stand-in instead of a real server.
+    """
+
+    blocking = True
+
+    def __init__(self, url: str = "", client: Any = None, prefix: str = "hanzlagpt:cache:",
+                 default_ttl: Optional[float] = 3600):
+        if client is None:
+            if not REDIS_AVAILABLE:
+                raise RuntimeError("redis package is not installed")
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+        self.default_ttl = default_ttl
+        self._stats_prefix = f"{prefix}__stats__:"
+
+    def _entry_keys(self):
+        for raw in self.client.scan_iter(match=f"{self.prefix}*"):
+            name = raw.decode("utf-8") if isinstance(raw, bytes) else raw
+            if not name.startswith(self._stats_prefix):
+                yield name[len(self.prefix):]
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            blob = self.client.get(self.prefix + key)
+            self.client.incr(self._stats_prefix + ("hits" if blob is not None else "misses"))
+            return decode_value(blob) if blob is not None else None
+        except Exception as e:
+            logger.warning(f"Redis cache get failed: {e}")
+            return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ttl = self.default_ttl if ttl is None else ttl
+        try:
+            self.client.set(self.prefix + key, encode_value(value), ex=int(ttl) if ttl else None)
+        except Exception as e:
+            logger.warning(f"Redis cache set failed: {e}")
+
+    def delete(self, key: str) -> bool:
+        return bool(self.client.delete(self.prefix + key))
+
+    def invalidate(self, predicate: Callable[[str], bool]) -> int:
+        keys = [key for key in self._entry_keys() if predicate(key)]
+        for key in keys:
+            self.client.delete(self.prefix + key)
+        if keys:
+            logger.info(f"Invalidated {len(keys)} cache entries")
+        return len(keys)
+
+    def clear(self):
+        self.invalidate(lambda key: True)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self._entry_keys())
+
+    def list_entries(self, limit: int = 100) -> List[Dict[str, Any]]:
+        entries = []
+        for key in self._entry_keys():
+            if len(entries) >= limit:
+                break
+            ttl = self.client.ttl(self.prefix + key)
+            entries.append({
+                "key": key,
+                "size_bytes": self.client.strlen(self.prefix + key),
+                "ttl_remaining_seconds": ttl if ttl and ttl > 0 else None,
+            })
+        return entries
+
+    def get_stats(self) -> Dict[str, Any]:
+        hits = int(self.client.get(self._stats_prefix + "hits") or 0)
+        misses = int(self.client.get(self._stats_prefix + "misses") or 0)
+        return {
+            "entries": len(self),
+            "default_ttl_seconds": self.default_ttl,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": (hits / (hits + misses)) if (hits + misses) else 0.0,
+            "backend": self.get_name(),
+        }
+
+    def get_name(self) -> str:
+        return "redis"
+
+
+def create_cache_backend(backend: Optional[str] = None) -> CacheBackend:
+    """Build the configured cache backend, falling back to in-process memory on failure."""
+    backend = (backend or settings.CACHE_BACKEND or "memory").lower()
+    try:
+        if backend == "sqlite":
+            return SQLiteCacheBackend(
+                path=settings.CACHE_SQLITE_PATH,
+                max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+                max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+                default_ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+            )
+        if backend == "redis":
+            return RedisCacheBackend(url=settings.REDIS_URL, default_ttl=settings.RESPONSE_CACHE_TTL_SECONDS)
+    except Exception as e:
+        logger.warning(f"Cache backend '{backend}' unavailable ({e}), falling back to in-memory cache")
+    return MemoryCacheBackend(
+        max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+        max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+        default_ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+    )
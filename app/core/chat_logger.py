@@ -0,0 +1,310 @@
+"""
+Chat Logger for HanzlaGPT
+Write-behind chat history logging with batched inserts and spill-to-disk
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional
+from loguru import logger
+from app.core.config import settings
+from app.core.executors import db_executor
+from app.core.session_history import SessionHistory, session_history
+
+
+def _default_writer(records: List[Dict[str, Any]]) -> None:
+    from app.core.database import log_chats_batch
+    log_chats_batch(records)
+
+
+class ChatLogWriter:
+    """
+    Buffers chat records in memory and inserts them in batches from a background task.
+
+    Requests only pay for an in-memory append. When the buffer is full, or the database
+    is unreachable, records are appended to a JSONL spill file and replayed once writes
+    succeed again, so history survives outages and restarts.
+    """
+
+    def __init__(
+        self,
+        max_queue: int = 10000,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        spill_path: str = "data/chat_log_spill.jsonl",
+        writer: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+        retry_backoff: float = 30.0,
+        history: Optional[SessionHistory] = None
+    ):
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path
+        self.retry_backoff = retry_backoff
+        self._writer = writer or _default_writer
+        # Recent turns are readable from memory immediately, before the batch reaches Postgres
+        self.history = history
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        # One flush at a time: stop()'s final flush may overlap a periodic one still running
+        # on an executor thread, and both would otherwise replay the same spill file
+        self._flush_lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._db_down_until = 0.0
+        self._stats = {"queued": 0, "written": 0, "spilled": 0, "replayed": 0, "failed_batches": 0, "dropped": 0, "corrupt": 0}
+
+    def log(self, user_id: str, session_id: str, query: str, answer: str,
+            intent: str = None, response_time_ms: int = None, provider: str = None) -> bool:
+        """
+        Queue a chat interaction for writing. Never blocks on the database.
+        Returns:
+            False only if the record could be neither queued nor spilled to disk.
+        """
+        record = {
+            "user_id": user_id,
+            "session_id": session_id,
+            "query": query,
+            "answer": answer,
+            "intent": intent,
+            "response_time_ms": response_time_ms,
+            "provider": provider,
+            "created_at": datetime.now(),
+        }
+        if self.history is not None:
+            self.history.append(user_id, session_id, query, answer, intent, record["created_at"])
+        self._ensure_started()
+        with self._lock:
+            if len(self._queue) < self.max_queue:
+                self._queue.append(record)
+                self._stats["queued"] += 1
+                size = len(self._queue)
+            else:
+                size = None
+        if size is None:
+            # Backpressure: the buffer is full, keep the record on disk instead of in memory
+            return self._spill([record])
+        if size >= self.batch_size:
+            self._notify()
+        return True
+
+    def _ensure_started(self):
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self.start()
+
+    def _notify(self):
+        if self._wakeup is None or self._loop is None:
+            return
+        try:
+            if asyncio.get_running_loop() is self._loop:
+                self._wakeup.set()
+                return
+        except RuntimeError:
+            pass
+        self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def start(self):
+        """Start the background flush task on the running event loop."""
+        if self._task is not None and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = self._loop.create_task(self._run())
+        logger.info("Chat log writer started")
+
+    async def stop(self):
+        """Stop the background task and flush everything still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Shutdown ignores the retry backoff: one last attempt, then spill
+        self._db_down_until = 0.0
+        # Not on the bounded executor: the final flush must not be shed
+        await asyncio.to_thread(self.flush)
+        logger.info("Chat log writer stopped")
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await db_executor.run(self.flush)
+            except Exception as e:
+                logger.error(f"Chat log flush failed: {e}")
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            count = min(self.batch_size, len(self._queue))
+            return [self._queue.popleft() for _ in range(count)]
+
+    def flush(self) -> int:
+        """Write all buffered records (and any spilled ones). Returns the number written."""
+        with self._flush_lock:
+            return self._flush()
+
+    def _flush(self) -> int:
+        if time.time() < self._db_down_until:
+            # Database still backing off: keep memory bounded and records durable
+            self._spill(self._drain())
+            return 0
+        written = self._replay_spill()
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                break
+            if not self._write(batch):
+                # Database is down: move the rest of the buffer to disk too
+                remaining = batch + self._drain()
+                self._spill(remaining)
+                break
+            written += len(batch)
+        return written
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            records = list(self._queue)
+            self._queue.clear()
+            return records
+
+    def _write(self, batch: List[Dict[str, Any]]) -> bool:
+        try:
+            self._writer(batch)
+            self._count("written", len(batch))
+            return True
+        except Exception as e:
+            self._count("failed_batches", 1)
+            self._db_down_until = time.time() + self.retry_backoff
+            logger.warning(f"Chat log batch of {len(batch)} failed, spilling to disk: {e}")
+            return False
+
+    def _spill(self, records: List[Dict[str, Any]]) -> bool:
+        if not records:
+            return True
+        try:
+            with self._spill_lock:
+                os.makedirs(os.path.dirname(os.path.abspath(self.spill_path)), exist_ok=True)
+                with open(self.spill_path, "a", encoding="utf-8") as f:
+                    for record in records:
+                        f.write(json.dumps(record, default=str) + "\n")
+            self._count("spilled", len(records))
+            return True
+        except Exception as e:
+            self._count("dropped", len(records))
+            logger.error(f"Failed to spill {len(records)} chat log records: {e}")
+            return False
+
+    def _replay_spill(self) -> int:
+        """Insert previously spilled records. Unwritten records go back to the spill file."""
+        replay_path = f"{self.spill_path}.replay"
+        with self._spill_lock:
+            if os.path.exists(self.spill_path):
+                if os.path.exists(replay_path):
+                    # Left over from an interrupted replay: add to it rather than overwrite it
+                    self._append_file(self.spill_path, replay_path)
+                    os.remove(self.spill_path)
+                else:
+                    os.replace(self.spill_path, replay_path)
+            elif not os.path.exists(replay_path):
+                return 0
+        records, corrupt = [], []
+        with open(replay_path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    created_at = datetime.fromisoformat(record["created_at"])
+                    # Older spills stored aware UTC timestamps; chat_history holds naive local time
+                    if created_at.tzinfo is not None:
+                        created_at = created_at.astimezone().replace(tzinfo=None)
+                    record["created_at"] = created_at
+                    records.append(record)
+                except (ValueError, TypeError, KeyError) as e:
+                    corrupt.append(line if line.endswith("\n") else line + "\n")
+                    logger.warning(f"Skipping corrupt spilled chat log record: {e}")
+        if corrupt:
+            self._quarantine(corrupt)
+        written = 0
+        for start in range(0, len(records), self.batch_size):
+            batch = records[start:start + self.batch_size]
+            if not self._write(batch):
+                self._spill(records[start:])
+                break
+            written += len(batch)
+        os.remove(replay_path)
+        if written:
+            self._count("replayed", written)
+            logger.info(f"Replayed {written} spilled chat log records")
+        return written
+
+    @staticmethod
+    def _append_file(source: str, target: str):
+        with open(target, "rb+") as out:
+            out.seek(0, os.SEEK_END)
+            if out.tell():
+                out.seek(-1, os.SEEK_END)
+                if out.read(1) != b"\n":
+                    out.write(b"\n")
+            with open(source, "rb") as src:
+                while True:
+                    chunk = src.read(1 << 20)
+                    if not chunk:
+                        break
+                    out.write(chunk)
+
+    def _quarantine(self, lines: List[str]):
+        """Keep unreadable spill lines for inspection instead of failing the whole replay."""
+        path = f"{self.spill_path}.corrupt"
+        try:
+            with open(path, "a", encoding="utf-8") as f:
+                f.writelines(lines)
+            logger.warning(f"Moved {len(lines)} corrupt chat log records to {path}")
+        except Exception as e:
+            logger.error(f"Failed to quarantine {len(lines)} corrupt chat log records: {e}")
+        self._count("corrupt", len(lines))
+
+    def _count(self, name: str, amount: int):
+        # Counters are updated from the event loop and executor threads
+        with self._lock:
+            self._stats[name] += amount
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth and write/spill counters."""
+        with self._lock:
+            pending = len(self._queue)
+            stats = dict(self._stats)
+        return {
+            **stats,
+            "pending": pending,
+            "max_queue": self.max_queue,
+            "spill_pending": os.path.exists(self.spill_path) or os.path.exists(f"{self.spill_path}.replay"),
+            "running": self._task is not None and not self._task.done(),
+        }
+
+
+# Global instance
+chat_log_writer = ChatLogWriter(
+    max_queue=settings.CHAT_LOG_QUEUE_SIZE,
+    batch_size=settings.CHAT_LOG_BATCH_SIZE,
+    flush_interval=settings.CHAT_LOG_FLUSH_INTERVAL_SECONDS,
+    spill_path=settings.CHAT_LOG_SPILL_PATH,
+    history=session_history
+)
@@ -0,0 +1,285 @@
+"""
+Chat History Partitions for HanzlaGPT
+Monthly range partitioning of chat_history, partition pre-creation, and retention with archival
+
+created_at is naive local time on the app host (see database.py), so month bounds come from date.today().
+"""
+import asyncio
+import gzip
+import os
+import re
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+import psycopg
+from loguru import logger
+from app.core.config import settings
+from app.core.executors import db_executor
+
+PARENT_TABLE = "chat_history"
+LEGACY_TABLE = "chat_history_legacy"
+# Catches rows outside every monthly partition (late spill replays, months maintenance missed)
+DEFAULT_TABLE = "chat_history_default"
+_BOUND_RE = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+
+@dataclass
+class Partition:
+    """An attached chat_history partition and its [lower, upper) bounds (None = unbounded)."""
+    name: str
+    lower: Optional[datetime]
+    upper: Optional[datetime]
+
+    def overlaps(self, lower: datetime, upper: datetime) -> bool:
+        return (self.lower is None or self.lower < upper) and (self.upper is None or lower < self.upper)
+
+
+def month_start(d: date, offset: int = 0) -> date:
+    """First day of the month ``offset`` months after the month of ``d``."""
+    index = d.year * 12 + (d.month - 1) + offset
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def _parse_bound_value(value: str) -> Optional[datetime]:
+    value = value.strip()
+    if value in ("MINVALUE", "MAXVALUE"):
+        return None
+    return datetime.fromisoformat(value.strip("'"))
+
+
+def parse_partition_bound(expr: str) -> Optional[tuple]:
+    """Parse pg_get_expr(relpartbound) output into (lower, upper); None for DEFAULT partitions."""
+    match = _BOUND_RE.search(expr)
+    if not match:
+        return None
+    return _parse_bound_value(match.group(1)), _parse_bound_value(match.group(2))
+
+
+def is_partitioned(conn: psycopg.Connection) -> Optional[bool]:
+    """True/False for an existing chat_history table, None if it does not exist yet."""
+    row = conn.execute(
+        "SELECT c.relkind FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE n.nspname = current_schema() AND c.relname = %s;",
+        (PARENT_TABLE,)
+    ).fetchone()
+    return None if row is None else row[0] == "p"
+
+
+def list_partitions(conn: psycopg.Connection) -> List[Partition]:
+    """Attached range partitions of chat_history, oldest first."""
+    rows = conn.execute(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = %s::regclass;",
+        (PARENT_TABLE,)
+    ).fetchall()
+    partitions = []
+    for name, expr in rows:
+        bounds = parse_partition_bound(expr or "")
+        if bounds:
+            partitions.append(Partition(name, *bounds))
+    return sorted(partitions, key=lambda p: p.lower or datetime.min)
+
+
+def create_partitioned_table(conn: psycopg.Connection):
+    """Create chat_history as a monthly partitioned table, migrating an existing plain table."""
+    state = is_partitioned(conn)
+    if state:
+        return
+    with conn.transaction():
+        if state is False:
+            logger.info("Migrating chat_history to a partitioned table")
+            # Old deployments may predate these columns; partitions must match the parent exactly
+            conn.execute(
+                f"ALTER TABLE {PARENT_TABLE} ADD COLUMN IF NOT EXISTS intent VARCHAR(100), "
+                "ADD COLUMN IF NOT EXISTS response_time_ms INTEGER, "
+                "ADD COLUMN IF NOT EXISTS provider VARCHAR(100), "
+                "ADD COLUMN IF NOT EXISTS created_at TIMESTAMP DEFAULT NOW();"
+            )
+            conn.execute(f"ALTER TABLE {PARENT_TABLE} RENAME TO {LEGACY_TABLE};")
+            # A partition's primary key must match the parent's (id, created_at); added below
+            conn.execute(f"ALTER TABLE {LEGACY_TABLE} DROP CONSTRAINT IF EXISTS {PARENT_TABLE}_pkey;")
+            for index in ("idx_chat_history_session_keyset", "idx_chat_history_user_session", "idx_chat_history_created_at"):
+                conn.execute(f"ALTER INDEX IF EXISTS {index} RENAME TO {index.replace(PARENT_TABLE, LEGACY_TABLE)};")
+            # The partition key must be NOT NULL and column types must match the new parent
+            conn.execute(f"UPDATE {LEGACY_TABLE} SET created_at = TIMESTAMP 'epoch' WHERE created_at IS NULL;")
+            conn.execute(f"ALTER TABLE {LEGACY_TABLE} ALTER COLUMN created_at SET NOT NULL, ALTER COLUMN id TYPE BIGINT;")
+            conn.execute(f"ALTER TABLE {LEGACY_TABLE} ADD CONSTRAINT {LEGACY_TABLE}_pkey PRIMARY KEY (id, created_at);")
+            conn.execute(f"ALTER SEQUENCE {PARENT_TABLE}_id_seq AS BIGINT;")
+            id_column = f"id BIGINT NOT NULL DEFAULT nextval('{PARENT_TABLE}_id_seq')"
+        else:
+            id_column = "id BIGSERIAL"
+        conn.execute(f"""
+            CREATE TABLE {PARENT_TABLE} (
+                {id_column},
+                user_id VARCHAR(255) NOT NULL,
+                session_id VARCHAR(255) NOT NULL,
+                query TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                intent VARCHAR(100),
+                response_time_ms INTEGER,
+                provider VARCHAR(100),
+                created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                PRIMARY KEY (id, created_at)
+            ) PARTITION BY RANGE (created_at);
+        """)
+        if state is False:
+            conn.execute(f"ALTER SEQUENCE {PARENT_TABLE}_id_seq OWNED BY {PARENT_TABLE}.id;")
+            # Everything logged so far (including the rest of this month) stays in the legacy partition
+            boundary = month_start(date.today(), 1)
+            conn.execute(
+                f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {LEGACY_TABLE} "
+                f"FOR VALUES FROM (MINVALUE) TO ('{boundary.isoformat()}');"
+            )
+            logger.info(f"Attached existing chat history as partition {LEGACY_TABLE}")
+
+
+def _default_months(conn: psycopg.Connection) -> List[date]:
+    """Months that have rows parked in the DEFAULT partition."""
+    rows = conn.execute(
+        f"SELECT DISTINCT date_trunc('month', created_at)::date FROM {DEFAULT_TABLE} ORDER BY 1;"
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def _create_partition(conn: psycopg.Connection, month: date) -> int:
+    """Create the partition for ``month``, moving that month's rows out of the DEFAULT partition.
+
+    Postgres refuses to add a partition while the DEFAULT partition holds rows in its range, so
+    the rows are moved into a standalone table that is then attached, all in one transaction.
+    Returns the number of rows moved.
+    """
+    name, lower, upper = partition_name(month), month.isoformat(), month_start(month, 1).isoformat()
+    with conn.transaction():
+        # Keeps new rows for this month from landing in the DEFAULT partition mid-move
+        conn.execute(f"LOCK TABLE {DEFAULT_TABLE} IN SHARE ROW EXCLUSIVE MODE;")
+        conn.execute(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS);")
+        moved = conn.execute(
+            f"WITH moved AS (DELETE FROM {DEFAULT_TABLE} WHERE created_at >= %s AND created_at < %s RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved;",
+            (lower, upper)
+        ).rowcount
+        conn.execute(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}');")
+    if moved:
+        logger.info(f"Moved {moved} chat_history rows from {DEFAULT_TABLE} into {name}")
+    return moved
+
+
+def ensure_partitions(conn: psycopg.Connection, months_ahead: int = None) -> List[str]:
+    """
+    Create the DEFAULT partition and monthly partitions from the current month through
+    ``months_ahead`` months ahead, plus one for every month with rows in the DEFAULT partition
+    (those rows are moved into it).
+    """
+    months_ahead = settings.CHAT_HISTORY_PARTITION_PREMAKE_MONTHS if months_ahead is None else months_ahead
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {DEFAULT_TABLE} PARTITION OF {PARENT_TABLE} DEFAULT;")
+    existing = list_partitions(conn)
+    created = []
+    today = date.today()
+    months = set(_default_months(conn)) | {month_start(today, offset) for offset in range(months_ahead + 1)}
+    for month in sorted(months):
+        lower_dt = datetime.combine(month, datetime.min.time())
+        upper_dt = datetime.combine(month_start(month, 1), datetime.min.time())
+        if any(p.overlaps(lower_dt, upper_dt) for p in existing):
+            continue
+        _create_partition(conn, month)
+        created.append(partition_name(month))
+    if created:
+        logger.info(f"Created chat_history partitions: {', '.join(created)}")
+    return created
+
+
+def _archive_partition(conn: psycopg.Connection, name: str, archive_dir: str) -> str:
+    """COPY a partition to a gzipped CSV file. The file only appears once it is complete."""
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{name}.csv.gz")
+    # A month can be archived twice when late rows recreate its partition; keep both files
+    suffix = 1
+    while os.path.exists(path):
+        path = os.path.join(archive_dir, f"{name}.{suffix}.csv.gz")
+        suffix += 1
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as f:
+            with conn.cursor() as cur:
+                with cur.copy(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER true)") as copy:
+                    for chunk in copy:
+                        f.write(chunk)
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(tmp_path, path)
+    return path
+
+
+def apply_retention(conn: psycopg.Connection, retention_months: int = None, archive_dir: str = None) -> List[Dict[str, Any]]:
+    """
+    Archive, detach and drop partitions that ended before the retention window.
+    A partition is only dropped after its archive has been written successfully.
+    """
+    retention_months = settings.CHAT_HISTORY_RETENTION_MONTHS if retention_months is None else retention_months
+    archive_dir = archive_dir or settings.CHAT_HISTORY_ARCHIVE_DIR
+    if retention_months <= 0:
+        return []
+    cutoff = datetime.combine(month_start(date.today(), -retention_months), datetime.min.time())
+    archived = []
+    for partition in list_partitions(conn):
+        if partition.upper is None or partition.upper > cutoff:
+            continue
+        try:
+            path = _archive_partition(conn, partition.name, archive_dir)
+            conn.execute(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {partition.name};")
+            conn.execute(f"DROP TABLE {partition.name};")
+            archived.append({"partition": partition.name, "archive": path})
+            logger.info(f"Archived chat_history partition {partition.name} to {path}")
+        except Exception as e:
+            logger.error(f"Failed to archive chat_history partition {partition.name}: {e}")
+    return archived
+
+
+def run_maintenance() -> Dict[str, Any]:
+    """Create upcoming partitions and apply retention (safe to run repeatedly)."""
+    from app.core.database import get_db_connection
+    with get_db_connection() as conn:
+        if not is_partitioned(conn):
+            return {"created": [], "archived": [], "partitioned": False}
+        created = ensure_partitions(conn)
+        archived = apply_retention(conn)
+        partitions = [p.name for p in list_partitions(conn)]
+    return {"created": created, "archived": archived, "partitions": partitions, "partitioned": True}
+
+
+class PartitionMaintainer:
+    """Runs run_maintenance() periodically in the background."""
+
+    def __init__(self, interval_seconds: float = 6 * 3600):
+        self.interval_seconds = interval_seconds
+        self._task: Optional["asyncio.Task[None]"] = None
+        self.last_result: Optional[Dict[str, Any]] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                self.last_result = await db_executor.run(run_maintenance)
+            except Exception as e:
+                logger.error(f"Chat history partition maintenance failed: {e}")
+
+
+# Global instance
+partition_maintainer = PartitionMaintainer()
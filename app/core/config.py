@@ -35,7 +35,135 @@ class Settings(BaseSettings):
     ALLOWED_ORIGINS: str = '*'
     ALLOWED_HOSTS: str = os.getenv("ALLOWED_HOSTS", "*")
     
-    # REMOVE: REDIS_URL and RATE_LIMIT
+    # Intent classification cache (bump INTENT_CLASSIFIER_VERSION to invalidate)
+    INTENT_CACHE_MAX_ENTRIES: int = int(os.getenv("INTENT_CACHE_MAX_ENTRIES", "1024"))
+    INTENT_CLASSIFIER_VERSION: str = os.getenv("INTENT_CLASSIFIER_VERSION", "1")
+
+    # Chat response cache bounds
+    RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2048"))
+    RESPONSE_CACHE_MAX_BYTES: int = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+    # Cached answers are keyed on the vector index version, so long TTLs are safe
+    RESPONSE_CACHE_TTL_SECONDS: int = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "86400"))
+    # memory (per worker), sqlite (shared by all workers on the host) or redis
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "sqlite")
+    CACHE_SQLITE_PATH: str = os.getenv("CACHE_SQLITE_PATH", "data/cache/response_cache.sqlite3")
+    REDIS_URL: str = os.getenv("REDIS_URL", "")
+    # Semantic (paraphrase) answer cache
+    SEMANTIC_CACHE_ENABLED: bool = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+    SEMANTIC_CACHE_CAPACITY: int = int(os.getenv("SEMANTIC_CACHE_CAPACITY", "512"))
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+    SEMANTIC_CACHE_DISABLED_INTENTS: str = os.getenv("SEMANTIC_CACHE_DISABLED_INTENTS", "user_info,user_last_question")
+    # Vector index version (bumped on every ingest/clear; INDEX_VERSION adds a manual prefix)
+    INDEX_VERSION_PATH: str = os.getenv("INDEX_VERSION_PATH", "data/index_version.json")
+    INDEX_VERSION: str = os.getenv("INDEX_VERSION", "")
+
+    # Chat rate limits, e.g. "3/day" or "60/hour" (empty disables a rule)
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_PER_USER: str = os.getenv("RATE_LIMIT_PER_USER", "3/day")
+    RATE_LIMIT_PER_IP: str = os.getenv("RATE_LIMIT_PER_IP", "60/hour")
+    # memory (per worker) or sqlite (shared by all workers on the host)
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "sqlite")
+    RATE_LIMIT_SQLITE_PATH: str = os.getenv("RATE_LIMIT_SQLITE_PATH", "data/rate_limits.sqlite3")
+    # Only trust X-Forwarded-For when the app sits behind a proxy that sets it
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = os.getenv("RATE_LIMIT_TRUST_FORWARDED_FOR", "false").lower() == "true"
+
+    # Write-behind chat history logging
+    CHAT_LOG_QUEUE_SIZE: int = int(os.getenv("CHAT_LOG_QUEUE_SIZE", "10000"))
+    CHAT_LOG_BATCH_SIZE: int = int(os.getenv("CHAT_LOG_BATCH_SIZE", "100"))
+    CHAT_LOG_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("CHAT_LOG_FLUSH_INTERVAL_SECONDS", "1.0"))
+    CHAT_LOG_SPILL_PATH: str = os.getenv("CHAT_LOG_SPILL_PATH", "data/chat_log_spill.jsonl")
+
+    # chat_history monthly partitions: pre-created months, retention (0 keeps everything) and archives
+    CHAT_HISTORY_PARTITION_PREMAKE_MONTHS: int = int(os.getenv("CHAT_HISTORY_PARTITION_PREMAKE_MONTHS", "3"))
+    CHAT_HISTORY_RETENTION_MONTHS: int = int(os.getenv("CHAT_HISTORY_RETENTION_MONTHS", "12"))
+    CHAT_HISTORY_ARCHIVE_DIR: str = os.getenv("CHAT_HISTORY_ARCHIVE_DIR", "data/archive/chat_history")
+    # Per-session history lookups only scan partitions this recent (0 disables the bound)
+    CHAT_HISTORY_SESSION_LOOKBACK_DAYS: int = int(os.getenv("CHAT_HISTORY_SESSION_LOOKBACK_DAYS", "90"))
+
+    # In-process ring buffer of recent turns per session (follow-up intents)
+    SESSION_HISTORY_MAX_TURNS: int = int(os.getenv("SESSION_HISTORY_MAX_TURNS", "20"))
+    SESSION_HISTORY_MAX_SESSIONS: int = int(os.getenv("SESSION_HISTORY_MAX_SESSIONS", "10000"))
+    SESSION_HISTORY_MAX_BYTES: int = int(os.getenv("SESSION_HISTORY_MAX_BYTES", str(16 * 1024 * 1024)))
+    # Reload a buffered session from Postgres after this long, for turns served by other workers
+    # (0 = single worker: only sessions this process has never seen are loaded)
+    SESSION_HISTORY_TTL_SECONDS: float = float(os.getenv("SESSION_HISTORY_TTL_SECONDS", "10"))
+
+    # Reuse a session's previous retrieval for follow-ups at least this similar to the last query
+    SESSION_RETRIEVAL_REUSE_THRESHOLD: float = float(os.getenv("SESSION_RETRIEVAL_REUSE_THRESHOLD", "0.8"))
+    SESSION_RETRIEVAL_TTL_SECONDS: int = int(os.getenv("SESSION_RETRIEVAL_TTL_SECONDS", "1800"))
+    SESSION_RETRIEVAL_MAX_SESSIONS: int = int(os.getenv("SESSION_RETRIEVAL_MAX_SESSIONS", "2000"))
+
+    # Project catalog built at ingestion; re-checked against the project files at most this often
+    PROJECTS_DIR: str = os.getenv("PROJECTS_DIR", os.path.join("app", "data", "textdata", "projects"))
+    PROJECT_CATALOG_PATH: str = os.getenv("PROJECT_CATALOG_PATH", "data/project_catalog.json")
+    PROJECT_CATALOG_CHECK_SECONDS: float = float(os.getenv("PROJECT_CATALOG_CHECK_SECONDS", "30"))
+
+    # Namespace router: only search the top-M namespaces (plus any scoring above MIN_SCORE)
+    NAMESPACE_ROUTER_ENABLED: bool = os.getenv("NAMESPACE_ROUTER_ENABLED", "true").lower() == "true"
+    NAMESPACE_ROUTER_PATH: str = os.getenv("NAMESPACE_ROUTER_PATH", "data/namespace_router.npz")
+    NAMESPACE_ROUTER_TOP_M: int = int(os.getenv("NAMESPACE_ROUTER_TOP_M", "2"))
+    NAMESPACE_ROUTER_MIN_SCORE: float = float(os.getenv("NAMESPACE_ROUTER_MIN_SCORE", "0.8"))
+    NAMESPACE_ROUTER_CODEBOOK_SIZE: int = int(os.getenv("NAMESPACE_ROUTER_CODEBOOK_SIZE", "4"))
+
+    # Maximal Marginal Relevance over retrieved candidates (lambda 1.0 = relevance only)
+    MMR_ENABLED: bool = os.getenv("MMR_ENABLED", "true").lower() == "true"
+    MMR_LAMBDA: float = float(os.getenv("MMR_LAMBDA", "0.7"))
+    MMR_FETCH_K: int = int(os.getenv("MMR_FETCH_K", "16"))
+    MMR_TOP_K: int = int(os.getenv("MMR_TOP_K", "8"))
+
+    # Adaptive top-k: keep over-fetched hits while score >= best * (1 - RELATIVE_DROP) and >= SCORE_FLOOR,
+    # bounded per intent by "intent=min:max" pairs ("default" applies to unlisted intents)
+    ADAPTIVE_TOP_K_ENABLED: bool = os.getenv("ADAPTIVE_TOP_K_ENABLED", "true").lower() == "true"
+    ADAPTIVE_TOP_K_RELATIVE_DROP: float = float(os.getenv("ADAPTIVE_TOP_K_RELATIVE_DROP", "0.15"))
+    ADAPTIVE_TOP_K_SCORE_FLOOR: float = float(os.getenv("ADAPTIVE_TOP_K_SCORE_FLOOR", "0.25"))
+    ADAPTIVE_TOP_K_LIMITS: str = os.getenv("ADAPTIVE_TOP_K_LIMITS", "default=1:8,personal_info=2:8,general_rag=2:8")
+
+    # Relevance gate: below these best-retrieval scores ("intent=score" pairs; unlisted intents and
+    # greetings are never gated) the templated "not in my knowledge base" answer is returned without
+    # an LLM call. THRESHOLDS apply to Pinecone match scores (legacy /chat path), RERANK_THRESHOLDS to
+    # the cosine similarity of re-embedded chunks (enhanced service). The defaults are a deliberately
+    # low floor that only catches clearly off-topic queries; benchmarks/relevance_gate_benchmark.py
+    # measures both scales for the current index and embeddings and prints the specs to use instead.
+    RELEVANCE_GATE_ENABLED: bool = os.getenv("RELEVANCE_GATE_ENABLED", "true").lower() == "true"
+    RELEVANCE_GATE_THRESHOLDS: str = os.getenv("RELEVANCE_GATE_THRESHOLDS", "personal_info=0.2,general_rag=0.2")
+    RELEVANCE_GATE_RERANK_THRESHOLDS: str = os.getenv("RELEVANCE_GATE_RERANK_THRESHOLDS", "personal_info=0.2,general_rag=0.2")
+
+    # Degraded mode: answer extractively from retrieved context while the LLM circuit is open
+    # (after FAILURE_THRESHOLD consecutive failures, for RECOVERY_SECONDS) or no LLM slot frees up
+    # within the scheduler's max wait (MAX_CONCURRENT_GENERATIONS slots shared fairly across clients)
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5"))
+    LLM_CIRCUIT_RECOVERY_SECONDS: float = float(os.getenv("LLM_CIRCUIT_RECOVERY_SECONDS", "30"))
+    LLM_MAX_CONCURRENT_GENERATIONS: int = int(os.getenv("LLM_MAX_CONCURRENT_GENERATIONS", "8"))
+    EXTRACTIVE_MAX_SENTENCES: int = int(os.getenv("EXTRACTIVE_MAX_SENTENCES", "3"))
+
+    # Fair LLM scheduling: max wait for a provider slot per priority class before degrading,
+    # and optional per-client weights ("ip:10.0.0.5=4,user:scraper=0.25", default weight 1)
+    LLM_SCHEDULER_MAX_WAIT_SECONDS: float = float(os.getenv("LLM_SCHEDULER_MAX_WAIT_SECONDS", "5"))
+    LLM_SCHEDULER_BACKGROUND_MAX_WAIT_SECONDS: float = float(os.getenv("LLM_SCHEDULER_BACKGROUND_MAX_WAIT_SECONDS", "60"))
+    LLM_SCHEDULER_WEIGHTS: str = os.getenv("LLM_SCHEDULER_WEIGHTS", "")
+
+    # Query-aware context compression: keep the best sentences until RATIO of the context tokens
+    # remain (1.0 disables); scorer is bm25 (local) or hybrid (bm25 + sentence embeddings)
+    CONTEXT_COMPRESSION_ENABLED: bool = os.getenv("CONTEXT_COMPRESSION_ENABLED", "true").lower() == "true"
+    CONTEXT_COMPRESSION_RATIO: float = float(os.getenv("CONTEXT_COMPRESSION_RATIO", "0.6"))
+    CONTEXT_COMPRESSION_SCORER: str = os.getenv("CONTEXT_COMPRESSION_SCORER", "bm25")
+
+    # Retrieved context is packed into min(BUDGET, model context window - RESERVED) tokens;
+    # RESERVED covers the prompt template (with the personal profile) and the answer
+    CONTEXT_TOKEN_BUDGET: int = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1200"))
+    CONTEXT_RESERVED_TOKENS: int = int(os.getenv("CONTEXT_RESERVED_TOKENS", "1500"))
+
+    # Bounded executors for blocking work per dependency: workers plus a queue-depth limit;
+    # chat requests arriving while a queue is full get 503 with Retry-After
+    LLM_EXECUTOR_WORKERS: int = int(os.getenv("LLM_EXECUTOR_WORKERS", "16"))
+    LLM_EXECUTOR_QUEUE: int = int(os.getenv("LLM_EXECUTOR_QUEUE", "32"))
+    VECTOR_EXECUTOR_WORKERS: int = int(os.getenv("VECTOR_EXECUTOR_WORKERS", "16"))
+    VECTOR_EXECUTOR_QUEUE: int = int(os.getenv("VECTOR_EXECUTOR_QUEUE", "64"))
+    DB_EXECUTOR_WORKERS: int = int(os.getenv("DB_EXECUTOR_WORKERS", "4"))
+    DB_EXECUTOR_QUEUE: int = int(os.getenv("DB_EXECUTOR_QUEUE", "32"))
+
+    # Admin endpoints are disabled unless an admin key is configured
+    ADMIN_API_KEY: str = os.getenv("ADMIN_API_KEY", "")
     
     PG_HOST : str = os.environ.get("PG_HOST", "")
     PG_PORT : str = os.environ.get("PG_PORT", "")
@@ -43,6 +171,12 @@ class Settings(BaseSettings):
     PG_PASSWORD : str = os.environ.get("PG_PASSWORD", "")
     PG_DATABASE : str = os.environ.get("PG_DATABASE", "")
     PG_SSLMODE: str = os.getenv("PG_SSLMODE", "prefer")
+    # Each pool (sync for scripts/threads, async for handlers) is sized independently
+    PG_POOL_MIN_SIZE: int = int(os.getenv("PG_POOL_MIN_SIZE", "1"))
+    PG_POOL_MAX_SIZE: int = int(os.getenv("PG_POOL_MAX_SIZE", "20"))
+    PG_POOL_TIMEOUT: float = float(os.getenv("PG_POOL_TIMEOUT", "5"))
+    # Disable behind transaction-mode poolers such as PgBouncer
+    PG_PREPARE_STATEMENTS: bool = os.getenv("PG_PREPARE_STATEMENTS", "true").lower() == "true"
     
     LINKEDIN_PROFILE: str = os.getenv("LINKEDIN_PROFILE") or ""
     GITHUB_PROFILE: str = os.getenv("GITHUB_PROFILE") or ""
@@ -0,0 +1,138 @@
+"""
+Context Compression for HanzlaGPT
+Query-aware sentence selection inside retrieved chunks, so the prompt carries
+the sentences that answer the question rather than whole chunks
+"""
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Sequence
+import numpy as np
+from loguru import logger
+from app.core.config import settings
+from app.core.text_utils import split_label, split_sentences, tokenize
+from app.core.tokenization import estimate_tokens
+
+EMBEDDING_WEIGHT = 0.5
+
+
+def bm25_scores(query_terms: Sequence[str], documents: Sequence[Sequence[str]],
+                k1: float = 1.5, b: float = 0.75) -> np.ndarray:
+    """Okapi BM25 of each tokenized document (here: sentence) for the query terms."""
+    n = len(documents)
+    if not n:
+        return np.zeros(0, dtype=np.float32)
+    lengths = np.array([len(d) for d in documents], dtype=np.float32)
+    avg_length = float(lengths.mean()) or 1.0
+    frequencies = [Counter(d) for d in documents]
+    scores = np.zeros(n, dtype=np.float32)
+    for term in set(query_terms):
+        df = sum(term in f for f in frequencies)
+        if not df:
+            continue
+        idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+        tf = np.array([f[term] for f in frequencies], dtype=np.float32)
+        scores += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * lengths / avg_length))
+    return scores
+
+
+@dataclass
+class CompressionResult:
+    chunks: List[str]
+    original_tokens: int
+    compressed_tokens: int
+    sentences_kept: int = 0
+    sentences_total: int = 0
+    dropped: List[str] = field(default_factory=list)
+
+    @property
+    def ratio(self) -> float:
+        return round(self.compressed_tokens / self.original_tokens, 3) if self.original_tokens else 1.0
+
+
+def compress_chunks(query: str, chunks: Sequence[str], ratio: Optional[float] = None,
+                    count_tokens: Callable[[str], int] = estimate_tokens,
+                    query_embedding=None,
+                    embed_fn: Optional[Callable[[List[str]], Optional[List[List[float]]]]] = None) -> CompressionResult:
+    """Keep the highest-scoring sentences until ``ratio`` of the context tokens remain.
+
+    Every chunk keeps at least its best sentence; beyond that, sentences with no query
+    relevance are dropped even under budget. Kept sentences stay in their original
+    order within their chunk, so the compressed context still reads as prose.
+    """
+    ratio = settings.CONTEXT_COMPRESSION_RATIO if ratio is None else ratio
+    original_tokens = sum(count_tokens(c) for c in chunks)
+    if ratio >= 1.0 or not chunks:
+        return CompressionResult(list(chunks), original_tokens, original_tokens)
+
+    labels, sentences, owners = [], [], []
+    for index, chunk in enumerate(chunks):
+        label, body = split_label(chunk)
+        labels.append(label)
+        for sentence in split_sentences(body):
+            sentences.append(sentence)
+            owners.append(index)
+    if not sentences:
+        return CompressionResult(list(chunks), original_tokens, original_tokens)
+
+    scores = bm25_scores(tokenize(query), [tokenize(s) for s in sentences])
+    if scores.max() > 0:
+        scores = scores / scores.max()
+    if embed_fn is not None and query_embedding is not None:
+        try:
+            vectors = embed_fn(sentences)
+            if vectors is not None and len(vectors) == len(sentences):
+                vectors = np.asarray(vectors, dtype=np.float32)
+                vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-8)
+                query = np.asarray(query_embedding, dtype=np.float32)
+                similarity = np.clip(vectors @ (query / max(np.linalg.norm(query), 1e-8)), 0, 1)
+                scores = (1 - EMBEDDING_WEIGHT) * scores + EMBEDDING_WEIGHT * similarity
+        except Exception as e:
+            logger.warning(f"Context compression without sentence embeddings: {e}")
+
+    sentence_tokens = [count_tokens(s) for s in sentences]
+    target = max(1, int(original_tokens * ratio))
+    # Ties keep document order, which favours earlier (higher-ranked) chunks
+    order = sorted(range(len(sentences)), key=lambda i: (-scores[i], i))
+    kept, used, covered = set(), 0, set()
+    # Best sentence of every chunk first, then the other relevant ones by score while under budget
+    for i in order:
+        if owners[i] not in covered:
+            covered.add(owners[i])
+            kept.add(i)
+            used += sentence_tokens[i]
+    for i in order:
+        if i not in kept and scores[i] > 0 and used + sentence_tokens[i] <= target:
+            kept.add(i)
+            used += sentence_tokens[i]
+
+    compressed = []
+    for index in range(len(chunks)):
+        body = " ".join(sentences[i] for i in range(len(sentences)) if owners[i] == index and i in kept)
+        compressed.append(f"{labels[index]}{body}" if body else chunks[index])
+    return CompressionResult(
+        chunks=compressed,
+        original_tokens=original_tokens,
+        compressed_tokens=sum(count_tokens(c) for c in compressed),
+        sentences_kept=len(kept),
+        sentences_total=len(sentences),
+        dropped=[sentences[i] for i in range(len(sentences)) if i not in kept],
+    )
+
+
+def compress_context(query: str, chunks: Sequence[str], count_tokens: Callable[[str], int] = estimate_tokens,
+                     query_embedding=None, embed_fn=None) -> List[str]:
+    """Compress per the CONTEXT_COMPRESSION_* settings and log the token savings."""
+    if not settings.CONTEXT_COMPRESSION_ENABLED or not chunks:
+        return list(chunks)
+    hybrid = settings.CONTEXT_COMPRESSION_SCORER == "hybrid"
+    try:
+        result = compress_chunks(query, chunks, count_tokens=count_tokens,
+                                 query_embedding=query_embedding if hybrid else None,
+                                 embed_fn=embed_fn if hybrid else None)
+    except Exception as e:
+        logger.warning(f"Context compression failed, using whole chunks: {e}")
+        return list(chunks)
+    logger.info(f"[RAG] Context compressed {result.original_tokens} -> {result.compressed_tokens} tokens "
+                f"({result.sentences_kept}/{result.sentences_total} sentences)")
+    return result.chunks
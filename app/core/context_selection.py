@@ -0,0 +1,125 @@
+"""
+Context Selection for HanzlaGPT
+Adaptive top-k cut-off and Maximal Marginal Relevance over retrieved candidates,
+so weak or near-duplicate chunks don't crowd the context budget
+"""
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from loguru import logger
+from app.core.config import settings
+
+
+def _unit(vectors) -> np.ndarray:
+    array = np.asarray(vectors, dtype=np.float32)
+    norm = np.linalg.norm(array, axis=-1, keepdims=True)
+    return array / np.where(norm == 0, 1, norm)
+
+
+def mmr_select(query_embedding, candidate_vectors, k: int, lambda_mult: float = 0.7) -> List[int]:
+    """Indices of up to k candidates in MMR order.
+
+    Each pick maximizes ``lambda * sim(query, c) - (1 - lambda) * max sim(c, selected)``.
+    Pairwise similarities are one matrix product; each greedy step only updates a
+    running max, so selection is O(k * n) after the O(n^2 * d) setup.
+    """
+    candidates = _unit(candidate_vectors)
+    if candidates.ndim != 2 or not len(candidates) or k <= 0:
+        return []
+    relevance = candidates @ _unit(query_embedding)
+    pairwise = candidates @ candidates.T
+    redundancy = np.full(len(candidates), -np.inf, dtype=np.float32)
+    available = np.ones(len(candidates), dtype=bool)
+    selected: List[int] = []
+    for _ in range(min(k, len(candidates))):
+        penalty = np.where(np.isfinite(redundancy), redundancy, 0.0)
+        scores = np.where(available, lambda_mult * relevance - (1 - lambda_mult) * penalty, -np.inf)
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, pairwise[best])
+    return selected
+
+
+def diversify(chunks: Sequence[str], vectors, query_embedding, k: Optional[int] = None,
+              lambda_mult: Optional[float] = None) -> List[str]:
+    """MMR-ordered top-k chunks; returns the first k unchanged when MMR is disabled or vectors are missing."""
+    k = settings.MMR_TOP_K if k is None else k
+    if not settings.MMR_ENABLED or vectors is None or query_embedding is None or len(chunks) != len(vectors):
+        return list(chunks[:k])
+    lambda_mult = settings.MMR_LAMBDA if lambda_mult is None else lambda_mult
+    return [chunks[i] for i in mmr_select(query_embedding, vectors, k, lambda_mult)]
+
+
+@lru_cache(maxsize=8)
+def parse_top_k_limits(spec: str) -> Dict[str, Tuple[int, int]]:
+    """Parse "default=1:8,general_rag=2:8" into {intent: (min_k, max_k)}; bad entries are skipped."""
+    limits = {}
+    for item in spec.split(","):
+        try:
+            intent, bounds = item.split("=")
+            low, high = (int(v) for v in bounds.split(":"))
+            limits[intent.strip()] = (max(0, low), max(low, high))
+        except ValueError:
+            if item.strip():
+                logger.warning(f"Ignoring malformed ADAPTIVE_TOP_K_LIMITS entry: {item!r}")
+    return limits
+
+
+def top_k_limits(intent: Optional[str] = None, ceiling: Optional[int] = None) -> Tuple[int, int]:
+    """(min_k, max_k) for an intent, with max_k capped by the caller's own ceiling."""
+    limits = parse_top_k_limits(settings.ADAPTIVE_TOP_K_LIMITS)
+    low, high = limits.get(intent or "", limits.get("default", (1, settings.MMR_TOP_K)))
+    if ceiling is not None:
+        high = min(high, ceiling)
+    return min(low, high), high
+
+
+def adaptive_cutoff(scores: Sequence[float], min_k: int = 1, relative_drop: Optional[float] = None,
+                    floor: Optional[float] = None) -> int:
+    """How many of the (descending) scores to keep.
+
+    Hits are kept while they score at least ``best * (1 - relative_drop)`` and at least
+    ``floor``; the first ``min_k`` are kept regardless so a query never ends up contextless
+    just because its best hit is weak.
+    """
+    if not len(scores):
+        return 0
+    relative_drop = settings.ADAPTIVE_TOP_K_RELATIVE_DROP if relative_drop is None else relative_drop
+    floor = settings.ADAPTIVE_TOP_K_SCORE_FLOOR if floor is None else floor
+    threshold = max(floor, scores[0] * (1 - relative_drop)) if scores[0] > 0 else floor
+    kept = 0
+    for score in scores:
+        if score < threshold:
+            break
+        kept += 1
+    return min(len(scores), max(kept, min_k))
+
+
+def select_context(chunks: Sequence[str], vectors, query_embedding, intent: Optional[str] = None,
+                   ceiling: Optional[int] = None) -> List[str]:
+    """Adaptive top-k by similarity to the query, then MMR among the survivors."""
+    ceiling = settings.MMR_TOP_K if ceiling is None else ceiling
+    min_k, max_k = top_k_limits(intent, ceiling)
+    if vectors is None or query_embedding is None or len(chunks) != len(vectors):
+        return list(chunks[:max_k])
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scores = _unit(vectors) @ _unit(query_embedding)
+    order = np.argsort(-scores, kind="stable")
+    ranked = scores[order]
+    eligible = adaptive_cutoff(ranked, min_k) if settings.ADAPTIVE_TOP_K_ENABLED else len(ranked)
+    k = min(eligible, max_k)
+    keep = order[:eligible]
+    log_cutoff(intent, k, len(chunks), ranked, eligible)
+    if settings.MMR_ENABLED:
+        picks = mmr_select(query_embedding, vectors[keep], k, settings.MMR_LAMBDA)
+        return [chunks[keep[i]] for i in picks]
+    return [chunks[i] for i in keep[:k]]
+
+
+def log_cutoff(intent: Optional[str], k: int, candidates: int, ranked_scores: Sequence[float], eligible: int) -> None:
+    """Log the chosen k and the scores cut off, for tuning the thresholds."""
+    dropped = [round(float(s), 3) for s in ranked_scores[eligible:]]
+    kept = [round(float(s), 3) for s in ranked_scores[:eligible]]
+    logger.info(f"[RAG] Adaptive top-k ({intent or 'default'}): k={k} of {candidates} candidates, "
+                f"kept scores {kept}, dropped scores {dropped}")
@@ -6,6 +6,7 @@ from langchain_community.document_loaders import TextLoader, PDFPlumberLoader, W
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from app.core.config import settings
 from app.core.vectorstore import create_vector_store
+from app.core.index_version import bump_index_version
 
 def load_local_docs():
     files = ["data/about_me.txt", "data/projects.txt", "data/programs.md", "data/resume.pdf"]
@@ -48,6 +49,7 @@ def load_data_to_vector_store():
     ids = [str(uuid4()) for _ in range(len(chunks))]
     vector_store = create_vector_store()
     vector_store.add_documents(chunks, ids)
+    bump_index_version(f"loaded {len(chunks)} chunks")
 
     
 
@@ -1,52 +1,168 @@
-import psycopg2
-from psycopg2.extras import RealDictCursor
-from psycopg2.pool import SimpleConnectionPool
+import asyncio
+import base64
+import contextlib
+import json
+import time
+from datetime import datetime, timedelta
+import psycopg
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
 from app.core.config import settings
+from app.core.chat_partitions import create_partitioned_table, ensure_partitions
+from app.core.analytics import CREATE_ROLLUPS_SQL, CREATE_MERGE_FUNCTION_SQL, UPSERT_ROLLUP_SQL, rollup_rows
 from loguru import logger
-from typing import Optional, Dict, Any
-import contextlib
-from typing import Optional
+from typing import Optional, Dict, Any, List, Tuple, Iterator, AsyncIterator
+
+# Connection pools: sync for scripts/threads, async for request handlers
+_pool: Optional[ConnectionPool] = None
+_async_pool: Optional[AsyncConnectionPool] = None
+_async_pool_lock: Optional[asyncio.Lock] = None
+# After a failed pool open, fail fast instead of blocking every caller for PG_POOL_TIMEOUT
+POOL_RETRY_COOLDOWN_SECONDS = 30.0
+_pool_failed_at: Dict[str, float] = {}
+
+def _check_cooldown(name: str):
+    failed_at = _pool_failed_at.get(name)
+    if failed_at is not None and time.monotonic() - failed_at < POOL_RETRY_COOLDOWN_SECONDS:
+        raise psycopg.OperationalError(f"Database unavailable (last connection attempt failed {time.monotonic() - failed_at:.0f}s ago)")
+
+def _connection_kwargs() -> Dict[str, Any]:
+    kwargs: Dict[str, Any] = {
+        "host": settings.PG_HOST,
+        "port": settings.PG_PORT,
+        "dbname": settings.PG_DATABASE,
+        "user": settings.PG_USER,
+        "password": settings.PG_PASSWORD,
+        "sslmode": getattr(settings, 'PG_SSLMODE', 'prefer'),
+        "autocommit": True,
+    }
+    if not settings.PG_PREPARE_STATEMENTS:
+        # Transaction-mode poolers (e.g. PgBouncer) cannot keep server-side prepared statements
+        kwargs["prepare_threshold"] = None
+    return kwargs
 
-# Connection pool
-_pool: Optional[SimpleConnectionPool] = None
+def _configure(conn: psycopg.Connection):
+    """Session setup, run once when the pool opens a connection (not on every checkout)."""
+    conn.execute("SET search_path TO public")
 
-def get_connection_pool() -> SimpleConnectionPool:
-    """Get or create connection pool."""
+async def _configure_async(conn: psycopg.AsyncConnection):
+    await conn.execute("SET search_path TO public")
+
+def get_connection_pool() -> ConnectionPool:
+    """Get or create the sync connection pool."""
     global _pool
     if _pool is None:
+        _check_cooldown("sync")
+        pool = ConnectionPool(
+            kwargs=_connection_kwargs(),
+            min_size=settings.PG_POOL_MIN_SIZE,
+            max_size=settings.PG_POOL_MAX_SIZE,
+            timeout=settings.PG_POOL_TIMEOUT,
+            configure=_configure,
+            check=ConnectionPool.check_connection,
+            name="hanzlagpt-sync",
+            open=False
+        )
         try:
-            _pool = SimpleConnectionPool(
-                minconn=1,
-                maxconn=50,  # Increased from 10 to 50 for better concurrency
-                host=settings.PG_HOST,
-                port=settings.PG_PORT,
-                database=settings.PG_DATABASE,
-                user=settings.PG_USER,
-                password=settings.PG_PASSWORD,
-                sslmode=getattr(settings, 'PG_SSLMODE', 'prefer')
-            )
+            pool.open(wait=True, timeout=settings.PG_POOL_TIMEOUT)
             logger.info("Database connection pool created successfully")
         except Exception as e:
+            pool.close()
+            _pool_failed_at["sync"] = time.monotonic()
             logger.error(f"Failed to create connection pool: {str(e)}")
             raise
+        _pool = pool
     return _pool
 
+async def get_async_connection_pool() -> AsyncConnectionPool:
+    """Get or create the async connection pool (bound to the running event loop)."""
+    global _async_pool, _async_pool_lock
+    if _async_pool is not None:
+        return _async_pool
+    if _async_pool_lock is None:
+        _async_pool_lock = asyncio.Lock()
+    async with _async_pool_lock:
+        if _async_pool is None:
+            _check_cooldown("async")
+            pool = AsyncConnectionPool(
+                kwargs=_connection_kwargs(),
+                min_size=settings.PG_POOL_MIN_SIZE,
+                max_size=settings.PG_POOL_MAX_SIZE,
+                timeout=settings.PG_POOL_TIMEOUT,
+                configure=_configure_async,
+                check=AsyncConnectionPool.check_connection,
+                name="hanzlagpt-async",
+                open=False
+            )
+            try:
+                await pool.open(wait=True, timeout=settings.PG_POOL_TIMEOUT)
+                logger.info("Async database connection pool created successfully")
+            except Exception as e:
+                await pool.close()
+                _pool_failed_at["async"] = time.monotonic()
+                logger.error(f"Failed to create async connection pool: {str(e)}")
+                raise
+            _async_pool = pool
+    return _async_pool
+
+async def close_pools():
+    """Close both pools (called on application shutdown)."""
+    global _pool, _async_pool
+    if _async_pool is not None:
+        await _async_pool.close()
+        _async_pool = None
+    if _pool is not None:
+        await asyncio.to_thread(_pool.close)
+        _pool = None
+    logger.info("Database connection pools closed")
+
 @contextlib.contextmanager
 def get_db_connection():
-    """Context manager for database connections."""
-    pool = get_connection_pool()
-    conn = pool.getconn()
+    """Context manager for sync database connections."""
+    with get_connection_pool().connection() as conn:
+        try:
+            yield conn
+        except Exception as e:
+            logger.error(f"Database operation failed: {str(e)}")
+            raise
+
+@contextlib.asynccontextmanager
+async def get_async_db_connection():
+    """Context manager for async database connections."""
+    pool = await get_async_connection_pool()
+    async with pool.connection() as conn:
+        try:
+            yield conn
+        except Exception as e:
+            logger.error(f"Database operation failed: {str(e)}")
+            raise
+
+def check_database() -> bool:
+    """Return True if a pooled connection can run a trivial query."""
     try:
-        conn.autocommit = True
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("SET search_path TO public;")
-        yield conn
+        with get_db_connection() as conn:
+            conn.execute("SELECT 1")
+        return True
     except Exception as e:
-        logger.error(f"Database operation failed: {str(e)}")
-        conn.rollback()
-        raise
-    finally:
-        pool.putconn(conn)
+        logger.error(f"Database health check failed: {str(e)}")
+        return False
+
+async def check_database_async() -> bool:
+    """Async variant of check_database()."""
+    try:
+        async with get_async_db_connection() as conn:
+            await conn.execute("SELECT 1")
+        return True
+    except Exception as e:
+        logger.error(f"Database health check failed: {str(e)}")
+        return False
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Pool metrics (size, idle, waiting, errors, ...) for both pools."""
+    return {
+        "sync": _pool.get_stats() if _pool is not None else None,
+        "async": _async_pool.get_stats() if _async_pool is not None else None,
+    }
 
 def ensure_column_exists(table: str, column: str, coltype: str):
     """Ensure a column exists in a table, add it if missing."""
@@ -72,19 +188,9 @@ def create_tables():
     try:
         with get_db_connection() as conn:
             with conn.cursor() as cur:
-                # Chat history table
-                cur.execute("""
-                    CREATE TABLE IF NOT EXISTS chat_history (
-                        id SERIAL PRIMARY KEY,
-                        user_id VARCHAR(255) NOT NULL,
-                        session_id VARCHAR(255) NOT NULL,
-                        query TEXT NOT NULL,
-                        answer TEXT NOT NULL,
-                        intent VARCHAR(100),
-                        response_time_ms INTEGER,
-                        created_at TIMESTAMP DEFAULT NOW()
-                    );
-                """)
+                # Chat history table (monthly range partitions on created_at)
+                create_partitioned_table(conn)
+                ensure_partitions(conn)
                 # Documents metadata table
                 cur.execute("""
                     CREATE TABLE IF NOT EXISTS documents_metadata (
@@ -106,6 +212,9 @@ def create_tables():
                         updated_at TIMESTAMP DEFAULT NOW()
                     );
                 """)
+                # Analytics rollups (per hour/day x intent x provider)
+                cur.execute(CREATE_ROLLUPS_SQL)
+                cur.execute(CREATE_MERGE_FUNCTION_SQL)
                 # Users table
                 cur.execute("""
                     CREATE TABLE IF NOT EXISTS users (
@@ -118,10 +227,14 @@ def create_tables():
                     );
                 """)
                 # Create indexes for better performance
+                # Serves per-session history and its keyset pagination straight from the index order.
+                # query/answer are too large to INCLUDE (btree entries are capped at ~2.7 kB).
                 cur.execute("""
-                    CREATE INDEX IF NOT EXISTS idx_chat_history_user_session 
-                    ON chat_history(user_id, session_id);
+                    CREATE INDEX IF NOT EXISTS idx_chat_history_session_keyset
+                    ON chat_history(user_id, session_id, created_at DESC, id DESC);
                 """)
+                # Superseded by the keyset index above (same leading columns)
+                cur.execute("DROP INDEX IF EXISTS idx_chat_history_user_session;")
                 cur.execute("""
                     CREATE INDEX IF NOT EXISTS idx_chat_history_created_at 
                     ON chat_history(created_at);
@@ -130,52 +243,207 @@ def create_tables():
         ensure_column_exists('chat_history', 'response_time_ms', 'INTEGER')
         ensure_column_exists('chat_history', 'intent', 'VARCHAR(100)')
         ensure_column_exists('chat_history', 'created_at', 'TIMESTAMP DEFAULT NOW()')
+        ensure_column_exists('chat_history', 'provider', 'VARCHAR(100)')
         logger.info("Database tables and columns ensured successfully")
     except Exception as e:
         logger.error(f"Failed to create tables: {str(e)}")
         raise
 
+# chat_history.created_at is a TIMESTAMP holding naive local time of the app host: writers pass
+# datetime.now(), and lookbacks and monthly partition bounds are computed from the same clock, so
+# nothing depends on the database server's TimeZone (the NOW() defaults only cover rows written
+# without a created_at).
+
+# Fixed hot-path queries run as prepared statements
+LOG_CHAT_SQL = """
+    INSERT INTO chat_history (user_id, session_id, query, answer, intent, response_time_ms, provider, created_at)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, COALESCE(%s, NOW()));
+"""
+GET_CHAT_HISTORY_SQL = """
+    SELECT query, answer, intent, created_at 
+    FROM chat_history 
+    WHERE user_id = %s AND session_id = %s AND created_at >= %s
+    ORDER BY created_at DESC, id DESC 
+    LIMIT %s;
+"""
+GET_CHAT_HISTORY_PAGE_SQL = """
+    SELECT id, query, answer, intent, response_time_ms, provider, created_at
+    FROM chat_history
+    WHERE user_id = %s AND session_id = %s AND created_at >= %s
+    ORDER BY created_at DESC, id DESC
+    LIMIT %s;
+"""
+GET_CHAT_HISTORY_PAGE_AFTER_SQL = """
+    SELECT id, query, answer, intent, response_time_ms, provider, created_at
+    FROM chat_history
+    WHERE user_id = %s AND session_id = %s AND (created_at, id) < (%s, %s) AND created_at >= %s
+    ORDER BY created_at DESC, id DESC
+    LIMIT %s;
+"""
+EXPORT_CHAT_HISTORY_SQL = """
+    SELECT id, user_id, session_id, query, answer, intent, response_time_ms, provider, created_at
+    FROM chat_history
+    WHERE (%(user_id)s::text IS NULL OR user_id = %(user_id)s)
+      AND (%(session_id)s::text IS NULL OR session_id = %(session_id)s)
+      AND (%(since)s::timestamp IS NULL OR created_at >= %(since)s)
+    ORDER BY created_at, id;
+"""
+MAX_HISTORY_PAGE_SIZE = 200
+
+def history_since() -> datetime:
+    """Oldest created_at per-session lookups reach; bounding created_at lets Postgres prune old partitions."""
+    days = settings.CHAT_HISTORY_SESSION_LOOKBACK_DAYS
+    return datetime.now() - timedelta(days=days if days > 0 else 365 * 100)
+GET_USER_PROVIDER_SQL = "SELECT provider FROM provider_mapping WHERE user_id = %s;"
+SET_USER_PROVIDER_SQL = """
+    INSERT INTO provider_mapping (user_id, provider, updated_at)
+    VALUES (%s, %s, NOW())
+    ON CONFLICT (user_id) DO UPDATE SET provider = EXCLUDED.provider, updated_at = NOW();
+"""
+
+def _chat_row(user_id, session_id, query, answer, intent=None, response_time_ms=None, provider=None, created_at=None) -> tuple:
+    return (user_id, session_id, query, answer, intent, response_time_ms, provider, created_at)
+
+def _chat_record(user_id, session_id, query, answer, intent=None, response_time_ms=None, provider=None) -> Dict[str, Any]:
+    # Rollups and the inserted row must agree on the timestamp bucket
+    return {"user_id": user_id, "session_id": session_id, "query": query, "answer": answer, "intent": intent,
+            "response_time_ms": response_time_ms, "provider": provider, "created_at": datetime.now()}
+
 def log_chat(user_id: str, session_id: str, query: str, answer: str, 
-             intent: str = None, response_time_ms: int = None):
+             intent: str = None, response_time_ms: int = None, provider: str = None):
     """Log chat interaction to database."""
     try:
-        with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    INSERT INTO chat_history (user_id, session_id, query, answer, intent, response_time_ms)
-                    VALUES (%s, %s, %s, %s, %s, %s);
-                """, (user_id, session_id, query, answer, intent, response_time_ms))
+        log_chats_batch([_chat_record(user_id, session_id, query, answer, intent, response_time_ms, provider)])
         logger.info(f"Chat logged for user {user_id}, session {session_id}")
     except Exception as e:
         logger.error(f"Failed to log chat: {str(e)}", exc_info=True)
         raise  # Raise so the API can warn the user
 
-# Utility for debugging: fetch all chat history (not paginated)
-def get_all_chat_history() -> list:
+async def log_chat_async(user_id: str, session_id: str, query: str, answer: str,
+                         intent: str = None, response_time_ms: int = None, provider: str = None):
+    """Async variant of log_chat()."""
+    record = _chat_record(user_id, session_id, query, answer, intent, response_time_ms, provider)
     try:
-        with get_db_connection() as conn:
+        async with get_async_db_connection() as conn:
+            async with conn.transaction():
+                await conn.execute(LOG_CHAT_SQL, _chat_row(**record), prepare=True)
+                async with conn.cursor() as cur:
+                    await cur.executemany(UPSERT_ROLLUP_SQL, rollup_rows([record]))
+        logger.info(f"Chat logged for user {user_id}, session {session_id}")
+    except Exception as e:
+        logger.error(f"Failed to log chat: {str(e)}", exc_info=True)
+        raise
+
+def log_chats_batch(records: List[Dict[str, Any]]):
+    """Insert many chat interactions and fold them into the analytics rollups, atomically."""
+    if not records:
+        return
+    rows = [_chat_row(**r) for r in records]
+    with get_db_connection() as conn:
+        with conn.transaction():
             with conn.cursor() as cur:
-                cur.execute("SELECT * FROM chat_history ORDER BY created_at DESC;")
-                return cur.fetchall()
+                cur.executemany(LOG_CHAT_SQL, rows)
+                cur.executemany(UPSERT_ROLLUP_SQL, rollup_rows(records))
+    logger.debug(f"Logged batch of {len(rows)} chats")
+
+# Utility for debugging: fetch all chat history (not paginated; use iter_chat_history for exports)
+def get_all_chat_history() -> list:
+    try:
+        return list(iter_chat_history())
     except Exception as e:
         logger.error(f"Failed to fetch all chat history: {str(e)}")
         return []
 
+def encode_history_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque pagination cursor for the (created_at, id) position of a row."""
+    payload = json.dumps({"t": created_at.isoformat(), "i": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_history_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of encode_history_cursor(). Raises ValueError for malformed cursors."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["t"]), int(payload["i"])
+    except Exception as e:
+        raise ValueError(f"Invalid history cursor: {cursor!r}") from e
+
+def _history_page_query(user_id: str, session_id: str, limit: int, cursor: Optional[str]) -> Tuple[str, tuple, int]:
+    limit = max(1, min(limit, MAX_HISTORY_PAGE_SIZE))
+    # One extra row tells us whether another page exists
+    if cursor:
+        created_at, row_id = decode_history_cursor(cursor)
+        return GET_CHAT_HISTORY_PAGE_AFTER_SQL, (user_id, session_id, created_at, row_id, history_since(), limit + 1), limit
+    return GET_CHAT_HISTORY_PAGE_SQL, (user_id, session_id, history_since(), limit + 1), limit
+
+def _history_page(rows: list, limit: int) -> Dict[str, Any]:
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_history_cursor(rows[-1]["created_at"], rows[-1]["id"]) if has_more else None
+    return {"messages": rows, "next_cursor": next_cursor}
+
+def get_chat_history_page(user_id: str, session_id: str, limit: int = 50, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Keyset-paginated chat history, newest first.
+    Returns {"messages": [...], "next_cursor": str | None}; pass next_cursor back for the next page.
+    Raises ValueError for malformed cursors.
+    """
+    sql, params, limit = _history_page_query(user_id, session_id, limit, cursor)
+    with get_db_connection() as conn:
+        with conn.cursor(row_factory=dict_row) as cur:
+            cur.execute(sql, params, prepare=True)
+            return _history_page(cur.fetchall(), limit)
+
+async def get_chat_history_page_async(user_id: str, session_id: str, limit: int = 50, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """Async variant of get_chat_history_page()."""
+    sql, params, limit = _history_page_query(user_id, session_id, limit, cursor)
+    async with get_async_db_connection() as conn:
+        async with conn.cursor(row_factory=dict_row) as cur:
+            await cur.execute(sql, params, prepare=True)
+            return _history_page(await cur.fetchall(), limit)
+
+def iter_chat_history(user_id: Optional[str] = None, session_id: Optional[str] = None,
+                      since: Optional[datetime] = None, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+    """Stream chat history (oldest first) through a server-side cursor in constant memory."""
+    params = {"user_id": user_id, "session_id": session_id, "since": since}
+    with get_db_connection() as conn:
+        # Named (server-side) cursors live inside a transaction
+        with conn.transaction():
+            with conn.cursor(name="chat_history_export", row_factory=dict_row) as cur:
+                cur.itersize = batch_size
+                cur.execute(EXPORT_CHAT_HISTORY_SQL, params)
+                yield from cur
+
+async def stream_chat_history(user_id: Optional[str] = None, session_id: Optional[str] = None,
+                              since: Optional[datetime] = None, batch_size: int = 1000) -> AsyncIterator[Dict[str, Any]]:
+    """Async variant of iter_chat_history()."""
+    params = {"user_id": user_id, "session_id": session_id, "since": since}
+    async with get_async_db_connection() as conn:
+        async with conn.transaction():
+            async with conn.cursor(name="chat_history_export", row_factory=dict_row) as cur:
+                cur.itersize = batch_size
+                await cur.execute(EXPORT_CHAT_HISTORY_SQL, params)
+                async for row in cur:
+                    yield row
+
 def get_chat_history(user_id: str, session_id: str, limit: int = 50) -> list:
     """Get chat history for a user session."""
     try:
         with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute("""
-                    SELECT query, answer, intent, created_at 
-                    FROM chat_history 
-                    WHERE user_id = %s AND session_id = %s 
-                    ORDER BY created_at DESC 
-                    LIMIT %s;
-                """, (user_id, session_id, limit))
-                results = cur.fetchall()
-                # Convert RealDictRow to regular dict for JSON serialization
-                return [dict(row) for row in results]
+            with conn.cursor(row_factory=dict_row) as cur:
+                cur.execute(GET_CHAT_HISTORY_SQL, (user_id, session_id, history_since(), limit), prepare=True)
+                return cur.fetchall()
+    except Exception as e:
+        logger.error(f"Failed to get chat history: {str(e)}")
+        return []
+
+async def get_chat_history_async(user_id: str, session_id: str, limit: int = 50) -> list:
+    """Async variant of get_chat_history()."""
+    try:
+        async with get_async_db_connection() as conn:
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await cur.execute(GET_CHAT_HISTORY_SQL, (user_id, session_id, history_since(), limit), prepare=True)
+                return await cur.fetchall()
     except Exception as e:
         logger.error(f"Failed to get chat history: {str(e)}")
         return []
@@ -184,26 +452,36 @@ def get_user_provider(user_id: str) -> Optional[str]:
     """Return stored provider name for user, or None."""
     try:
         with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute("SELECT provider FROM provider_mapping WHERE user_id=%s;", (user_id,))
-                row = cur.fetchone()
-                return row[0] if row else None
+            row = conn.execute(GET_USER_PROVIDER_SQL, (user_id,), prepare=True).fetchone()
+            return row[0] if row else None
     except Exception as e:
         logger.error(f"Failed to get provider mapping: {e}")
         return None
 
+async def get_user_provider_async(user_id: str) -> Optional[str]:
+    """Async variant of get_user_provider()."""
+    try:
+        async with get_async_db_connection() as conn:
+            cur = await conn.execute(GET_USER_PROVIDER_SQL, (user_id,), prepare=True)
+            row = await cur.fetchone()
+            return row[0] if row else None
+    except Exception as e:
+        logger.error(f"Failed to get provider mapping: {e}")
+        return None
 
 def set_user_provider(user_id: str, provider: str):
     """Upsert provider mapping for a user."""
     try:
         with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    """INSERT INTO provider_mapping (user_id, provider, updated_at)
-                    VALUES (%s, %s, NOW())
-                    ON CONFLICT (user_id) DO UPDATE SET provider = EXCLUDED.provider, updated_at = NOW();""",
-                    (user_id, provider),
-                )
+            conn.execute(SET_USER_PROVIDER_SQL, (user_id, provider), prepare=True)
+    except Exception as e:
+        logger.error(f"Failed to set provider mapping: {e}")
+
+async def set_user_provider_async(user_id: str, provider: str):
+    """Async variant of set_user_provider()."""
+    try:
+        async with get_async_db_connection() as conn:
+            await conn.execute(SET_USER_PROVIDER_SQL, (user_id, provider), prepare=True)
     except Exception as e:
         logger.error(f"Failed to set provider mapping: {e}")
 
@@ -227,7 +505,7 @@ def create_user(email: str, hashed_password: str, verification_token: str):
 def get_user_by_email(email: str):
     try:
         with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            with conn.cursor(row_factory=dict_row) as cur:
                 cur.execute(
                     "SELECT * FROM users WHERE email = %s;",
                     (email,)
@@ -256,7 +534,7 @@ def verify_user_email(token: str):
 def authenticate_user(email: str, hashed_password: str):
     try:
         with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            with conn.cursor(row_factory=dict_row) as cur:
                 cur.execute(
                     "SELECT * FROM users WHERE email = %s AND hashed_password = %s AND is_verified = TRUE;",
                     (email, hashed_password)
@@ -14,6 +14,10 @@ from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
 from app.core.config import settings
 from app.core.vectorstore import create_vector_store
+from app.core.index_version import bump_index_version
+from app.core.project_catalog import project_catalog
+from app.core.namespace_router import fit_from_index
+from app.core.tokenization import token_metadata
 from loguru import logger
 
 class EnhancedDataLoader:
@@ -129,6 +133,8 @@ class EnhancedDataLoader:
                         "chunk_id": deterministic_id,
                         "original_source": doc.metadata.get("source", "unknown"),
                         "text": chunk.page_content,
+                        # Counted once here so prompt packing never re-tokenizes stored chunks
+                        **token_metadata(chunk.page_content),
                     }
                 )
             
@@ -148,11 +154,17 @@ class EnhancedDataLoader:
         
         # Load projects specifically
         projects_path = os.path.join(text_data_path, 'projects')
-        all_documents.extend(self.load_projects_directory(projects_path))
+        project_documents = self.load_projects_directory(projects_path)
+        all_documents.extend(project_documents)
         
         # Create namespaced chunks
         namespaced_chunks = self.create_namespaced_chunks(all_documents)
         
+        # Materialize the project catalog for generic "what projects" questions
+        project_catalog.projects_dir = projects_path
+        project_catalog.build(project_documents, namespaced_chunks.get('projects', []))
+        project_catalog.save()
+        
         logger.info(f"Loaded {len(all_documents)} total documents")
         for namespace, chunks in namespaced_chunks.items():
             logger.info(f"Namespace '{namespace}': {len(chunks)} chunks")
@@ -177,6 +189,7 @@ class EnhancedDataLoader:
                 logger.info("✅ Cleared namespaces before upload")
             
             total_uploaded = 0
+            uploaded_ids: Dict[str, List[str]] = {}
             
             for namespace, chunks in namespaced_chunks.items():
                 if not chunks:
@@ -184,8 +197,9 @@ class EnhancedDataLoader:
                     
                 logger.info(f"Uploading {len(chunks)} chunks to namespace '{namespace}'")
                 
-                # Generate unique IDs for chunks
-                chunk_ids = [chunk.metadata.get('chunk_id', str(uuid4())) for chunk in chunks]
+                # Deterministic chunk ids; identical chunks (e.g. project files loaded twice) upload once
+                unique_chunks = {chunk.metadata.get('chunk_id') or str(uuid4()): chunk for chunk in chunks}
+                chunk_ids, chunks = list(unique_chunks.keys()), list(unique_chunks.values())
                 
                 # Upload to specific namespace
                 try:
@@ -193,7 +207,8 @@ class EnhancedDataLoader:
                     namespace_vector_store = create_vector_store(namespace)
                     if namespace_vector_store:
                         # Add documents with namespace-specific metadata
-                        namespace_vector_store.add_documents(chunks)
+                        namespace_vector_store.add_documents(chunks, ids=chunk_ids)
+                        uploaded_ids[namespace] = chunk_ids
                         total_uploaded += len(chunks)
                         logger.info(f"Successfully uploaded {len(chunks)} chunks to namespace '{namespace}'")
                     else:
@@ -204,6 +219,14 @@ class EnhancedDataLoader:
                     continue
             
             logger.info(f"Total uploaded: {total_uploaded} chunks across all namespaces")
+            # New content invalidates every answer cached against the old index
+            bump_index_version(f"uploaded {total_uploaded} chunks")
+            # Refit the namespace router from the stored vectors (no extra embedding calls)
+            try:
+                sizes = fit_from_index(uploaded_ids)
+                logger.info(f"Namespace router fitted: {sizes}")
+            except Exception as e:
+                logger.warning(f"Namespace router fit failed, cross-namespace search stays unrouted: {e}")
             return True
             
         except Exception as e:
@@ -0,0 +1,151 @@
+"""
+Bounded Executors for HanzlaGPT
+Dedicated thread pools per dependency class (LLM, vector, DB) with queue-depth
+limits, so a spike is shed with 503s instead of piling up threads
+"""
+import asyncio
+import contextvars
+import math
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+from loguru import logger
+from app.core.config import settings
+
+
+class ExecutorSaturated(Exception):
+    """Raised when a dependency's executor has no queue room left for new work."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} executor saturated")
+        self.name = name
+        self.retry_after = retry_after
+
+    def headers(self) -> Dict[str, str]:
+        return {"Retry-After": str(max(1, math.ceil(self.retry_after)))}
+
+
+class BoundedExecutor:
+    """Thread pool that admits at most max_workers running plus max_queue waiting calls.
+
+    A call that times out on the caller's side keeps its slot until its thread actually
+    finishes, so abandoned work counts against capacity instead of silently piling up.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"{name}-executor")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._avg_seconds = 0.0
+        self.submitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.peak_queue_depth = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self._pending - self.max_workers)
+
+    def has_room(self) -> bool:
+        return self._pending < self.capacity
+
+    def retry_after(self) -> float:
+        """Rough time for the current backlog to drain, from the average call duration."""
+        backlog = self.queue_depth + 1
+        return max(1.0, self._avg_seconds * backlog / self.max_workers)
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Queue a blocking call from synchronous code (like ThreadPoolExecutor.submit) or
+        raise ExecutorSaturated. The context is copied, as with run()."""
+        with self._lock:
+            if self._pending >= self.capacity:
+                self.rejected += 1
+                raise ExecutorSaturated(self.name, self.retry_after())
+            self._pending += 1
+            self.submitted += 1
+            self.peak_queue_depth = max(self.peak_queue_depth, self.queue_depth)
+        call = partial(contextvars.copy_context().run, self._timed, fn, *args, **kwargs)
+        try:
+            future = self._pool.submit(call)
+        except Exception:
+            self._release()
+            raise
+        # Queued calls cancelled by the caller release their slot here too
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    async def run(self, fn: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run a blocking call on this executor (like asyncio.to_thread) or raise ExecutorSaturated."""
+        return await self.wait(self.submit(fn, *args, **kwargs), timeout)
+
+    async def wait(self, future: Future, timeout: Optional[float] = None) -> Any:
+        """Await a submitted call, counting caller-side timeouts."""
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise
+
+    def _timed(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._avg_seconds = elapsed if not self._avg_seconds else 0.8 * self._avg_seconds + 0.2 * elapsed
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": min(self._pending, self.max_workers),
+            "queue_depth": self.queue_depth,
+            "peak_queue_depth": self.peak_queue_depth,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "avg_ms": round(self._avg_seconds * 1000, 1)
+        }
+
+
+def check_capacity(*pools: BoundedExecutor) -> None:
+    """Admission control for new requests: raise ExecutorSaturated if any pool's queue is full."""
+    for pool in pools:
+        if not pool.has_room():
+            with pool._lock:
+                pool.rejected += 1
+            logger.warning(f"[LOAD] Shedding request: {pool.name} executor queue full ({pool.queue_depth} waiting)")
+            raise ExecutorSaturated(pool.name, pool.retry_after())
+
+
+def get_executor_stats() -> Dict[str, Any]:
+    return {pool.name: pool.get_stats() for pool in (llm_executor, vector_executor, db_executor)}
+
+
+def shutdown_executors() -> None:
+    for pool in (llm_executor, vector_executor, db_executor):
+        pool.shutdown()
+
+
+# Global instances
+llm_executor = BoundedExecutor("llm", settings.LLM_EXECUTOR_WORKERS, settings.LLM_EXECUTOR_QUEUE)
+vector_executor = BoundedExecutor("vector", settings.VECTOR_EXECUTOR_WORKERS, settings.VECTOR_EXECUTOR_QUEUE)
+db_executor = BoundedExecutor("db", settings.DB_EXECUTOR_WORKERS, settings.DB_EXECUTOR_QUEUE)
@@ -0,0 +1,97 @@
+"""
+Extractive Answers for HanzlaGPT
+Degraded-mode responses assembled from the best retrieved sentences, without an LLM
+"""
+import math
+import re
+from typing import Callable, List, Optional, Sequence
+import numpy as np
+from loguru import logger
+from app.core.config import settings
+from app.core.text_utils import split_sentences, strip_label, tokenize
+
+# Sentences fed to the embedding scorer (one batch call)
+MAX_EMBEDDED_SENTENCES = 24
+OVERLAP_WEIGHT = 0.6
+
+INTENT_INTROS = {
+    'career_guidance': "From my own experience:",
+    'ai_advice': "Here's what I can share from my AI/ML work:",
+    'cybersecurity_advice': "Here's what I can share from my cybersecurity work:",
+    'personal_info': "Here's what my knowledge base says:",
+    'general_rag': "Here's what my knowledge base says:",
+}
+DEGRADED_NOTE = "(My full assistant is busy right now, so this is a short answer taken directly from my notes.)"
+
+_NAME = r"(?:Mr\.\s+)?(?:Hanzala|Hanzla)(?:\s+Nawaz)?"
+FIRST_PERSON_RULES = (
+    (re.compile(rf"\b{_NAME}'s\b"), "my"),
+    (re.compile(rf"\b{_NAME}\s+is\b"), "I am"),
+    (re.compile(rf"\b{_NAME}\s+has\b"), "I have"),
+    (re.compile(rf"\b{_NAME}\b"), "I"),
+    (re.compile(r"\b[Hh]e\s+is\b"), "I am"),
+    (re.compile(r"\b[Hh]e\s+has\b"), "I have"),
+    (re.compile(r"\b[Hh]e\s+does\b"), "I do"),
+    (re.compile(r"\b[Hh]e\b"), "I"),
+    (re.compile(r"\b[Hh]is\b"), "my"),
+    (re.compile(r"\b[Hh]im(self)?\b"), lambda m: "myself" if m.group(1) else "me"),
+)
+
+
+def to_first_person(sentence: str) -> str:
+    """Light third-to-first person rewrite of knowledge-base prose about Hanzala."""
+    for pattern, replacement in FIRST_PERSON_RULES:
+        sentence = pattern.sub(replacement, sentence)
+    return sentence[:1].upper() + sentence[1:] if sentence else sentence
+
+
+def score_sentences(query: str, sentences: Sequence[str], query_embedding=None,
+                    sentence_vectors=None) -> List[float]:
+    """IDF-weighted query-term overlap, blended with embedding similarity when vectors are given."""
+    query_terms = set(tokenize(query))
+    sentence_terms = [set(tokenize(s)) for s in sentences]
+    n = len(sentences)
+    idf = {t: math.log(1 + n / (1 + sum(t in terms for terms in sentence_terms))) for t in query_terms}
+    total = sum(idf.values()) or 1.0
+    overlap = np.array([sum(idf[t] for t in query_terms & terms) / total for terms in sentence_terms], dtype=np.float32)
+    if query_embedding is None or sentence_vectors is None or len(sentence_vectors) != n:
+        return overlap.tolist()
+    vectors = np.asarray(sentence_vectors, dtype=np.float32)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-8)
+    query = np.asarray(query_embedding, dtype=np.float32)
+    similarity = np.clip(vectors @ (query / max(np.linalg.norm(query), 1e-8)), 0, 1)
+    return (OVERLAP_WEIGHT * overlap + (1 - OVERLAP_WEIGHT) * similarity).tolist()
+
+
+def extractive_answer(query: str, chunks: Sequence[str], intent: Optional[str] = None,
+                      query_embedding=None,
+                      embed_fn: Optional[Callable[[List[str]], Optional[List[List[float]]]]] = None,
+                      max_sentences: Optional[int] = None) -> Optional[str]:
+    """First-person answer built from the highest-scoring context sentences; None without context."""
+    max_sentences = max_sentences or settings.EXTRACTIVE_MAX_SENTENCES
+    sentences, seen = [], set()
+    for chunk in chunks:
+        for sentence in split_sentences(strip_label(chunk)):
+            key = " ".join(tokenize(sentence, keep_stopwords=True))
+            # Skip fragments, headings and repeats (chunks overlap by design)
+            if len(key.split()) >= 4 and key not in seen:
+                seen.add(key)
+                sentences.append(sentence)
+    if not sentences:
+        return None
+    vectors = None
+    if embed_fn is not None and query_embedding is not None:
+        try:
+            vectors = embed_fn(sentences[:MAX_EMBEDDED_SENTENCES])
+        except Exception as e:
+            logger.warning(f"Extractive scoring without embeddings: {e}")
+        if vectors is not None and len(sentences) > MAX_EMBEDDED_SENTENCES:
+            sentences = sentences[:MAX_EMBEDDED_SENTENCES]
+    scores = score_sentences(query, sentences, query_embedding, vectors)
+    # Only sentences that match the query at all; ties (and the no-match case) keep retrieval
+    # order, since chunks arrive ranked
+    candidates = [i for i in range(len(sentences)) if scores[i] > 0] or list(range(len(sentences)))
+    ranked = sorted(candidates, key=lambda i: (-scores[i], i))[:max_sentences]
+    body = " ".join(to_first_person(sentences[i]) for i in sorted(ranked))
+    intro = INTENT_INTROS.get(intent or "", "Here's what my knowledge base says:")
+    return f"{intro} {body}\n\n{DEGRADED_NOTE}"
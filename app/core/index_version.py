@@ -0,0 +1,72 @@
+"""
+Vector Index Version for HanzlaGPT
+Tracks a version string that changes whenever the vector index is re-ingested,
+so caches keyed on it are invalidated automatically
+"""
+import json
+import os
+import threading
+import time
+from typing import Optional
+from uuid import uuid4
+from loguru import logger
+from app.core.config import settings
+
+_lock = threading.Lock()
+_cached_version: Optional[str] = None
+_cached_mtime: Optional[float] = None
+_cached_path: Optional[str] = None
+
+
+def _read_version_file(path: str) -> Optional[str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("version")
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Could not read index version file {path}: {e}")
+        return None
+
+
+def get_index_version() -> str:
+    """Return the current vector index version.
+
+    The version lives in a small file shared by every worker on the host; it is
+    re-read only when the file's mtime changes. INDEX_VERSION (env) is prepended so
+    remote ingestion jobs can also force a new version through deployment config.
+    """
+    global _cached_version, _cached_mtime, _cached_path
+    path = settings.INDEX_VERSION_PATH
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        mtime = None
+    with _lock:
+        if path != _cached_path or mtime != _cached_mtime or _cached_version is None:
+            _cached_version = _read_version_file(path) if mtime is not None else None
+            _cached_mtime = mtime
+            _cached_path = path
+        version = _cached_version or "0"
+    return f"{settings.INDEX_VERSION}.{version}" if settings.INDEX_VERSION else version
+
+
+def bump_index_version(reason: str = "") -> str:
+    """Generate and persist a new index version. Returns the new version."""
+    global _cached_version, _cached_mtime, _cached_path
+    path = settings.INDEX_VERSION_PATH
+    version = f"{int(time.time())}-{uuid4().hex[:8]}"
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": version, "reason": reason, "updated_at": time.time()}, f)
+        os.replace(tmp_path, path)
+        with _lock:
+            _cached_version = version
+            _cached_mtime = os.stat(path).st_mtime
+            _cached_path = path
+        logger.info(f"Vector index version bumped to {version}" + (f" ({reason})" if reason else ""))
+    except Exception as e:
+        logger.error(f"Failed to bump index version: {e}")
+    return version
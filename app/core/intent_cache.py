@@ -0,0 +1,88 @@
+"""
+Intent Result Cache for HanzlaGPT
+Bounded LRU cache of intent classifications shared across users and sessions
+"""
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from loguru import logger
+from app.core.config import settings
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+
+
+def normalize_query(query: str) -> str:
+    """Fold case, whitespace and punctuation so equivalent queries share a key."""
+    text = unicodedata.normalize("NFKC", query or "").casefold()
+    # Drop apostrophes entirely so "what's" and "whats" collapse together
+    text = text.replace("'", "").replace("’", "")
+    text = _PUNCTUATION_RE.sub(" ", text)
+    return " ".join(text.split())
+
+
+class IntentCache:
+    """Thread-safe LRU cache of intent results keyed by normalized query.
+
+    Every entry is stored under a version string (derived from the intent prompt and
+    the classifier version), so changing either one naturally invalidates old results.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _key(self, query: str, version: str) -> str:
+        return f"{version}:{normalize_query(query)}"
+
+    def get(self, query: str, version: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached intent result, or None on a miss."""
+        key = self._key(query, version)
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(result)
+
+    def set(self, query: str, version: str, result: Dict[str, Any]):
+        """Store an intent result, evicting the least recently used entry when full."""
+        if self.max_entries <= 0:
+            return
+        key = self._key(query, version)
+        with self._lock:
+            self._entries[key] = dict(result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all cached intent results."""
+        with self._lock:
+            self._entries.clear()
+        logger.info("Intent cache cleared")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss statistics for the intent cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+# Global intent cache instance
+intent_cache = IntentCache(max_entries=settings.INTENT_CACHE_MAX_ENTRIES)
@@ -0,0 +1,265 @@
+"""
+LLM Scheduler for HanzlaGPT
+Weighted fair queuing of provider calls across clients, with priority classes
+so interactive chat is served ahead of background jobs
+"""
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+from loguru import logger
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from app.core.executors import BoundedExecutor
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+PRIORITIES = (INTERACTIVE, BACKGROUND)
+
+# Set per request by the chat endpoints; copied into executor threads with the context
+_request_flow: ContextVar[str] = ContextVar("llm_request_flow", default="anonymous")
+
+
+class SchedulerTimeout(Exception):
+    """Raised when a call waited longer than its priority's max wait for a provider slot."""
+
+
+def flow_key(user_id: Optional[str] = None, client_ip: Optional[str] = None) -> str:
+    """Fairness key for a request. user_id is chosen by the client, so the address wins when known."""
+    if client_ip:
+        return f"ip:{client_ip}"
+    if user_id and user_id != "anonymous":
+        return f"user:{user_id}"
+    return "anonymous"
+
+
+def set_request_flow(user_id: Optional[str] = None, client_ip: Optional[str] = None) -> str:
+    flow = flow_key(user_id, client_ip)
+    _request_flow.set(flow)
+    return flow
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """Parse "ip:10.0.0.5=4,user:scraper=0.25"; malformed entries are skipped."""
+    weights = {}
+    for item in spec.split(","):
+        try:
+            flow, value = item.rsplit("=", 1)
+            if float(value) <= 0:
+                raise ValueError(value)
+            weights[flow.strip()] = float(value)
+        except ValueError:
+            if item.strip():
+                logger.warning(f"Ignoring malformed LLM_SCHEDULER_WEIGHTS entry: {item!r}")
+    return weights
+
+
+@dataclass(eq=False)
+class _Waiter:
+    flow: str
+    priority: str
+    start: float
+    finish: float
+    seq: int
+    enqueued: float = field(default_factory=time.monotonic)
+    event: Optional[threading.Event] = None
+    loop: Optional[asyncio.AbstractEventLoop] = None
+    future: Optional[asyncio.Future] = None
+    granted: bool = False
+    abandoned: bool = False
+
+
+class FairScheduler:
+    """At most ``capacity`` concurrent LLM calls, granted by start-time fair queuing.
+
+    Each flow (client) gets virtual start/finish tags advancing by 1/weight per call, and
+    the waiter with the lowest start tag goes next, so a client with many queued calls
+    cannot starve one with a single call. Interactive waiters always go before background
+    ones. Waiters give up after their priority's max wait and raise SchedulerTimeout, so
+    callers can degrade instead of queueing indefinitely. Usable from both coroutines and
+    worker threads.
+    """
+
+    def __init__(self, capacity: int, max_wait: Dict[str, float], weights: Optional[Dict[str, float]] = None):
+        self.capacity = max(1, capacity)
+        self.max_wait = max_wait
+        self.weights = weights or {}
+        self._lock = threading.Lock()
+        self._active = 0
+        self._heap: List[tuple] = []
+        self._waiting = {priority: 0 for priority in PRIORITIES}
+        self._virtual_time = 0.0
+        self._last_finish: Dict[str, float] = {}
+        self._seq = itertools.count()
+        self.granted = {priority: 0 for priority in PRIORITIES}
+        self.immediate = 0
+        self.timeouts = {priority: 0 for priority in PRIORITIES}
+        self._wait_seconds = {priority: 0.0 for priority in PRIORITIES}
+
+    # -- public API --------------------------------------------------------------------
+
+    @contextmanager
+    def slot(self, priority: Optional[str] = None, flow: Optional[str] = None):
+        """Hold a provider slot for the duration of a blocking call."""
+        self.acquire(priority, flow)
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def slot_async(self, priority: Optional[str] = None, flow: Optional[str] = None):
+        """Hold a provider slot for the duration of an awaited call."""
+        await self.acquire_async(priority, flow)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def run(self, executor: "BoundedExecutor", fn: Callable[..., Any], *args, timeout: Optional[float] = None,
+                  priority: Optional[str] = None, flow: Optional[str] = None, **kwargs) -> Any:
+        """Run a blocking provider call on ``executor`` under a slot.
+
+        Unlike ``slot_async()`` around ``executor.run()``, the slot is held until the call's
+        thread finishes: a caller that times out or is cancelled leaves the provider call
+        running, and it keeps counting against capacity until it ends.
+        """
+        await self.acquire_async(priority, flow)
+        try:
+            future = executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self.release()
+            raise
+        future.add_done_callback(lambda _: self.release())
+        return await executor.wait(future, timeout)
+
+    def acquire(self, priority: Optional[str] = None, flow: Optional[str] = None) -> None:
+        event = threading.Event()
+        waiter = self._enqueue(priority, flow, event=event)
+        if waiter.granted:
+            return
+        if not event.wait(self.max_wait.get(waiter.priority)):
+            self._give_up(waiter)
+
+    async def acquire_async(self, priority: Optional[str] = None, flow: Optional[str] = None) -> None:
+        loop = asyncio.get_running_loop()
+        waiter = self._enqueue(priority, flow, loop=loop, future=loop.create_future())
+        if waiter.granted:
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.max_wait.get(waiter.priority))
+        except asyncio.TimeoutError:
+            self._give_up(waiter)
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter.granted
+                if not granted:
+                    self._abandon(waiter)
+            if granted:
+                self.release()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            self._active -= 1
+            self._dispatch()
+
+    # -- internals (call with the lock held unless noted) ----------------------------------
+
+    def _enqueue(self, priority: Optional[str], flow: Optional[str], **wakeup) -> _Waiter:
+        """Tag and queue a waiter, granting it at once if a slot is free (takes the lock)."""
+        priority = priority or INTERACTIVE
+        flow = flow or _request_flow.get()
+        with self._lock:
+            start = max(self._virtual_time, self._last_finish.get(flow, 0.0))
+            finish = start + 1.0 / self.weights.get(flow, 1.0)
+            self._last_finish[flow] = finish
+            waiter = _Waiter(flow, priority, start, finish, next(self._seq), **wakeup)
+            heapq.heappush(self._heap, (PRIORITIES.index(priority), start, waiter.seq, waiter))
+            self._waiting[priority] += 1
+            self._dispatch()
+            if waiter.granted:
+                self.immediate += 1
+        return waiter
+
+    def _dispatch(self) -> None:
+        while self._active < self.capacity and self._heap:
+            *_, waiter = heapq.heappop(self._heap)
+            if waiter.abandoned:
+                continue
+            self._waiting[waiter.priority] -= 1
+            waiter.granted = True
+            self._active += 1
+            self._virtual_time = max(self._virtual_time, waiter.start)
+            self.granted[waiter.priority] += 1
+            self._wait_seconds[waiter.priority] += time.monotonic() - waiter.enqueued
+            if waiter.event is not None:
+                waiter.event.set()
+            elif waiter.future is not None:
+                waiter.loop.call_soon_threadsafe(_resolve, waiter.future)
+        self._prune()
+
+    def _give_up(self, waiter: _Waiter) -> None:
+        """Max wait elapsed: keep a slot granted in the meantime, otherwise time out (takes the lock)."""
+        with self._lock:
+            if waiter.granted:
+                return
+            self._abandon(waiter)
+            self.timeouts[waiter.priority] += 1
+        logger.warning(f"[LLM] Scheduler wait exceeded for {waiter.flow} ({waiter.priority})")
+        raise SchedulerTimeout(f"no LLM slot within {self.max_wait.get(waiter.priority)}s for {waiter.flow}")
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        waiter.abandoned = True
+        self._waiting[waiter.priority] -= 1
+        # Refund the flow's virtual time if nothing was queued behind this call
+        if self._last_finish.get(waiter.flow) == waiter.finish:
+            self._last_finish[waiter.flow] = waiter.start
+
+    def _prune(self) -> None:
+        """Forget flows whose tags are behind virtual time (they would restart from it anyway)."""
+        if len(self._last_finish) > 4096:
+            self._last_finish = {f: t for f, t in self._last_finish.items() if t > self._virtual_time}
+
+    def get_stats(self) -> Dict[str, object]:
+        with self._lock:
+            waiting_flows: Dict[str, int] = {}
+            for *_, waiter in self._heap:
+                if not waiter.abandoned:
+                    waiting_flows[waiter.flow] = waiting_flows.get(waiter.flow, 0) + 1
+            return {
+                "capacity": self.capacity,
+                "active": self._active,
+                "waiting": dict(self._waiting),
+                "top_waiting_flows": dict(sorted(waiting_flows.items(), key=lambda kv: -kv[1])[:5]),
+                "granted": dict(self.granted),
+                "granted_immediately": self.immediate,
+                "timeouts": dict(self.timeouts),
+                "avg_wait_ms": {
+                    p: round(self._wait_seconds[p] / self.granted[p] * 1000, 1) if self.granted[p] else 0.0
+                    for p in PRIORITIES
+                },
+                "max_wait_seconds": dict(self.max_wait),
+            }
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(True)
+
+
+# Global instance
+llm_scheduler = FairScheduler(
+    capacity=settings.LLM_MAX_CONCURRENT_GENERATIONS,
+    max_wait={
+        INTERACTIVE: settings.LLM_SCHEDULER_MAX_WAIT_SECONDS,
+        BACKGROUND: settings.LLM_SCHEDULER_BACKGROUND_MAX_WAIT_SECONDS,
+    },
+    weights=parse_weights(settings.LLM_SCHEDULER_WEIGHTS),
+)
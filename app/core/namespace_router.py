@@ -0,0 +1,187 @@
+"""
+Namespace Router for HanzlaGPT
+Per-namespace k-means codebooks over chunk embeddings, used to search only the
+namespaces a query is likely to be answered from
+"""
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from loguru import logger
+from app.core.config import settings
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def spherical_kmeans(vectors: np.ndarray, k: int, iterations: int = 20, seed: int = 0) -> np.ndarray:
+    """Cluster unit vectors by cosine similarity; returns (k, dim) normalized centroids."""
+    vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+    k = max(1, min(k, len(vectors)))
+    rng = np.random.default_rng(seed)
+    # k-means++ style seeding on cosine distance
+    centroids = [vectors[rng.integers(len(vectors))]]
+    for _ in range(1, k):
+        distance = 1.0 - np.max(vectors @ np.stack(centroids).T, axis=1)
+        distance = np.clip(distance, 0, None)
+        total = distance.sum()
+        index = rng.choice(len(vectors), p=distance / total) if total > 0 else rng.integers(len(vectors))
+        centroids.append(vectors[index])
+    centroids = np.stack(centroids)
+    for _ in range(iterations):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        updated = centroids.copy()
+        for c in range(k):
+            members = vectors[assignment == c]
+            if len(members):
+                updated[c] = members.sum(axis=0)
+        updated = _normalize(updated)
+        if np.allclose(updated, centroids, atol=1e-6):
+            break
+        centroids = updated
+    return centroids.astype(np.float32)
+
+
+class NamespaceRouter:
+    """Scores a query embedding against each namespace's codebook and picks the namespaces to search.
+
+    A namespace's score is the best cosine similarity between the query and any of its
+    centroids. The top ``top_m`` namespaces are always searched, plus any namespace
+    scoring at least ``min_score``. Namespaces without a codebook are always searched,
+    and an unfitted router (or a dimension mismatch) falls back to the full fan-out.
+    """
+
+    def __init__(self, path: Optional[str] = None, top_m: Optional[int] = None,
+                 min_score: Optional[float] = None, codebook_size: Optional[int] = None):
+        self.path = path or settings.NAMESPACE_ROUTER_PATH
+        self.top_m = settings.NAMESPACE_ROUTER_TOP_M if top_m is None else top_m
+        self.min_score = settings.NAMESPACE_ROUTER_MIN_SCORE if min_score is None else min_score
+        self.codebook_size = codebook_size or settings.NAMESPACE_ROUTER_CODEBOOK_SIZE
+        self._codebooks: Dict[str, np.ndarray] = {}
+        self._loaded = False
+        self._mtime: Optional[float] = None
+        self._lock = threading.Lock()
+        self.routed = 0
+        self.passthrough = 0
+        self.searched = 0
+        self.candidates = 0
+
+    def fit(self, namespaced_vectors: Dict[str, Sequence[Sequence[float]]]) -> Dict[str, int]:
+        """Build one codebook per namespace. Returns the number of centroids per namespace."""
+        codebooks = {}
+        for namespace, vectors in namespaced_vectors.items():
+            if len(vectors):
+                codebooks[namespace] = spherical_kmeans(np.asarray(vectors, dtype=np.float32), self.codebook_size)
+        with self._lock:
+            self._codebooks = codebooks
+            self._loaded = True
+            self._mtime = self._file_mtime()
+        return {ns: len(c) for ns, c in codebooks.items()}
+
+    def save(self) -> bool:
+        with self._lock:
+            codebooks = dict(self._codebooks)
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp.npz"
+            np.savez_compressed(tmp_path, **codebooks)
+            os.replace(tmp_path, self.path)
+            self._mtime = self._file_mtime()
+            logger.info(f"Namespace router saved with {len(codebooks)} namespaces")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save namespace router: {e}")
+            return False
+
+    def _file_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def load(self) -> int:
+        """Load the persisted codebooks; re-read automatically when ingestion rewrites the file."""
+        mtime = self._file_mtime()
+        try:
+            with np.load(self.path) as data:
+                codebooks = {ns: data[ns].astype(np.float32) for ns in data.files}
+        except FileNotFoundError:
+            codebooks = {}
+        except Exception as e:
+            logger.warning(f"Could not read namespace router {self.path}: {e}")
+            codebooks = {}
+        with self._lock:
+            self._codebooks = codebooks
+            self._loaded = True
+            self._mtime = mtime
+        return len(codebooks)
+
+    def scores(self, query_embedding: Sequence[float]) -> Dict[str, float]:
+        """Best centroid similarity per namespace (empty if unfitted or dimensions differ)."""
+        if not self._loaded or self._file_mtime() != self._mtime:
+            self.load()
+        query = _normalize(np.asarray(query_embedding, dtype=np.float32))
+        with self._lock:
+            codebooks = dict(self._codebooks)
+        return {ns: float(np.max(c @ query)) for ns, c in codebooks.items() if c.shape[1] == query.shape[0]}
+
+    def route(self, query_embedding: Optional[Sequence[float]], candidates: Sequence[str]) -> List[str]:
+        """Subset of candidates worth searching, best first; unknown namespaces are kept."""
+        candidates = list(candidates)
+        scores = self.scores(query_embedding) if query_embedding is not None else {}
+        known = [ns for ns in candidates if ns in scores]
+        if not known:
+            self.passthrough += 1
+            return candidates
+        ranked = sorted(known, key=lambda ns: -scores[ns])
+        selected = [ns for i, ns in enumerate(ranked) if i < self.top_m or scores[ns] >= self.min_score]
+        selected.extend(ns for ns in candidates if ns not in scores)
+        self.routed += 1
+        self.searched += len(selected)
+        self.candidates += len(candidates)
+        return selected
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "namespaces": sorted(self._codebooks),
+            "top_m": self.top_m,
+            "min_score": self.min_score,
+            "routed": self.routed,
+            "passthrough": self.passthrough,
+            "avg_fanout": round(self.searched / self.routed, 2) if self.routed else None,
+            "fanout_ratio": round(self.searched / self.candidates, 3) if self.candidates else None,
+        }
+
+
+def route_namespaces(query_embedding: Optional[Sequence[float]], candidates: Sequence[str]) -> List[str]:
+    """Route with the global router when enabled, otherwise search every candidate."""
+    if not settings.NAMESPACE_ROUTER_ENABLED:
+        return list(candidates)
+    try:
+        return namespace_router.route(query_embedding, candidates)
+    except Exception as e:
+        logger.warning(f"Namespace routing failed, searching all namespaces: {e}")
+        return list(candidates)
+
+
+def fit_from_index(namespaced_ids: Dict[str, List[str]], batch_size: int = 100) -> Dict[str, int]:
+    """Fit the global router from vectors already stored in Pinecone (no re-embedding) and persist it."""
+    from app.core.vectorstore import get_pinecone_index
+    index = get_pinecone_index()
+    namespaced_vectors: Dict[str, List[List[float]]] = {}
+    for namespace, ids in namespaced_ids.items():
+        vectors = []
+        for start in range(0, len(ids), batch_size):
+            response = index.fetch(ids=ids[start:start + batch_size], namespace=namespace)
+            vectors.extend(v.values for v in response.vectors.values())
+        if vectors:
+            namespaced_vectors[namespace] = vectors
+    sizes = namespace_router.fit(namespaced_vectors)
+    namespace_router.save()
+    return sizes
+
+
+# Global instance
+namespace_router = NamespaceRouter()
@@ -0,0 +1,194 @@
+"""
+Project Catalog for HanzlaGPT
+Compact in-memory list of projects (name, summary, chunk ids) built at ingestion,
+so "what projects have you done" is answered without a vector search
+"""
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+from loguru import logger
+from app.core.config import settings
+
+SUMMARY_MAX_CHARS = 400
+
+
+@dataclass
+class ProjectEntry:
+    name: str
+    title: str
+    summary: str
+    source: str
+    chunk_ids: List[str] = field(default_factory=list)
+
+
+def summarize_project(text: str, max_chars: int = SUMMARY_MAX_CHARS) -> str:
+    """First prose paragraph of a project file, cut at a sentence boundary."""
+    paragraphs = [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
+    body = next((p for p in paragraphs if len(p.split()) > 8 and not p.startswith('#')), paragraphs[0] if paragraphs else "")
+    body = " ".join(body.split())
+    if len(body) <= max_chars:
+        return body
+    cut = body[:max_chars]
+    end = cut.rfind(". ")
+    return cut[:end + 1] if end > max_chars // 2 else cut.rstrip() + "…"
+
+
+def project_title(name: str, text: str) -> str:
+    """Title from a leading heading/"Project:" line, else the humanized file name."""
+    for line in text.splitlines():
+        line = line.strip().lstrip('#').strip()
+        if not line:
+            continue
+        match = re.match(r"(?i)^(project(?: name| title)?)\s*:\s*(.+)$", line)
+        if match:
+            return match.group(2).strip()
+        if len(line) <= 80 and not line.endswith('.'):
+            return line
+        break
+    return name.replace('_', ' ').replace('-', ' ').strip().title()
+
+
+def directory_signature(directory: str) -> Dict[str, List[float]]:
+    """(mtime, size) per project file; any change means the catalog is stale."""
+    signature = {}
+    try:
+        for filename in sorted(os.listdir(directory)):
+            if filename.endswith('.txt'):
+                st = os.stat(os.path.join(directory, filename))
+                signature[filename] = [st.st_mtime, st.st_size]
+    except OSError:
+        pass
+    return signature
+
+
+class ProjectCatalog:
+    """Persisted project catalog that rebuilds itself when the project files change."""
+
+    def __init__(self, path: Optional[str] = None, projects_dir: Optional[str] = None,
+                 check_interval: Optional[float] = None):
+        self.path = path or settings.PROJECT_CATALOG_PATH
+        self.projects_dir = projects_dir or settings.PROJECTS_DIR
+        self.check_interval = settings.PROJECT_CATALOG_CHECK_SECONDS if check_interval is None else check_interval
+        self._entries: List[ProjectEntry] = []
+        self._signature: Dict[str, List[float]] = {}
+        self._checked_at = 0.0
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._stats = {"served": 0, "rebuilds": 0}
+
+    def build(self, documents: Iterable[Any], chunks: Iterable[Any] = ()) -> List[ProjectEntry]:
+        """Build entries from project Documents (project_name metadata) and their chunks."""
+        chunk_ids: Dict[str, List[str]] = {}
+        for chunk in chunks:
+            name = chunk.metadata.get('project_name')
+            chunk_id = chunk.metadata.get('chunk_id')
+            if name and chunk_id and chunk_id not in chunk_ids.setdefault(name, []):
+                chunk_ids[name].append(chunk_id)
+        entries: Dict[str, ProjectEntry] = {}
+        for doc in documents:
+            name = doc.metadata.get('project_name')
+            if not name or name in entries:
+                continue
+            entries[name] = ProjectEntry(
+                name=name,
+                title=project_title(name, doc.page_content),
+                summary=summarize_project(doc.page_content),
+                source=doc.metadata.get('source', ''),
+                chunk_ids=chunk_ids.get(name, []),
+            )
+        with self._lock:
+            self._entries = sorted(entries.values(), key=lambda e: e.name)
+            self._signature = directory_signature(self.projects_dir)
+            self._checked_at = time.time()
+            self._loaded = True
+            self._stats["rebuilds"] += 1
+            return list(self._entries)
+
+    def save(self) -> bool:
+        with self._lock:
+            payload = {"built_at": time.time(), "projects_dir": self.projects_dir,
+                       "signature": self._signature, "projects": [asdict(e) for e in self._entries]}
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, indent=2)
+            os.replace(tmp_path, self.path)
+            logger.info(f"Project catalog saved with {len(payload['projects'])} projects")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save project catalog: {e}")
+            return False
+
+    def load(self) -> int:
+        """Load the persisted catalog (called at startup), rebuilding it if the files moved on."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+            with self._lock:
+                self._entries = [ProjectEntry(**p) for p in payload.get("projects", [])]
+                self._signature = payload.get("signature", {})
+                self._loaded = True
+        except FileNotFoundError:
+            logger.info("No persisted project catalog yet")
+        except Exception as e:
+            logger.warning(f"Could not read project catalog {self.path}: {e}")
+        self.refresh_if_stale(force=True)
+        return len(self._entries)
+
+    def rebuild_from_files(self) -> List[ProjectEntry]:
+        """Re-read the projects directory with the ingestion loader (same chunk ids as Pinecone)."""
+        from app.core.enhanced_data_loader import EnhancedDataLoader
+        loader = EnhancedDataLoader()
+        documents = loader.load_projects_directory(self.projects_dir)
+        chunks = loader.create_namespaced_chunks(documents).get('projects', [])
+        entries = self.build(documents, chunks)
+        self.save()
+        return entries
+
+    def refresh_if_stale(self, force: bool = False) -> bool:
+        """Rebuild when project files were added, removed or edited. Returns True if rebuilt."""
+        now = time.time()
+        if not force and now - self._checked_at < self.check_interval:
+            return False
+        self._checked_at = now
+        signature = directory_signature(self.projects_dir)
+        if signature == self._signature or (not signature and not os.path.isdir(self.projects_dir)):
+            return False
+        logger.info("Project files changed, rebuilding project catalog")
+        try:
+            self.rebuild_from_files()
+            return True
+        except Exception as e:
+            logger.error(f"Project catalog rebuild failed: {e}")
+            return False
+
+    def entries(self) -> List[ProjectEntry]:
+        if not self._loaded:
+            self.load()
+        else:
+            self.refresh_if_stale()
+        with self._lock:
+            return list(self._entries)
+
+    def render(self) -> str:
+        """Catalog as a single context block for the LLM (empty if there are no projects)."""
+        entries = self.entries()
+        if not entries:
+            return ""
+        self._stats["served"] += 1
+        lines = [f"[PROJECTS] Hanzla's projects ({len(entries)}):"]
+        lines.extend(f"- {e.title}: {e.summary}" for e in entries)
+        return "\n".join(lines)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"projects": len(self._entries), "path": self.path, **self._stats}
+
+
+# Global instance
+project_catalog = ProjectCatalog()
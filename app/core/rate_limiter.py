@@ -0,0 +1,266 @@
+"""
+Rate Limiter for HanzlaGPT
+GCRA (generic cell rate algorithm) limiter with O(1) checks and a backend shared across workers
+"""
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from loguru import logger
+from app.core.config import settings
+
+_PERIODS = {"s": 1, "sec": 1, "second": 1, "m": 60, "min": 60, "minute": 60,
+            "h": 3600, "hour": 3600, "d": 86400, "day": 86400}
+_RATE_RE = re.compile(r"^\s*(\d+)\s*/\s*(\d*)\s*([a-z]+)\s*$")
+
+
+@dataclass(frozen=True)
+class Rate:
+    """A limit of ``limit`` requests per ``period`` seconds."""
+    limit: int
+    period: float
+
+    @property
+    def emission_interval(self) -> float:
+        return self.period / self.limit
+
+    def describe(self) -> str:
+        for name, seconds in (("day", 86400), ("hour", 3600), ("minute", 60)):
+            if self.period == seconds:
+                return f"{self.limit} requests per {name}"
+        return f"{self.limit} requests per {int(self.period)} seconds"
+
+
+def parse_rate(value: str) -> Optional[Rate]:
+    """Parse strings like "3/day", "60/hour" or "10/30s". Empty or "0/..." disables the limit."""
+    if not value or not value.strip():
+        return None
+    match = _RATE_RE.match(value.lower())
+    unit = match.group(3) if match else ""
+    if unit not in _PERIODS and unit.endswith("s"):
+        unit = unit[:-1]
+    if unit not in _PERIODS:
+        raise ValueError(f"Invalid rate limit '{value}', expected e.g. '3/day' or '60/hour'")
+    limit = int(match.group(1))
+    period = (int(match.group(2)) if match.group(2) else 1) * _PERIODS[unit]
+    return Rate(limit=limit, period=period) if limit > 0 else None
+
+
+@dataclass
+class RateLimitDecision:
+    """Outcome of a rate limit check, convertible to standard response headers."""
+    allowed: bool
+    limit: int = 0
+    remaining: int = 0
+    reset_after: float = 0.0
+    retry_after: float = 0.0
+    scope: str = ""
+    rate: Optional[Rate] = None
+
+    def headers(self) -> Dict[str, str]:
+        if not self.limit:
+            return {}
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(max(self.remaining, 0)),
+            "X-RateLimit-Reset": str(math.ceil(self.reset_after)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+class RateLimitStore(ABC):
+    """Atomic storage for GCRA theoretical arrival times (TAT).
+
+    Stores whose calls do I/O set ``blocking`` so async callers run them off the event loop.
+    """
+
+    blocking = False
+
+    @abstractmethod
+    def acquire_all(self, requests: List[Tuple[str, Rate]], now: float) -> List[Tuple[bool, float]]:
+        """Try to admit one request against every (key, rate) at once.
+        Returns (allowed, tat) per key; nothing is recorded unless every key allows it."""
+        pass
+
+    def acquire(self, key: str, rate: Rate, now: float) -> Tuple[bool, float]:
+        """Try to admit one request. Returns (allowed, tat after the attempt)."""
+        return self.acquire_all([(key, rate)], now)[0]
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    @staticmethod
+    def _gcra(tat: Optional[float], rate: Rate, now: float) -> Tuple[bool, float]:
+        tat = max(tat or now, now)
+        new_tat = tat + rate.emission_interval
+        if new_tat - rate.period > now:
+            return False, tat
+        return True, new_tat
+
+
+class MemoryRateLimitStore(RateLimitStore):
+    """Per-process store. Idle keys expire once their TAT has passed."""
+
+    def __init__(self):
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire_all(self, requests: List[Tuple[str, Rate]], now: float) -> List[Tuple[bool, float]]:
+        with self._lock:
+            results = [self._gcra(self._tats.get(key), rate, now) for key, rate in requests]
+            if all(allowed for allowed, _ in results):
+                for (key, _), (_, tat) in zip(requests, results):
+                    self._tats[key] = tat
+                    self._tats.move_to_end(key)
+            # Amortized O(1) expiry: drop idle keys from the least recently updated end
+            for _ in range(2):
+                if not self._tats:
+                    break
+                oldest_key, oldest_tat = next(iter(self._tats.items()))
+                if oldest_tat > now:
+                    break
+                del self._tats[oldest_key]
+            return results
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+
+class SQLiteRateLimitStore(RateLimitStore):
+    """Store shared by every worker on the host (SQLite in WAL mode)."""
+
+    blocking = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._checks = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connect()
+        conn.execute("CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_rate_limits_tat ON rate_limits(tat)")
+        logger.info(f"SQLite rate limit store ready at {path}")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    def acquire_all(self, requests: List[Tuple[str, Rate]], now: float) -> List[Tuple[bool, float]]:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            results = []
+            for key, rate in requests:
+                row = conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+                results.append(self._gcra(row[0] if row else None, rate, now))
+            if all(allowed for allowed, _ in results):
+                conn.executemany(
+                    "INSERT INTO rate_limits (key, tat) VALUES (?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+                    [(key, tat) for (key, _), (_, tat) in zip(requests, results)],
+                )
+            self._checks += 1
+            if self._checks % 500 == 0:
+                # Idle keys are equivalent to fresh ones once their TAT has passed
+                conn.execute("DELETE FROM rate_limits WHERE tat <= ?", (now,))
+            conn.execute("COMMIT")
+            return results
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+
+
+class RateLimiter:
+    """Applies per-user and per-IP GCRA limits.
+
+    GCRA behaves like a sliding window: up to ``limit`` requests can burst at once, after
+    which capacity refills continuously at ``limit / period``. Each check is one keyed
+    read-modify-write, regardless of traffic.
+    """
+
+    def __init__(self, store: RateLimitStore, per_user: Optional[Rate], per_ip: Optional[Rate]):
+        self.store = store
+        self.rules: Dict[str, Optional[Rate]] = {"ip": per_ip, "user": per_user}
+        self.allowed = 0
+        self.rejected = 0
+
+    def check(self, user_key: Optional[str], client_ip: Optional[str]) -> RateLimitDecision:
+        """Admit or reject one request. Every rule is evaluated before any quota is used, so a
+        request rejected by one limit does not count against the others. Reports the most
+        restrictive applicable limit."""
+        now = time.time()
+        identities = {"ip": client_ip, "user": user_key}
+        applicable = [(scope, rate, identities.get(scope)) for scope, rate in self.rules.items()
+                      if rate is not None and identities.get(scope)]
+        if not applicable:
+            self.allowed += 1
+            return RateLimitDecision(allowed=True)
+        try:
+            results = self.store.acquire_all(
+                [(f"{scope}:{identity}", rate) for scope, rate, identity in applicable], now
+            )
+        except Exception as e:
+            # Fail open: a broken limiter store must not take the chat down
+            logger.error(f"Rate limit store failed, allowing request: {e}")
+            self.allowed += 1
+            return RateLimitDecision(allowed=True)
+        decisions: List[RateLimitDecision] = []
+        for (scope, rate, identity), (allowed, tat) in zip(applicable, results):
+            decision = RateLimitDecision(
+                allowed=allowed,
+                limit=rate.limit,
+                remaining=int((rate.period - (tat - now)) / rate.emission_interval + 1e-9),
+                reset_after=max(tat - now, 0.0),
+                retry_after=max(tat + rate.emission_interval - rate.period - now, 0.0),
+                scope=scope,
+                rate=rate,
+            )
+            if not allowed:
+                self.rejected += 1
+                logger.info(f"Rate limit exceeded for {scope} {identity} ({rate.describe()})")
+                return decision
+            decisions.append(decision)
+        self.allowed += 1
+        return min(decisions, key=lambda d: d.remaining)
+
+    def get_stats(self) -> Dict[str, object]:
+        """Get admission counters and the number of tracked keys."""
+        return {
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "tracked_keys": len(self.store),
+            "rules": {scope: rate.describe() for scope, rate in self.rules.items() if rate},
+        }
+
+
+def create_rate_limiter() -> RateLimiter:
+    """Build the configured rate limiter, falling back to a per-process store on failure."""
+    store: Optional[RateLimitStore] = None
+    if settings.RATE_LIMIT_BACKEND.lower() == "sqlite":
+        try:
+            store = SQLiteRateLimitStore(settings.RATE_LIMIT_SQLITE_PATH)
+        except Exception as e:
+            logger.warning(f"SQLite rate limit store unavailable ({e}), limits will be per worker")
+    return RateLimiter(
+        store=store or MemoryRateLimitStore(),
+        per_user=parse_rate(settings.RATE_LIMIT_PER_USER),
+        per_ip=parse_rate(settings.RATE_LIMIT_PER_IP),
+    )
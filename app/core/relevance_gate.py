@@ -0,0 +1,148 @@
+"""
+Relevance Gate for HanzlaGPT
+Answers with the templated "not in my knowledge base" reply, without an LLM call,
+when retrieval found nothing relevant enough for the intent
+"""
+import re
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Optional
+from loguru import logger
+from app.core.config import settings
+from app.templates.prompts import PERSONAL_CONTEXT
+
+# Profile suggested per intent, unless the query names a better one
+INTENT_PROFILE = {
+    'career_guidance': 'LinkedIn',
+    'ai_advice': 'GitHub',
+    'cybersecurity_advice': 'LinkedIn',
+    'personal_info': 'Portfolio',
+    'general_rag': 'Portfolio',
+}
+KEYWORD_PROFILE = (
+    (('code', 'github', 'repo', 'repository', 'open source'), 'GitHub'),
+    (('kaggle', 'competition', 'notebook', 'dataset'), 'Kaggle'),
+    (('blog', 'article', 'medium', 'writing', 'post'), 'Medium'),
+    (('job', 'work', 'experience', 'company', 'linkedin', 'certification'), 'LinkedIn'),
+    (('twitter', 'tweet'), 'Twitter'),
+)
+
+# Scores the gate compares against: the Pinecone match score of a retrieval (legacy chat path)
+# and the cosine similarity of re-embedded chunks to the query (enhanced service). They are on
+# different scales, so each has its own thresholds.
+MATCH_SCORE = "match"
+RERANK_SCORE = "rerank"
+
+# Greetings and "who are you" questions are answered from the persona, not the knowledge base
+GREETING_RE = re.compile(
+    r"^\s*(hi|hello|hey|hiya|greetings|good (morning|afternoon|evening))\b"
+    r"|\b(what is your name|what's your name|who are you|introduce yourself|tell me about yourself)\b",
+    re.IGNORECASE,
+)
+
+
+def is_greeting(query: str) -> bool:
+    return bool(GREETING_RE.search(query or ""))
+
+
+def _profile_links() -> Dict[str, str]:
+    """Profile name -> URL, parsed from the "- Name: url" lines of PERSONAL_CONTEXT."""
+    return dict(re.findall(r"^- (\w+): (https?://\S+)", PERSONAL_CONTEXT, re.MULTILINE))
+
+
+PROFILE_LINKS = _profile_links()
+
+
+def relevant_profile(query: str, intent: Optional[str] = None) -> str:
+    query_lower = query.lower()
+    for keywords, profile in KEYWORD_PROFILE:
+        if any(k in query_lower for k in keywords) and profile in PROFILE_LINKS:
+            return profile
+    profile = INTENT_PROFILE.get(intent or "", 'Portfolio')
+    return profile if profile in PROFILE_LINKS else next(iter(PROFILE_LINKS), 'Portfolio')
+
+
+def no_information_answer(query: str, intent: Optional[str] = None) -> str:
+    """The reply PERSONAL_CONTEXT instructs the model to give when the data has no answer."""
+    profile = relevant_profile(query, intent)
+    link = PROFILE_LINKS.get(profile)
+    where = f"{profile} ({link})" if link else "social media profiles"
+    return f"I don't have that specific information in my knowledge base. You can check my {where} for more details."
+
+
+@lru_cache(maxsize=8)
+def parse_thresholds(spec: str) -> Dict[str, float]:
+    """Parse "personal_info=0.3,general_rag=0.3"; malformed entries are skipped."""
+    thresholds = {}
+    for item in spec.split(","):
+        try:
+            intent, value = item.split("=")
+            thresholds[intent.strip()] = float(value)
+        except ValueError:
+            if item.strip():
+                logger.warning(f"Ignoring malformed relevance gate threshold entry: {item!r}")
+    return thresholds
+
+
+def threshold_specs() -> Dict[str, Dict[str, float]]:
+    """Per-intent thresholds for each score scale."""
+    return {
+        MATCH_SCORE: parse_thresholds(settings.RELEVANCE_GATE_THRESHOLDS),
+        RERANK_SCORE: parse_thresholds(settings.RELEVANCE_GATE_RERANK_THRESHOLDS),
+    }
+
+
+class RelevanceGate:
+    """Per-intent, per-score-scale minimum best-retrieval score; counts the LLM calls it saved."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.passed = 0
+        self.greetings = 0
+        self.saved: Dict[str, int] = {}
+
+    def threshold(self, intent: Optional[str], scale: str = MATCH_SCORE) -> Optional[float]:
+        if not settings.RELEVANCE_GATE_ENABLED:
+            return None
+        return threshold_specs()[scale].get(intent or "")
+
+    def should_skip_llm(self, intent: Optional[str], best_score: Optional[float],
+                        scale: str = MATCH_SCORE, query: str = "") -> bool:
+        """True when retrieval ran (best_score known) and its best hit is under the intent's
+        threshold for that score scale. Greetings are never gated."""
+        threshold = self.threshold(intent, scale)
+        if threshold is None or best_score is None:
+            return False
+        if is_greeting(query):
+            with self._lock:
+                self.greetings += 1
+            return False
+        skip = best_score < threshold
+        with self._lock:
+            self.checked += 1
+            if skip:
+                self.saved[intent] = self.saved.get(intent, 0) + 1
+            else:
+                self.passed += 1
+        if skip:
+            logger.info(f"[RAG] Relevance gate: best {scale} score {best_score:.3f} < {threshold} for {intent}, skipping LLM")
+        return skip
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            saved = sum(self.saved.values())
+            return {
+                "enabled": settings.RELEVANCE_GATE_ENABLED,
+                "thresholds": threshold_specs(),
+                "checked": self.checked,
+                "passed": self.passed,
+                "greetings_exempted": self.greetings,
+                "llm_calls_saved": saved,
+                "saved_by_intent": dict(self.saved),
+                "skip_rate": round(saved / self.checked, 3) if self.checked else 0.0,
+            }
+
+
+# Global instance
+relevance_gate = RelevanceGate()
@@ -0,0 +1,290 @@
+"""
+Retrieval Plans for HanzlaGPT
+Declarative retrieval strategies (namespace/query/top-k steps with fallbacks) and a concurrent executor
+"""
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from loguru import logger
+from app.core.config import settings
+from app.core.namespace_router import route_namespaces
+from app.core.context_selection import adaptive_cutoff, log_cutoff, mmr_select, top_k_limits
+from app.core.executors import BoundedExecutor, ExecutorSaturated, vector_executor
+
+# "*" in a step expands to these namespaces (ranked together by score)
+ALL_NAMESPACES = ('cybersecurity', 'ai_ml', 'projects', 'background', 'personality', 'programs', 'general')
+NAMESPACE_PRIORITY = {'projects': 0, 'background': 1, 'cybersecurity': 2, 'ai_ml': 3, 'personality': 4, 'programs': 5, 'general': 6}
+
+# Steps against these pseudo-namespaces are served from memory, without embedding
+CATALOG = "@catalog"
+
+# Search results are (text, score) or (text, score, vector); vectors enable MMR selection
+SearchFn = Callable[[str, List[float], int], List[Tuple]]
+EmbedFn = Callable[[List[str]], List[List[float]]]
+
+
+@dataclass(frozen=True)
+class RetrievalStep:
+    """Query one namespace ("*" = all namespaces, "@..." = in-memory source) with the user's query or a fixed query."""
+    namespace: str
+    top_k: int = 3
+    query: Optional[str] = None
+    label: bool = False
+
+
+@dataclass(frozen=True)
+class RetrievalStage:
+    """Steps that run concurrently. With early_stop, stragglers are abandoned once max_chunks are in."""
+    steps: Tuple[RetrievalStep, ...]
+    early_stop: bool = False
+
+
+@dataclass(frozen=True)
+class RetrievalPlan:
+    """Stages are tried in order; the first stage that yields context wins."""
+    name: str
+    stages: Tuple[RetrievalStage, ...]
+    max_chunks: int = 3
+
+    def with_fallback(self, stage: RetrievalStage) -> "RetrievalPlan":
+        return RetrievalPlan(self.name, self.stages + (stage,), self.max_chunks)
+
+
+@dataclass
+class PlanResult:
+    plan: str
+    chunks: List[str] = field(default_factory=list)
+    stage: Optional[int] = None
+    # Highest match score seen (0.0 if searches ran but found nothing, None if nothing could be searched)
+    best_score: Optional[float] = None
+    # The chunks are the whole project catalog, meant to be listed as-is
+    from_catalog: bool = False
+    timings: List[Dict[str, Any]] = field(default_factory=list)
+    total_ms: float = 0.0
+
+    @property
+    def context(self) -> str:
+        return "\n\n".join(self.chunks)
+
+
+def _stage(*steps: RetrievalStep, early_stop: bool = False) -> RetrievalStage:
+    return RetrievalStage(tuple(steps), early_stop)
+
+
+CROSS_NAMESPACE = _stage(RetrievalStep("*", top_k=5, label=True))
+SPECIFIC_PROJECT_TERMS = ('melanoma', 'breast', 'diabetes', 'nutrition', 'lung', 'cancer')
+PROJECT_SHOWCASE_QUERIES = (
+    "melanoma cancer prediction",
+    "breast cancer classification",
+    "diabetes prediction",
+    "nutrition analyzer",
+    "lung cancer classification",
+)
+
+PLANS: Dict[str, RetrievalPlan] = {
+    "background": RetrievalPlan("background", (
+        _stage(RetrievalStep("background", top_k=3)),
+        CROSS_NAMESPACE,
+    )),
+    "project_overview": RetrievalPlan("project_overview", (
+        _stage(RetrievalStep(CATALOG, top_k=1)),
+        _stage(*(RetrievalStep("projects", top_k=1, query=q) for q in PROJECT_SHOWCASE_QUERIES), early_stop=True),
+        _stage(RetrievalStep("projects", top_k=3)),
+        CROSS_NAMESPACE,
+    )),
+    "project_specific": RetrievalPlan("project_specific", (
+        _stage(RetrievalStep("projects", top_k=3)),
+        CROSS_NAMESPACE,
+    )),
+    "general": RetrievalPlan("general", (
+        CROSS_NAMESPACE,
+        _stage(RetrievalStep(settings.PINECONE_NAMESPACE or "", top_k=3)),
+    )),
+}
+
+# Keyword rules, first match wins
+PLAN_RULES: Sequence[Tuple[str, Callable[[str], bool]]] = (
+    ("background", lambda q: any(k in q for k in ('background', 'education', 'experience', 'degree', 'graduated', 'completed', 'hanzla'))),
+    ("project_overview", lambda q: 'project' in q and not any(t in q for t in SPECIFIC_PROJECT_TERMS)),
+    ("project_specific", lambda q: any(k in q for k in ('project', 'work', 'developed', 'built', 'created'))),
+)
+
+# Last-resort namespace per intent when the plan found nothing
+INTENT_FALLBACK_NAMESPACE = {
+    'career_guidance': 'background',
+    'ai_advice': 'ai_ml',
+    'cybersecurity_advice': 'cybersecurity',
+}
+
+
+def select_plan(query: str, intent: Optional[str] = None) -> RetrievalPlan:
+    """Choose the retrieval plan for a query by keyword rules, plus an intent-specific fallback."""
+    q = query.lower()
+    name = next((name for name, rule in PLAN_RULES if rule(q)), "general")
+    plan = PLANS[name]
+    namespace = INTENT_FALLBACK_NAMESPACE.get(intent or "")
+    if namespace:
+        plan = plan.with_fallback(_stage(RetrievalStep(namespace, top_k=2)))
+    return plan
+
+
+def pinecone_search(namespace: str, vector: List[float], top_k: int) -> List[Tuple[str, float, List[float]]]:
+    """Default search function: raw Pinecone query against the shared index client (with vectors, for MMR)."""
+    from app.core.vectorstore import query_namespace
+    return [(match.metadata.get('text', ''), match.score, match.values or None)
+            for match in query_namespace(namespace, vector, top_k, include_values=True)]
+
+
+def catalog_search(top_k: int) -> List[Tuple[str, float]]:
+    """In-memory source: the whole project catalog as one chunk."""
+    from app.core.project_catalog import project_catalog
+    text = project_catalog.render()
+    return [(text, 1.0)] if text else []
+
+
+LOCAL_SOURCES: Dict[str, Callable[[int], List[Tuple[str, float]]]] = {CATALOG: catalog_search}
+
+
+def provider_embed(texts: List[str]) -> List[List[float]]:
+    """Default embedding function: one batched call to the active embeddings provider."""
+    from app.core.llm_providers import provider_manager
+    embeddings = provider_manager.get_embeddings()
+    if not embeddings:
+        raise RuntimeError("No embeddings available for search")
+    return embeddings.embed_documents(texts)
+
+
+class PlanExecutor:
+    """Runs retrieval plans: concurrent steps, one embedding batch per stage, de-duplicated results.
+
+    Steps run on the bounded vector executor (shared with the enhanced chat path), so a
+    full queue raises ExecutorSaturated instead of growing a private backlog. execute()
+    blocks, so call it from a worker thread of a different pool.
+    """
+
+    def __init__(self, search_fn: SearchFn = pinecone_search, embed_fn: EmbedFn = provider_embed,
+                 pool: Optional[BoundedExecutor] = None,
+                 local_sources: Optional[Dict[str, Callable[[int], List[Tuple[str, float]]]]] = None,
+                 route_fn: Optional[Callable[[List[float], Sequence[str]], List[str]]] = None):
+        self.search_fn = search_fn
+        self.embed_fn = embed_fn
+        self.local_sources = LOCAL_SOURCES if local_sources is None else local_sources
+        self.route_fn = route_fn or route_namespaces
+        self._pool = pool or vector_executor
+
+    def execute(self, plan: RetrievalPlan, query: str, intent: Optional[str] = None) -> PlanResult:
+        result = PlanResult(plan=plan.name)
+        start = time.perf_counter()
+        min_k, max_k = top_k_limits(intent, plan.max_chunks)
+        for index, stage in enumerate(plan.stages):
+            chunks, best = self._run_stage(stage, query, max_k, result.timings, index, min_k, intent)
+            if best is not None:
+                result.best_score = max(result.best_score or 0.0, best)
+            if chunks:
+                result.chunks, result.stage = chunks, index
+                result.from_catalog = all(step.namespace == CATALOG for step in stage.steps)
+                break
+        result.total_ms = round((time.perf_counter() - start) * 1000, 1)
+        return result
+
+    def _run_stage(self, stage: RetrievalStage, query: str, max_chunks: int,
+                   timings: List[Dict[str, Any]], stage_index: int, min_chunks: int = 1,
+                   intent: Optional[str] = None) -> Tuple[List[str], Optional[float]]:
+        texts = list(dict.fromkeys(step.query or query for step in stage.steps if step.namespace not in self.local_sources))
+        vectors: Dict[str, List[float]] = {}
+        if texts:
+            embed_start = time.perf_counter()
+            try:
+                vectors = dict(zip(texts, self.embed_fn(texts)))
+            except Exception as e:
+                logger.warning(f"[RAG] Plan stage {stage_index} could not embed queries: {e}")
+                return [], None
+            timings.append({"stage": stage_index, "step": "embed", "queries": len(texts),
+                            "ms": round((time.perf_counter() - embed_start) * 1000, 1)})
+
+        # Adaptive top-k and MMR need spare candidates: over-fetch to twice what the plan keeps
+        adaptive = settings.ADAPTIVE_TOP_K_ENABLED and not stage.early_stop
+        diversify = settings.MMR_ENABLED and not stage.early_stop
+        fetch_k = lambda step: max(step.top_k, 2 * max_chunks) if adaptive or diversify else step.top_k
+
+        # Expand "*" steps into one task per namespace the router considers relevant
+        tasks: List[Tuple[RetrievalStep, str]] = []
+        for step in stage.steps:
+            if step.namespace == "*":
+                namespaces = self.route_fn(vectors[step.query or query], ALL_NAMESPACES)
+            else:
+                namespaces = (step.namespace,)
+            tasks.extend((step, ns) for ns in namespaces)
+
+        def run(task: Tuple[RetrievalStep, str]):
+            step, namespace = task
+            step_start = time.perf_counter()
+            try:
+                if namespace in self.local_sources:
+                    matches = self.local_sources[namespace](step.top_k)
+                else:
+                    matches = self.search_fn(namespace, vectors[step.query or query], fetch_k(step))
+                status = "ok"
+            except Exception as e:
+                matches, status = [], f"error: {e}"
+            timing = {"stage": stage_index, "namespace": namespace, "query": step.query or "<query>",
+                      "top_k": fetch_k(step), "results": len(matches), "status": status,
+                      "ms": round((time.perf_counter() - step_start) * 1000, 1)}
+            return step, namespace, matches, timing
+
+        futures: Dict[Any, int] = {}
+        try:
+            for i, task in enumerate(tasks):
+                futures[self._pool.submit(run, task)] = i
+        except ExecutorSaturated:
+            # The request is being shed: don't leave the steps already queued searching for nobody
+            for future in futures:
+                future.cancel()
+            raise
+        completed: Dict[int, Tuple] = {}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                completed[futures[future]] = future.result()
+            if stage.early_stop and sum(1 for c in completed.values() for m in c[2] if m[0]) >= max_chunks:
+                for future in pending:
+                    future.cancel()
+                    timings.append({"stage": stage_index, "namespace": tasks[futures[future]][1], "status": "skipped"})
+                break
+        ranked = []
+        for i in sorted(completed):
+            step, namespace, matches, timing = completed[i]
+            timings.append(timing)
+            for text, score, *values in matches:
+                if text:
+                    chunk = f"[{namespace.upper()}] {text}" if step.label else text
+                    ranked.append((score, NAMESPACE_PRIORITY.get(namespace, 999), i, chunk, text, values[0] if values else None))
+        if not stage.early_stop:
+            ranked.sort(key=lambda r: (-r[0], r[1]))
+        candidates, seen = [], set()
+        for candidate in ranked:
+            if candidate[4] not in seen:
+                seen.add(candidate[4])
+                candidates.append(candidate)
+        searched = any(completed[i][3]["status"] == "ok" for i in completed)
+        best = max((c[0] for c in candidates), default=0.0) if searched else None
+        if adaptive and candidates:
+            scores = [c[0] for c in candidates]
+            eligible = adaptive_cutoff(scores, min_chunks)
+            log_cutoff(intent, min(eligible, max_chunks), len(candidates), scores, eligible)
+            candidates = candidates[:eligible]
+            max_chunks = min(max_chunks, eligible)
+        query_vector = vectors[query] if query in vectors else (vectors[texts[0]] if texts else None)
+        if diversify and len(candidates) > max_chunks and query_vector is not None and all(c[5] is not None for c in candidates):
+            select_start = time.perf_counter()
+            order = mmr_select(query_vector, [c[5] for c in candidates], max_chunks, settings.MMR_LAMBDA)
+            candidates = [candidates[i] for i in order]
+            timings.append({"stage": stage_index, "step": "mmr", "candidates": len(seen),
+                            "ms": round((time.perf_counter() - select_start) * 1000, 1)})
+        return [c[3] for c in candidates[:max_chunks]], best
+
+
+# Global instance
+plan_executor = PlanExecutor()
@@ -0,0 +1,180 @@
+"""
+Semantic Answer Cache for HanzlaGPT
+Reuses answers for paraphrased questions via nearest-neighbour lookup over past query embeddings
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+from loguru import logger
+
+
+@dataclass
+class SemanticEntry:
+    """An answered question stored in the semantic cache."""
+    namespace: str
+    query: str
+    value: Any
+    created_at: float = field(default_factory=time.time)
+    hits: int = 0
+    last_similarity: Optional[float] = None
+
+
+@dataclass
+class SemanticHit:
+    """Result of a successful semantic lookup."""
+    slot: int
+    entry: SemanticEntry
+    similarity: float
+
+
+class SemanticCache:
+    """In-memory nearest-neighbour cache over normalized query embeddings.
+
+    Embeddings live in a preallocated (capacity x dim) float32 matrix, so a lookup is a
+    single matrix-vector product. An entry only matches when its namespace (intent +
+    prompt version + index version) equals the query's, and the cosine similarity is at
+    least ``threshold``. When full, the least recently used entry is evicted.
+    """
+
+    def __init__(self, capacity: int = 512, threshold: float = 0.92,
+                 disabled_intents: Optional[Iterable[str]] = None):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.disabled_intents = set(disabled_intents or [])
+        self._matrix: Optional[np.ndarray] = None
+        self._slots: List[Optional[SemanticEntry]] = [None] * capacity
+        self._lru: "OrderedDict[int, None]" = OrderedDict()
+        self._free: List[int] = list(range(capacity - 1, -1, -1))
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self.false_hits = 0
+        self.evictions = 0
+        self._hit_histogram: Dict[str, int] = {}
+
+    def is_enabled_for(self, intent: str) -> bool:
+        """Whether semantic reuse is allowed for this intent (per-intent opt-out)."""
+        return self.capacity > 0 and intent not in self.disabled_intents
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vec = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm > 0 else vec
+
+    def lookup(self, embedding, namespace: str, intent: str) -> Optional[SemanticHit]:
+        """Return the closest stored answer above the threshold, or None."""
+        if not self.is_enabled_for(intent):
+            self.skipped += 1
+            return None
+        query_vec = self._normalize(embedding)
+        with self._lock:
+            if self._matrix is None or not self._lru or self._matrix.shape[1] != query_vec.shape[0]:
+                self.misses += 1
+                return None
+            slots = np.fromiter(
+                (slot for slot in self._lru if self._slots[slot].namespace == namespace),
+                dtype=np.int64,
+            )
+            if slots.size == 0:
+                self.misses += 1
+                return None
+            similarities = self._matrix[slots] @ query_vec
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                self.misses += 1
+                return None
+            slot = int(slots[best])
+            entry = self._slots[slot]
+            entry.hits += 1
+            entry.last_similarity = similarity
+            self._lru.move_to_end(slot)
+            self.hits += 1
+            bucket = f"{np.floor(similarity * 100) / 100:.2f}"
+            self._hit_histogram[bucket] = self._hit_histogram.get(bucket, 0) + 1
+            return SemanticHit(slot=slot, entry=entry, similarity=similarity)
+
+    def add(self, embedding, namespace: str, intent: str, query: str, value: Any):
+        """Store an answered question, evicting the least recently used entry when full."""
+        if not self.is_enabled_for(intent):
+            return
+        query_vec = self._normalize(embedding)
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != query_vec.shape[0]:
+                # First insert (or embedding model changed): (re)allocate the matrix
+                self._matrix = np.zeros((self.capacity, query_vec.shape[0]), dtype=np.float32)
+                self._slots = [None] * self.capacity
+                self._lru.clear()
+                self._free = list(range(self.capacity - 1, -1, -1))
+            if self._free:
+                slot = self._free.pop()
+            else:
+                slot, _ = self._lru.popitem(last=False)
+                self.evictions += 1
+            self._matrix[slot] = query_vec
+            self._slots[slot] = SemanticEntry(namespace=namespace, query=query, value=value)
+            self._lru[slot] = None
+
+    def _remove_slot(self, slot: int):
+        self._slots[slot] = None
+        self._lru.pop(slot, None)
+        self._free.append(slot)
+
+    def report_false_hit(self, query: str) -> int:
+        """Record that the answer cached for ``query`` was wrongly reused, and drop it."""
+        from app.core.intent_cache import normalize_query
+        target = normalize_query(query)
+        with self._lock:
+            slots = [slot for slot in self._lru if normalize_query(self._slots[slot].query) == target]
+            for slot in slots:
+                self._remove_slot(slot)
+            self.false_hits += len(slots)
+        if slots:
+            logger.warning(f"Semantic cache false hit reported for '{query[:60]}', removed {len(slots)} entries")
+        return len(slots)
+
+    def clear(self):
+        """Drop all stored answers."""
+        with self._lock:
+            for slot in list(self._lru):
+                self._remove_slot(slot)
+
+    def list_entries(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Describe the most recently used entries, for admin inspection."""
+        with self._lock:
+            slots = list(self._lru)[-limit:] if limit > 0 else []
+            entries = [self._slots[slot] for slot in reversed(slots)]
+        return [
+            {
+                "query": entry.query,
+                "namespace": entry.namespace,
+                "hits": entry.hits,
+                "last_similarity": entry.last_similarity,
+                "age_seconds": round(time.time() - entry.created_at, 1),
+            }
+            for entry in entries
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss/false-hit counters and the similarity distribution of hits."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._lru),
+                "capacity": self.capacity,
+                "threshold": self.threshold,
+                "disabled_intents": sorted(self.disabled_intents),
+                "hits": self.hits,
+                "misses": self.misses,
+                "skipped": self.skipped,
+                "false_hits": self.false_hits,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "false_hit_rate": (self.false_hits / self.hits) if self.hits else 0.0,
+                "hit_similarity_histogram": dict(sorted(self._hit_histogram.items())),
+            }
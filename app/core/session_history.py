@@ -0,0 +1,181 @@
+"""
+Session History for HanzlaGPT
+Per-session ring buffer of recent turns, so follow-up intents don't query Postgres
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+from loguru import logger
+from app.core.config import settings
+
+Turn = Dict[str, Any]
+
+
+class SessionHistory:
+    """
+    Keeps the last ``max_turns`` turns of each session in process memory.
+
+    Sessions are evicted least-recently-used once ``max_sessions`` or ``max_bytes`` is
+    exceeded. Turns are appended when a chat is logged, so a lookup made while answering
+    a question only ever sees earlier turns.
+
+    The buffer is per process, so with several workers a session's other turns may have
+    been served elsewhere. A session is therefore reloaded from Postgres once it was last
+    loaded more than ``ttl_seconds`` ago (or never, if this worker only appended to it);
+    turns appended here that the load does not have yet are kept. ``ttl_seconds=0``
+    assumes a single worker and only loads sessions this worker has not seen yet.
+    """
+
+    def __init__(self, max_turns: int = 20, max_sessions: int = 10000, max_bytes: int = 16 * 1024 * 1024,
+                 ttl_seconds: float = 0.0):
+        self.max_turns = max_turns
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._sessions: "OrderedDict[Tuple[str, str], Deque[Turn]]" = OrderedDict()
+        # Monotonic time each session was last loaded from Postgres
+        self._loaded_at: Dict[Tuple[str, str], float] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _turn_size(turn: Turn) -> int:
+        return len(turn.get("query") or "") + len(turn.get("answer") or "") + 64
+
+    def _key(self, user_id: Optional[str], session_id: Optional[str]) -> Tuple[str, str]:
+        return (user_id or "anonymous", session_id or "default")
+
+    def _evict(self):
+        while self._sessions and (len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes):
+            key, turns = self._sessions.popitem(last=False)
+            self._loaded_at.pop(key, None)
+            self._bytes -= sum(self._turn_size(t) for t in turns)
+            self.evictions += 1
+
+    def _push(self, turns: Deque[Turn], turn: Turn):
+        if len(turns) == turns.maxlen:
+            self._bytes -= self._turn_size(turns[0])
+        turns.append(turn)
+        self._bytes += self._turn_size(turn)
+
+    def append(self, user_id: str, session_id: str, query: str, answer: str,
+               intent: Optional[str] = None, created_at: Optional[datetime] = None):
+        """Record a completed turn (called on the write path)."""
+        turn = {"query": query, "answer": answer, "intent": intent, "created_at": created_at or datetime.now()}
+        key = self._key(user_id, session_id)
+        with self._lock:
+            turns = self._sessions.get(key)
+            if turns is None:
+                turns = self._sessions[key] = deque(maxlen=self.max_turns)
+            self._sessions.move_to_end(key)
+            self._push(turns, turn)
+            self._evict()
+
+    def recent(self, user_id: str, session_id: str, limit: int = 2,
+               loader: Optional[Callable[[str, str, int], List[Turn]]] = None) -> List[Turn]:
+        """
+        The session's most recent turns, newest first (the shape of get_chat_history()).
+        On a cold miss or once the session is stale, ``loader`` (default: Postgres) reloads it.
+        """
+        key = self._key(user_id, session_id)
+        turns = self._cached(key, limit)
+        if turns is not None:
+            return turns
+        if loader is None:
+            from app.core.database import get_chat_history as loader
+        try:
+            rows = loader(key[0], key[1], self.max_turns)
+        except Exception as e:
+            logger.warning(f"Failed to load session history: {e}")
+            return self._buffered(key, limit)
+        return self._seed(key, rows, limit)
+
+    async def recent_async(self, user_id: str, session_id: str, limit: int = 2,
+                           loader: Optional[Callable[[str, str, int], Awaitable[List[Turn]]]] = None) -> List[Turn]:
+        """Async variant of recent(); the default loader is get_chat_history_async()."""
+        key = self._key(user_id, session_id)
+        turns = self._cached(key, limit)
+        if turns is not None:
+            return turns
+        if loader is None:
+            from app.core.database import get_chat_history_async as loader
+        try:
+            rows = await loader(key[0], key[1], self.max_turns)
+        except Exception as e:
+            logger.warning(f"Failed to load session history: {e}")
+            return self._buffered(key, limit)
+        return self._seed(key, rows, limit)
+
+    def _cached(self, key: Tuple[str, str], limit: int) -> Optional[List[Turn]]:
+        """Buffered turns for the session, or None on a cold miss or when it is due a reload."""
+        with self._lock:
+            turns = self._sessions.get(key)
+            if turns is not None:
+                loaded_at = self._loaded_at.get(key)
+                if self.ttl_seconds <= 0 or (loaded_at is not None and time.monotonic() - loaded_at < self.ttl_seconds):
+                    self._sessions.move_to_end(key)
+                    self.hits += 1
+                    return list(reversed(turns))[:limit]
+                self.reloads += 1
+            self.misses += 1
+            return None
+
+    def _buffered(self, key: Tuple[str, str], limit: int) -> List[Turn]:
+        """Whatever is buffered for the session, when it could not be reloaded."""
+        with self._lock:
+            return list(reversed(self._sessions.get(key, deque())))[:limit]
+
+    def _seed(self, key: Tuple[str, str], rows: List[Turn], limit: int) -> List[Turn]:
+        with self._lock:
+            # Remember empty sessions too, so new sessions don't hit the database every turn
+            previous = self._sessions.pop(key, deque())
+            self._bytes -= sum(self._turn_size(t) for t in previous)
+            turns = self._sessions[key] = deque(maxlen=self.max_turns)
+            for row in reversed(rows):
+                self._push(turns, dict(row))
+            # Keep turns logged here but not yet written (the chat log is write-behind)
+            newest = max((row["created_at"] for row in rows if row.get("created_at")), default=None)
+            for turn in previous:
+                if newest is None or (turn.get("created_at") and turn["created_at"] > newest):
+                    self._push(turns, turn)
+            self._loaded_at[key] = time.monotonic()
+            self._evict()
+            return list(reversed(self._sessions.get(key, deque())))[:limit]
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+            self._loaded_at.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get buffer size and hit/miss counters."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "sessions": len(self._sessions),
+                "bytes": self._bytes,
+                "max_sessions": self.max_sessions,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "reloads": self.reloads,
+                "ttl_seconds": self.ttl_seconds,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+# Global instance
+session_history = SessionHistory(
+    max_turns=settings.SESSION_HISTORY_MAX_TURNS,
+    max_sessions=settings.SESSION_HISTORY_MAX_SESSIONS,
+    max_bytes=settings.SESSION_HISTORY_MAX_BYTES,
+    ttl_seconds=settings.SESSION_HISTORY_TTL_SECONDS
+)
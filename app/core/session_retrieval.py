@@ -0,0 +1,113 @@
+"""
+Session Retrieval Reuse for HanzlaGPT
+Keeps each session's last retrieved chunk set so close follow-up questions skip retrieval
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.core.config import settings
+
+
+@dataclass
+class RetrievedSet:
+    """Chunks retrieved for one turn, with their embeddings and the query that fetched them."""
+    query_embedding: np.ndarray
+    chunks: List[str]
+    vectors: np.ndarray
+    index_version: str
+    created_at: float
+
+
+def _unit(vector) -> np.ndarray:
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array, axis=-1, keepdims=True)
+    return array / np.where(norm == 0, 1, norm)
+
+
+class SessionRetrievalCache:
+    """
+    Per-session (LRU over sessions) store of the previous turn's retrieval results.
+
+    A follow-up whose query embedding is at least ``threshold`` cosine-similar to the query
+    that produced the stored set reuses it (the caller re-ranks it for the new query).
+    Drifting queries, expired sets and index version changes fall back to fresh retrieval.
+    """
+
+    def __init__(self, threshold: float = 0.8, ttl_seconds: float = 1800, max_sessions: int = 2000):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._sets: "OrderedDict[Tuple[str, str], RetrievedSet]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.reused = 0
+        self.drifted = 0
+        self.cold = 0
+
+    def _key(self, user_id: Optional[str], session_id: Optional[str]) -> Tuple[str, str]:
+        return (user_id or "anonymous", session_id or "default")
+
+    def lookup(self, user_id: str, session_id: str, query_embedding, index_version: str) -> Optional[Tuple[RetrievedSet, float]]:
+        """Return (stored set, similarity) if the session's last retrieval can serve this query."""
+        if self.max_sessions <= 0:
+            return None
+        key = self._key(user_id, session_id)
+        query = _unit(query_embedding)
+        with self._lock:
+            entry = self._sets.get(key)
+            if entry is None or time.time() - entry.created_at > self.ttl_seconds or entry.index_version != index_version:
+                self.cold += 1
+                return None
+            if entry.query_embedding.shape != query.shape:
+                # Embedding provider changed since the set was stored
+                self.cold += 1
+                return None
+            similarity = float(np.dot(entry.query_embedding, query))
+            if similarity < self.threshold:
+                self.drifted += 1
+                return None
+            self._sets.move_to_end(key)
+            self.reused += 1
+            return entry, similarity
+
+    def store(self, user_id: str, session_id: str, query_embedding, chunks: List[str], vectors, index_version: str):
+        """Remember a freshly retrieved chunk set for the session."""
+        if self.max_sessions <= 0 or not chunks:
+            return
+        entry = RetrievedSet(
+            query_embedding=_unit(query_embedding),
+            chunks=list(chunks),
+            vectors=_unit(vectors),
+            index_version=index_version,
+            created_at=time.time()
+        )
+        key = self._key(user_id, session_id)
+        with self._lock:
+            self._sets[key] = entry
+            self._sets.move_to_end(key)
+            while len(self._sets) > self.max_sessions:
+                self._sets.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._sets.clear()
+
+    def get_stats(self) -> Dict[str, object]:
+        """Get reuse counters; reuse_rate is the share of lookups that skipped retrieval."""
+        with self._lock:
+            lookups = self.reused + self.drifted + self.cold
+            return {
+                "sessions": len(self._sets),
+                "threshold": self.threshold,
+                "reused": self.reused,
+                "drifted": self.drifted,
+                "cold": self.cold,
+                "reuse_rate": self.reused / lookups if lookups else 0.0,
+            }
+
+
+def rank_by_similarity(query_embedding, vectors) -> np.ndarray:
+    """Cosine similarity of each row of ``vectors`` to the query."""
+    return _unit(vectors) @ _unit(query_embedding)
@@ -0,0 +1,68 @@
+"""
+Singleflight for HanzlaGPT
+Coalesces identical concurrent async computations into a single in-flight task
+"""
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict
+from loguru import logger
+
+
+@dataclass
+class _Call:
+    """An in-flight computation and the number of callers awaiting it."""
+    task: "asyncio.Task[Any]"
+    waiters: int = 0
+
+
+class SingleFlight:
+    """Run at most one computation per key at a time.
+
+    The first caller for a key (the leader) starts the computation as a task; callers
+    that arrive while it is running await the same task. Every caller receives the
+    result, or the same exception if it fails. Cancelling one caller does not affect
+    the others; the shared task is only cancelled once every caller has gone away.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Return fn()'s result, sharing it with concurrent callers using the same key."""
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(task=asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task, key=key, call=call: self._forget(key, call))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+            logger.info(f"Coalesced request onto in-flight computation for key: {key[:80]}")
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Every caller was cancelled – nobody needs the result any more. Forget the key
+                # now, not when the task finishes cancelling, so a new caller starts afresh.
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+                call.task.cancel()
+
+    def _forget(self, key: str, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call.task.cancelled():
+            # Mark the exception as retrieved even if every caller had already left
+            call.task.exception()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get counts of leader computations and coalesced callers."""
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,74 @@
+"""
+Latency Sketch for HanzlaGPT
+Mergeable log-bucket quantile sketch with bounded relative error
+"""
+import math
+from typing import Dict, Iterable, Optional
+
+
+class LatencySketch:
+    """
+    Quantile sketch over positive values (DDSketch-style log buckets).
+
+    Each value v >= 1 falls into bucket ceil(log_gamma(v)), with gamma = (1 + a) / (1 - a),
+    so any reported quantile is within relative error ``a`` of a true sample. Values below 1
+    share bucket 0. Two sketches merge by adding bucket counts, which is what lets rollups
+    be combined across hours, intents, providers and workers.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, buckets: Optional[Dict[int, int]] = None):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = dict(buckets or {})
+
+    @property
+    def count(self) -> int:
+        return sum(self.buckets.values())
+
+    def bucket_index(self, value: float) -> int:
+        if value <= 1:
+            return 0
+        return int(math.ceil(math.log(value) / self._log_gamma))
+
+    def bucket_value(self, index: int) -> float:
+        """Representative value of a bucket (the midpoint that bounds relative error)."""
+        if index <= 0:
+            return 1.0
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def add(self, value: float, count: int = 1):
+        index = self.bucket_index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + count
+
+    def extend(self, values: Iterable[float]):
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "LatencySketch") -> "LatencySketch":
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate q-quantile (0 <= q <= 1), or None for an empty sketch."""
+        total = self.count
+        if total == 0:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return self.bucket_value(index)
+        return self.bucket_value(max(self.buckets))
+
+    def to_dict(self) -> Dict[str, int]:
+        """Bucket counts keyed by string index (JSON/JSONB friendly)."""
+        return {str(index): count for index, count in self.buckets.items()}
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, int]], relative_accuracy: float = 0.01) -> "LatencySketch":
+        return cls(relative_accuracy, {int(index): int(count) for index, count in (data or {}).items()})
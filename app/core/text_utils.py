@@ -0,0 +1,44 @@
+"""
+Text Utilities for HanzlaGPT
+Sentence splitting and keyword tokenization shared by local (non-LLM) text scoring
+"""
+import re
+from typing import List, Tuple
+
+STOPWORDS = frozenset("""
+a an and are as at be been but by can could did do does for from had has have how i if in into is it
+its me my of on or our so than that the their them then there these they this to was we were what when
+where which who why will with would you your about tell know any some more most also just please
+""".split())
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(\[])|\n+")
+_TOKEN = re.compile(r"[a-z0-9]+(?:\.[a-z0-9]+)*[+#]*")
+_LABEL = re.compile(r"^\[[A-Z_]+\]\s*")
+
+
+def strip_label(chunk: str) -> str:
+    """Drop the "[CATEGORY] " prefix cross-namespace search puts on chunks."""
+    return _LABEL.sub("", chunk.strip())
+
+
+def split_label(chunk: str) -> Tuple[str, str]:
+    """("[CATEGORY] ", body) for labelled chunks, ("", chunk) otherwise."""
+    chunk = chunk.strip()
+    match = _LABEL.match(chunk)
+    return (match.group(0), chunk[match.end():]) if match else ("", chunk)
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split prose into sentences; list bullets and headings count as their own sentences."""
+    sentences = []
+    for part in _SENTENCE_END.split(text):
+        part = part.strip().lstrip("-*•").strip()
+        if part:
+            sentences.append(part)
+    return sentences
+
+
+def tokenize(text: str, keep_stopwords: bool = False) -> List[str]:
+    """Lowercase word tokens (keeps terms like "c++", "node.js", "iso27001")."""
+    tokens = _TOKEN.findall(text.lower())
+    return tokens if keep_stopwords else [t for t in tokens if t not in STOPWORDS]
@@ -0,0 +1,181 @@
+"""
+Tokenization for HanzlaGPT
+Cached per-model tokenizers, context windows, ingestion-time chunk token counts
+and budgeted (knapsack) context packing
+"""
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence
+from loguru import logger
+from app.core.config import settings
+from app.core.text_utils import split_label
+
+DEFAULT_MODEL = "gpt-4o-mini"
+DEFAULT_ENCODING = "cl100k_base"
+WORD_ESTIMATE = "words"
+DEFAULT_CONTEXT_WINDOW = 4096
+
+# Prefix -> context window, checked longest prefix first
+CONTEXT_WINDOWS: Dict[str, int] = {
+    "gpt-4o": 128000,
+    "gpt-4-turbo": 128000,
+    "gpt-4.1": 1047576,
+    "gpt-4": 8192,
+    "gpt-3.5-turbo": 16385,
+    "llama3-70b-8192": 8192,
+    "llama3-8b-8192": 8192,
+    "llama-3.1": 131072,
+    "mixtral-8x7b-32768": 32768,
+    "gemma": 8192,
+    "meta-llama/Llama-2": 4096,
+    "meta/llama-2": 4096,
+    "llama2": 4096,
+}
+
+# Knapsack capacities above this are solved in coarser token units
+MAX_PACK_UNITS = 2048
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~0.75 words per token) when no tokenizer is available."""
+    return max(1, round(len(text.split()) / 0.75)) if text.strip() else 0
+
+
+@lru_cache(maxsize=32)
+def get_encoding(model: str):
+    """tiktoken encoding for the model, cached per model (failures included, so a missing
+    BPE file is not re-fetched per call); non-OpenAI models use cl100k_base as a proxy."""
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception as e:
+        logger.warning(f"No tokenizer for {model}, estimating tokens from words: {e}")
+        return None
+
+
+def active_model() -> str:
+    """Model name of the current chat provider (without triggering provider selection)."""
+    from app.core.llm_providers import provider_manager
+    provider = provider_manager.current_chat_provider
+    return getattr(provider, "model_name", None) or settings.OPENAI_MODEL_NAME or DEFAULT_MODEL
+
+
+def encoding_name(model: Optional[str] = None) -> str:
+    encoding = get_encoding(model or active_model())
+    return encoding.name if encoding is not None else WORD_ESTIMATE
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    encoding = get_encoding(model or active_model())
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def context_window(model: Optional[str] = None) -> int:
+    model = model or active_model()
+    for prefix in sorted(CONTEXT_WINDOWS, key=len, reverse=True):
+        if model.startswith(prefix):
+            return CONTEXT_WINDOWS[prefix]
+    return DEFAULT_CONTEXT_WINDOW
+
+
+def context_budget(model: Optional[str] = None) -> int:
+    """Tokens available for retrieved context: the configured budget, capped by what the
+    model's window leaves after the prompt template and the answer."""
+    room = context_window(model) - settings.CONTEXT_RESERVED_TOKENS
+    return max(0, min(settings.CONTEXT_TOKEN_BUDGET, room))
+
+
+def token_metadata(text: str, model: Optional[str] = None) -> Dict[str, object]:
+    """Chunk metadata recorded at ingestion so retrieval does not re-tokenize."""
+    return {"token_count": count_tokens(text, model), "token_encoding": encoding_name(model)}
+
+
+class ChunkTokenCounts:
+    """Bounded memo of chunk token counts per encoding, seeded from Pinecone metadata."""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._counts: "OrderedDict[tuple, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def remember(self, text: str, metadata: Optional[Dict]) -> None:
+        """Record the ingestion-time count carried in a match's metadata."""
+        if not text or not metadata or "token_count" not in metadata:
+            return
+        self._store((metadata.get("token_encoding", DEFAULT_ENCODING), text), int(metadata["token_count"]))
+
+    def count(self, chunk: str, model: Optional[str] = None) -> int:
+        """Tokens in a chunk; the "[CATEGORY] " label is counted separately so labelled chunks hit too."""
+        model = model or active_model()
+        label, body = split_label(chunk)
+        key = (encoding_name(model), body)
+        with self._lock:
+            tokens = self._counts.get(key)
+            if tokens is not None:
+                self._counts.move_to_end(key)
+                self.hits += 1
+        if tokens is None:
+            tokens = count_tokens(body, model)
+            self._store(key, tokens)
+            with self._lock:
+                self.misses += 1
+        return tokens + (count_tokens(label, model) if label else 0)
+
+    def _store(self, key: tuple, tokens: int) -> None:
+        with self._lock:
+            self._counts[key] = tokens
+            self._counts.move_to_end(key)
+            while len(self._counts) > self.max_entries:
+                self._counts.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, object]:
+        total = self.hits + self.misses
+        return {"entries": len(self._counts), "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0}
+
+
+def pack_chunks(chunks: Sequence[str], budget: int, count: Callable[[str], int],
+                scores: Optional[Sequence[float]] = None) -> List[str]:
+    """Best-value subset of chunks within the token budget (0/1 knapsack), in ranked order.
+
+    Values are the chunk scores, or reciprocal rank when the chunks are only ordered.
+    The top chunk is always kept (as the old greedy loop did), even when it alone
+    exceeds the budget.
+    """
+    if not chunks:
+        return []
+    costs = [count(c) for c in chunks]
+    values = list(scores) if scores is not None else [1.0 / (rank + 1) for rank in range(len(chunks))]
+    remaining = budget - costs[0]
+    if remaining <= 0:
+        return [chunks[0]]
+    # Coarser units for large budgets; costs round up so the packed set never overflows
+    unit = -(-remaining // MAX_PACK_UNITS)
+    capacity = remaining // unit
+    weights = [-(-c // unit) for c in costs]
+    best = [0.0] * (capacity + 1)
+    took = [[False] * (capacity + 1) for _ in chunks]
+    for i in range(1, len(chunks)):
+        w, v = weights[i], max(values[i], 0.0)
+        for c in range(capacity, w - 1, -1):
+            if best[c - w] + v > best[c]:
+                best[c] = best[c - w] + v
+                took[i][c] = True
+    picked, c = [0], capacity
+    for i in range(len(chunks) - 1, 0, -1):
+        if took[i][c]:
+            picked.append(i)
+            c -= weights[i]
+    return [chunks[i] for i in sorted(picked)]
+
+
+# Global instance
+chunk_token_counts = ChunkTokenCounts()
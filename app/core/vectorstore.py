@@ -4,14 +4,51 @@ from loguru import logger
 from langchain_pinecone import PineconeVectorStore
 from app.core.config import settings
 from app.core.llm_providers import provider_manager
+from app.core.index_version import bump_index_version
+from app.core.tokenization import chunk_token_counts
 
 # Self-query dependencies must be imported before they are used
 from langchain.retrievers.self_query.base import SelfQueryRetriever
 from langchain_community.query_constructors.pinecone import PineconeTranslator
 from langchain.chains.query_constructor.schema import AttributeInfo
 
+import threading
 import pinecone
 
+_pinecone_index = None
+_pinecone_lock = threading.Lock()
+
+
+def get_pinecone_index():
+    """Return the shared Pinecone index handle, creating the client once per process."""
+    global _pinecone_index
+    if _pinecone_index is None:
+        with _pinecone_lock:
+            if _pinecone_index is None:
+                pc = pinecone.Pinecone(
+                    api_key=settings.PINECONE_API_KEY,
+                    environment=settings.PINECONE_ENV
+                )
+                _pinecone_index = pc.Index(settings.PINECONE_INDEX)
+    return _pinecone_index
+
+
+def query_namespace(namespace: str, vector: List[float], top_k: int, include_values: bool = False) -> List[Any]:
+    """Query one namespace with a precomputed embedding and return the raw matches."""
+    response = get_pinecone_index().query(
+        vector=vector,
+        top_k=top_k,
+        namespace=namespace,
+        include_metadata=True,
+        include_values=include_values
+    )
+    matches = response.matches or []
+    for match in matches:
+        # Ingestion-time token counts, so packing the prompt does not re-tokenize these chunks
+        metadata = match.metadata or {}
+        chunk_token_counts.remember(metadata.get('text', ''), metadata)
+    return matches
+
 # -------------------- Self-Query Retriever helpers --------------------
 
 # Describe our metadata schema so the LLM can formulate filters.
@@ -130,6 +167,7 @@ def get_namespaced_vector_store(category: str) -> Optional[PineconeVectorStore]:
 def search_across_namespaces(query: str, categories: List[str] = None, 
                            top_k: int = 5) -> List[Dict[str, Any]]:
     """Search across multiple namespaces and return combined results."""
+    route = categories is None
     if categories is None:
         # Default categories for comprehensive search
         categories = ['cybersecurity', 'ai_ml', 'projects', 'background', 
@@ -147,14 +185,13 @@ def search_across_namespaces(query: str, categories: List[str] = None,
         
         # Generate query embedding
         query_embedding = embeddings.embed_query(query)
+        if route:
+            # Only search the namespaces the query is likely to be answered from
+            from app.core.namespace_router import route_namespaces
+            categories = route_namespaces(query_embedding, categories)
         
         # Use raw Pinecone query instead of LangChain similarity_search
-        import pinecone
-        pc = pinecone.Pinecone(
-            api_key=settings.PINECONE_API_KEY,
-            environment=settings.PINECONE_ENV
-        )
-        index = pc.Index(settings.PINECONE_INDEX)
+        index = get_pinecone_index()
         
         for category in categories:
             try:
@@ -209,12 +246,7 @@ def get_category_specific_context(query: str, category: str, top_k: int = 3) ->
         query_embedding = embeddings.embed_query(query)
         
         # Use raw Pinecone query instead of LangChain similarity_search
-        import pinecone
-        pc = pinecone.Pinecone(
-            api_key=settings.PINECONE_API_KEY,
-            environment=settings.PINECONE_ENV
-        )
-        index = pc.Index(settings.PINECONE_INDEX)
+        index = get_pinecone_index()
         
         # Query the specific namespace
         query_response = index.query(
@@ -237,13 +269,9 @@ def get_category_specific_context(query: str, category: str, top_k: int = 3) ->
 def clear_namespace(namespace: str) -> bool:
     """Clear all vectors from a specific namespace."""
     try:
-        pc = pinecone.Pinecone(
-            api_key=settings.PINECONE_API_KEY,
-            environment=settings.PINECONE_ENV
-        )
-        
-        index = pc.Index(settings.PINECONE_INDEX)
+        index = get_pinecone_index()
         index.delete(namespace=namespace, delete_all=True)
+        bump_index_version(f"cleared namespace {namespace}")
         
         logger.info(f"Successfully cleared namespace: {namespace}")
         return True
@@ -255,12 +283,7 @@ def clear_namespace(namespace: str) -> bool:
 def get_namespace_stats() -> Dict[str, int]:
     """Get statistics about vectors in each namespace."""
     try:
-        pc = pinecone.Pinecone(
-            api_key=settings.PINECONE_API_KEY,
-            environment=settings.PINECONE_ENV
-        )
-        
-        index = pc.Index(settings.PINECONE_INDEX)
+        index = get_pinecone_index()
         stats = index.describe_index_stats()
         
         namespace_counts = stats.get('namespaces', {})
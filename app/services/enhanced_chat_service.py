@@ -7,14 +7,34 @@ import json
 import time
 import asyncio
 from typing import Optional, Dict, Any, List, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict, replace
 from enum import Enum
 from datetime import datetime
 from loguru import logger
 import pickle
-from app.core.vectorstore import get_category_specific_context, smart_retrieve
+from app.core.vectorstore import get_category_specific_context, smart_retrieve, query_namespace
+from app.core.namespace_router import namespace_router, route_namespaces
 from app.core.llm_providers import provider_manager
 from app.core.provider_router import provider_router
+from app.core.intent_cache import intent_cache, normalize_query
+from app.core.index_version import get_index_version
+from app.core.cache import create_cache_backend
+from app.core.semantic_cache import SemanticCache
+from app.core.singleflight import SingleFlight
+from app.core.session_retrieval import SessionRetrievalCache, rank_by_similarity
+from app.core.relevance_gate import RERANK_SCORE, relevance_gate, no_information_answer
+from app.core.circuit_breaker import llm_circuit
+from app.core.executors import ExecutorSaturated, db_executor, get_executor_stats, llm_executor, vector_executor
+from app.core.llm_scheduler import SchedulerTimeout, llm_scheduler
+from app.core.extractive import extractive_answer
+from app.core.context_selection import select_context
+from app.core.context_compression import compress_context
+from app.core.tokenization import active_model, chunk_token_counts, context_budget, count_tokens, pack_chunks
+from app.core.retrieval_plans import select_plan
+from app.core.project_catalog import project_catalog
+from app.core.rate_limiter import RateLimitDecision, create_rate_limiter
+from app.core.config import settings
+from app.templates.prompt_loader import prompt_version
 from app.templates.enhanced_prompts import (
     ENHANCED_INTENT_ROUTING_PROMPT as INTENT_ROUTING_PROMPT,
     ENHANCED_RAG_PROMPT as RAG_PROMPT,
@@ -27,8 +47,11 @@ from app.templates.enhanced_prompts import (
 import os
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse
-from app.core.database import get_chat_history, log_chat
-import tiktoken
+from app.core.chat_logger import chat_log_writer
+from app.core.session_history import session_history
+
+# Cached intent results are only valid for the prompt/classifier that produced them
+INTENT_CACHE_VERSION = prompt_version(INTENT_ROUTING_PROMPT, settings.INTENT_CLASSIFIER_VERSION)
 
 class IntentType(Enum):
     """Enum for different intent types."""
@@ -42,6 +65,18 @@ class IntentType(Enum):
     GREETING = "greeting"
     UNKNOWN = "unknown"
 
+# Intents whose answers depend on the user's own conversation and must never be shared
+PERSONAL_INTENTS = {IntentType.USER_INFO, IntentType.USER_LAST_QUESTION}
+
+# Prompt used to answer each intent (anything else uses SYSTEM_PROMPT)
+PROMPT_MAPPING = {
+    IntentType.CAREER_GUIDANCE: CAREER_PROMPT,
+    IntentType.AI_ADVICE: AI_PROMPT,
+    IntentType.CYBERSECURITY_ADVICE: CYBER_PROMPT,
+    IntentType.PERSONAL_INFO: PERSONAL_PROMPT,
+    IntentType.GENERAL_RAG: RAG_PROMPT
+}
+
 @dataclass
 class ChatContext:
     """Context for chat interactions."""
@@ -71,29 +106,77 @@ class ChatResponse:
 class EnhancedChatService:
     """Enhanced chat service with professional features.
 
-    Uses a simple in-memory cache for chat responses. The cache key is based on user_id, session_id, and query.
+    Uses a pluggable bounded LRU/TTL cache for chat responses (in-process, or shared across
+    workers via SQLite/Redis). The cache key is based on the normalized query, intent, prompt
+    version and vector index version; only personal intents are scoped to user_id/session_id.
     """
     
     def __init__(self):
         self.max_retries = 3
         self.timeout_seconds = 30
         self.max_context_length = 4000
-        self.cache = {}  # Simple in-memory cache
-        self.user_query_counts = {}
-        self.max_queries_per_user = 3
-        # NOTE: For production/distributed deployments, replace this with a persistent store (e.g., Redis) for rate limiting.
+        self.cache = create_cache_backend()
+        self.semantic_cache = SemanticCache(
+            capacity=settings.SEMANTIC_CACHE_CAPACITY if settings.SEMANTIC_CACHE_ENABLED else 0,
+            threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+            disabled_intents=[i.strip() for i in settings.SEMANTIC_CACHE_DISABLED_INTENTS.split(",") if i.strip()]
+        )
+        # Coalesces identical in-flight pipelines (and intent classifications)
+        self._inflight = SingleFlight()
+        self.session_retrieval = SessionRetrievalCache(
+            threshold=settings.SESSION_RETRIEVAL_REUSE_THRESHOLD,
+            ttl_seconds=settings.SESSION_RETRIEVAL_TTL_SECONDS,
+            max_sessions=settings.SESSION_RETRIEVAL_MAX_SESSIONS
+        )
+        self.rate_limiter = create_rate_limiter() if settings.RATE_LIMIT_ENABLED else None
+        # Extractive answers served instead of an LLM call, by reason
+        self.degraded_responses: Dict[str, int] = {}
     
-    def _cache_key(self, user_id: str, session_id: str, query: str) -> str:
+    def _cache_scope(self, intent: IntentType, user_id: str, session_id: str) -> str:
+        """
+        Build the part of the cache key that decides which answers may be reused.
+
+        Answers for non-personal intents are shared across users. The scope embeds the prompt
+        and vector index versions, so editing a prompt or re-ingesting data invalidates
+        previously cached answers without an explicit flush.
+        """
+        if intent in PERSONAL_INTENTS:
+            scope = f"user:{user_id}:{session_id}"
+        else:
+            scope = "shared"
+        prompt_ver = prompt_version(PROMPT_MAPPING.get(intent, SYSTEM_PROMPT))
+        return f"{scope}:{intent.value}:{prompt_ver}:{get_index_version()}"
+
+    def _cache_key(self, query: str, intent: IntentType, user_id: str, session_id: str) -> str:
         """
         Generate a cache key for a chat response.
         Args:
+            query: The user's query string.
+            intent: Detected intent of the query.
             user_id: The user's unique identifier.
             session_id: The session identifier.
-            query: The user's query string.
         Returns:
             A string key for cache storage.
         """
-        return f"chat_cache:{user_id}:{session_id}:{query.lower().strip()}"
+        return f"chat_cache:{self._cache_scope(intent, user_id, session_id)}:{normalize_query(query)}"
+
+    async def check_rate_limit(self, user_id: str, session_id: str, client_ip: Optional[str] = None) -> RateLimitDecision:
+        """
+        Admit or reject a chat query under the per-user and per-IP limits.
+        Args:
+            user_id: User identifier (falls back to the session when missing).
+            session_id: Session identifier.
+            client_ip: Client address, if known.
+        Returns:
+            RateLimitDecision; use decision.headers() for the response.
+        """
+        if self.rate_limiter is None:
+            return RateLimitDecision(allowed=True)
+        user_key = user_id or session_id or 'anonymous'
+        if self.rate_limiter.store.blocking:
+            # Shared stores take a write lock; ExecutorSaturated sheds the request with a 503
+            return await db_executor.run(self.rate_limiter.check, user_key, client_ip)
+        return self.rate_limiter.check(user_key, client_ip)
 
     async def process_chat_query(
         self, 
@@ -104,7 +187,7 @@ class EnhancedChatService:
     ) -> 'ChatResponse':
         """
         Process a chat query with enhanced error handling and features.
-        Checks the in-memory cache for a previous response. If not found, processes the query and stores the result in the cache.
+        Checks the response cache for a previous response. If not found, processes the query and stores the result in the cache.
         Args:
             query: User's query.
             user_id: User identifier.
@@ -115,104 +198,31 @@ class EnhancedChatService:
         """
         start_time = time.time()
         try:
-            # Use user_id if available, else session_id
-            user_key = user_id or session_id or 'anonymous'
-            count = self.user_query_counts.get(user_key, 0)
-            if count >= self.max_queries_per_user:
-                # Return a user-friendly error JSON for frontend display
-                return JSONResponse(
-                    status_code=429,
-                    content={
-                        "error": "Query limit reached",
-                        "detail": f"You have reached the maximum of {self.max_queries_per_user} free queries. Please contact the site owner for more access."
-                    }
-                )
-            self.user_query_counts[user_key] = count + 1
-
-            cache_key = self._cache_key(user_id, session_id, query)
-            if use_cache and cache_key in self.cache:
-                cached_response = self.cache[cache_key]
-                logger.info(f"Cache hit for query: {query[:50]}...")
-                return cached_response
-            # Step 1: Intent Detection
+            # Step 1: Intent Detection (cheap when the intent cache hits)
             intent_result = await self._detect_intent_async(query)
             intent = IntentType(intent_result.get("intent", "unknown"))
             confidence = intent_result.get("confidence", 0.5)
-            # Step 2: Context Retrieval
-            context_chunks = await self._retrieve_context_async(query, intent)
-            # Re-rank context chunks by semantic similarity
-            try:
-                from app.core.llm_providers import provider_manager
-                embeddings = provider_manager.get_embeddings()
-                if embeddings:
-                    query_emb = embeddings.embed_query(query)
-                    chunk_scores = []
-                    for chunk in context_chunks:
-                        chunk_emb = embeddings.embed_query(chunk)
-                        score = self._cosine_similarity(query_emb, chunk_emb)
-                        chunk_scores.append((chunk, score))
-                    # Sort by similarity (descending)
-                    chunk_scores.sort(key=lambda x: -x[1])
-                    context_chunks = [c for c, s in chunk_scores]
-            except Exception as e:
-                logger.warning(f"Could not re-rank context chunks by similarity: {e}")
-            # Token-based context limiting (as before)
-            token_budget = 1200
-            model_name = "gpt-4o-mini"  # Or fetch from settings if dynamic
-            selected_chunks = []
-            total_tokens = 0
-            for chunk in context_chunks:
-                chunk_tokens = self._count_tokens(chunk, model=model_name)
-                if total_tokens + chunk_tokens > token_budget:
-                    break
-                selected_chunks.append(chunk)
-                total_tokens += chunk_tokens
-            if not selected_chunks:
-                # fallback to at least one chunk if available
-                selected_chunks = context_chunks[:1]
-            context_chunks = selected_chunks    
-            # Step 3: Response Generation
-            response = await self._generate_response_async(
-                query=query,
-                intent=intent,
-                context_chunks=context_chunks,
-                user_id=user_id,
-                session_id=session_id
-            )
-            # Step 4: Provider Information
-            provider = self._get_provider_info(user_id, session_id)
-            logger.info(f"[LLM] Provider used for query '{query}': {provider}")
-            # Step 5: Calculate timing
+            chat_response = await self._answer(query, intent, confidence, user_id, session_id, use_cache)
+            # Timing is per request (a coalesced request may have waited less than the leader)
             response_time_ms = int((time.time() - start_time) * 1000)
-            # Create response object
-            chat_response = ChatResponse(
-                response=response,
+            chat_response = replace(chat_response, response_time_ms=response_time_ms)
+            response = chat_response.response
+            
+            # Queue chat history for the background writer (no database round trip here)
+            if not chat_log_writer.log(
+                user_id=user_id or "anonymous",
+                session_id=session_id or "default",
+                query=query,
+                answer=response,
                 intent=intent.value,
-                confidence=confidence,
                 response_time_ms=response_time_ms,
-                sources=self._extract_sources(context_chunks),
-                provider=provider,
-                context_used=len(context_chunks) > 0
-            )
+                provider=chat_response.provider
+            ):
+                logger.warning(f"Failed to log chat history for user {user_id}, session {session_id}")
             
-            # Log chat history to database
-            try:
-                log_chat(
-                    user_id=user_id or "anonymous",
-                    session_id=session_id or "default",
-                    query=query,
-                    answer=response,
-                    intent=intent.value,
-                    response_time_ms=response_time_ms
-                )
-                logger.info(f"Chat history logged for user {user_id}, session {session_id}")
-            except Exception as e:
-                logger.warning(f"Failed to log chat history: {e}")
-            
-            # Cache the response in memory
-            if use_cache:
-                self.cache[cache_key] = chat_response
             return chat_response
+        except ExecutorSaturated:
+            raise
         except Exception as e:
             logger.error(f"Error processing chat query: {str(e)}")
             return ChatResponse(
@@ -226,8 +236,242 @@ class EnhancedChatService:
                 error=str(e)
             )
     
+    async def _cache_get(self, key: str) -> Optional[Any]:
+        """Response cache lookup; shared backends do I/O, so they run on the DB executor."""
+        if not self.cache.blocking:
+            return self.cache.get(key)
+        try:
+            return await db_executor.run(self.cache.get, key)
+        except ExecutorSaturated:
+            # The cache is an optimisation: a full DB queue means a miss, not a 503
+            return None
+
+    async def _cache_set(self, key: str, value: Any):
+        if not self.cache.blocking:
+            self.cache.set(key, value)
+            return
+        try:
+            await db_executor.run(self.cache.set, key, value)
+        except ExecutorSaturated:
+            logger.warning(f"DB executor saturated, not caching response for key: {key[:60]}")
+
+    async def _answer(
+        self,
+        query: str,
+        intent: IntentType,
+        confidence: float,
+        user_id: str,
+        session_id: str,
+        use_cache: bool
+    ) -> 'ChatResponse':
+        """Answer from session history, the exact or semantic cache, or the full pipeline."""
+        if intent == IntentType.USER_LAST_QUESTION:
+            # Depends on the conversation so far, so it is never cached
+            return await self._answer_last_question(user_id, session_id, confidence)
+        cache_scope = self._cache_scope(intent, user_id, session_id)
+        cache_key = self._cache_key(query, intent, user_id, session_id)
+        if use_cache:
+            cached_response = await self._cache_get(cache_key)
+            if cached_response is not None:
+                logger.info(f"Cache hit for query: {query[:50]}...")
+                return ChatResponse(**cached_response)
+        # Step 1b: Semantic cache – reuse the answer to a paraphrase of this question
+        query_embedding = None
+        if use_cache and self.semantic_cache.is_enabled_for(intent.value):
+            query_embedding = await vector_executor.run(self._embed_query, query)
+            if query_embedding is not None:
+                hit = self.semantic_cache.lookup(query_embedding, cache_scope, intent.value)
+                if hit:
+                    logger.info(f"Semantic cache hit (similarity {hit.similarity:.3f}): '{query[:50]}' ~ '{hit.entry.query[:50]}'")
+                    return ChatResponse(**hit.entry.value)
+        # Steps 2-5 run once per distinct question: identical concurrent requests
+        # await the same in-flight computation instead of starting their own
+        session = (user_id, session_id)
+
+        async def run_pipeline():
+            response, reused = await self._run_pipeline(
+                query=query,
+                intent=intent,
+                confidence=confidence,
+                user_id=user_id,
+                session_id=session_id,
+                cache_key=cache_key,
+                cache_scope=cache_scope,
+                query_embedding=query_embedding,
+                use_cache=use_cache
+            )
+            return response, reused, session
+        if use_cache:
+            response, reused, leader = await self._inflight.do(cache_key, run_pipeline)
+            if not reused or leader == session:
+                return response
+            # The leader answered from its own session's earlier retrieval, which may depend
+            # on that conversation, so this request is answered from a retrieval of its own
+            logger.info(f"Not sharing a session-context answer across sessions for: {query[:50]}...")
+        response, _, _ = await run_pipeline()
+        return response
+
+    async def _answer_last_question(self, user_id: str, session_id: str, confidence: float) -> 'ChatResponse':
+        """Answer "what was my last question" from the session ring buffer."""
+        # Turns are recorded after answering, so the newest one is the previous question
+        history = await session_history.recent_async(user_id or "anonymous", session_id or "default", limit=1)
+        if history and history[0].get("query"):
+            response = f"Your last question was: '{history[0]['query']}'"
+        else:
+            response = "I couldn't find your previous question in this session."
+        return ChatResponse(
+            response=response,
+            intent=IntentType.USER_LAST_QUESTION.value,
+            confidence=confidence,
+            response_time_ms=0,
+            sources=[],
+            provider="session history",
+            context_used=False
+        )
+
+    async def _run_pipeline(
+        self,
+        query: str,
+        intent: IntentType,
+        confidence: float,
+        user_id: str,
+        session_id: str,
+        cache_key: str,
+        cache_scope: str,
+        query_embedding: Optional[List[float]],
+        use_cache: bool
+    ) -> Tuple['ChatResponse', bool]:
+        """
+        Run retrieval, re-ranking and generation for a query and cache the result.
+        Returns (response, reused) where reused means the answer was built on the session's
+        previous retrieval. Exceptions propagate to every request coalesced onto this computation.
+        """
+        pipeline_start = time.time()
+        # Step 2: Context Retrieval (reusing the session's previous set for close follow-ups)
+        if query_embedding is None:
+            query_embedding = await vector_executor.run(self._embed_query, query)
+        # Generic "what projects" questions are answered from the whole in-memory catalog
+        catalog = project_catalog.render() if select_plan(query).name == "project_overview" else ""
+        if catalog:
+            logger.info("[RAG] Served project overview from the project catalog")
+            context_chunks, reused, best_score = [catalog], False, None
+        else:
+            context_chunks, reused, best_score = await self._retrieve_for_session(
+                query, intent, user_id, session_id, query_embedding
+            )
+        model_name = active_model()
+        overview = bool(catalog)
+        if not overview:
+            # Keep only the sentences that bear on the question so more chunks fit the budget
+            context_chunks = await vector_executor.run(
+                compress_context, query, context_chunks,
+                lambda text: count_tokens(text, model_name),
+                query_embedding, self._embed_documents
+            )
+        # Best-ranked subset that fits the active model's context budget
+        context_chunks = pack_chunks(
+            context_chunks, context_budget(model_name), lambda chunk: chunk_token_counts.count(chunk, model_name)
+        )
+        # Step 3: Response Generation, unless nothing retrieved is relevant enough to answer from
+        # (catalog-served project overviews always are)
+        gated = (not reused and not overview
+                 and relevance_gate.should_skip_llm(intent.value, best_score, RERANK_SCORE, query))
+        reason = None if gated else self._degraded_reason()
+        if gated:
+            response = no_information_answer(query, intent.value)
+            provider = "knowledge base"
+            context_chunks = []
+            degraded = False
+        elif reason:
+            # Providers failing: grounded extractive answer instead of an LLM call
+            response = await vector_executor.run(self._degraded_answer, intent, query, context_chunks, query_embedding, reason)
+            provider, degraded = "extractive", True
+        else:
+            response, degraded = await self._generate_response_async(
+                query=query,
+                intent=intent,
+                context_chunks=context_chunks,
+                user_id=user_id,
+                session_id=session_id,
+                query_embedding=query_embedding
+            )
+            # Step 4: Provider Information
+            provider = "extractive" if degraded else self._get_provider_info(user_id, session_id)
+        logger.info(f"[LLM] Provider used for query '{query}': {provider}")
+        # Step 5: Calculate timing
+        response_time_ms = int((time.time() - pipeline_start) * 1000)
+        # Create response object
+        chat_response = ChatResponse(
+            response=response,
+            intent=intent.value,
+            confidence=confidence,
+            response_time_ms=response_time_ms,
+            sources=self._extract_sources(context_chunks),
+            provider=provider,
+            context_used=len(context_chunks) > 0
+        )
+        
+        # Cache the response (answers built on a reused session context may depend on
+        # earlier turns, so they are not shared; degraded answers must not outlive the outage)
+        if use_cache and not reused and not degraded:
+            await self._cache_set(cache_key, asdict(chat_response))
+            if query_embedding is not None and self.semantic_cache.is_enabled_for(intent.value):
+                self.semantic_cache.add(query_embedding, cache_scope, intent.value, query, asdict(chat_response))
+        return chat_response, reused
+    
+    async def _retrieve_for_session(
+        self,
+        query: str,
+        intent: IntentType,
+        user_id: str,
+        session_id: str,
+        query_embedding: Optional[List[float]]
+    ) -> Tuple[List[str], bool, Optional[float]]:
+        """
+        Retrieve the context chunks selected for the query (adaptive top-k, then MMR).
+        Returns (chunks, reused, best_score) where reused means the session's previous set was
+        re-ranked instead of running a fresh retrieval, and best_score is the highest chunk
+        similarity to the query (0.0 if nothing was found, None if it could not be scored).
+        """
+        if query_embedding is None:
+            # No embeddings available: plain retrieval, no re-ranking
+            return await self._retrieve_context_async(query, intent), False, None
+        index_version = get_index_version()
+        hit = self.session_retrieval.lookup(user_id, session_id, query_embedding, index_version)
+        if hit:
+            retrieved, similarity = hit
+            logger.info(f"[RAG] Reusing session retrieval ({len(retrieved.chunks)} chunks, similarity {similarity:.3f})")
+            chunks, vectors, reused = retrieved.chunks, retrieved.vectors, True
+        else:
+            chunks = await self._retrieve_context_async(query, intent, query_embedding)
+            vectors = await vector_executor.run(self._embed_documents, chunks) if chunks else None
+            reused = False
+            if vectors is not None:
+                self.session_retrieval.store(user_id, session_id, query_embedding, chunks, vectors, index_version)
+        if not chunks:
+            return [], reused, 0.0
+        if vectors is None:
+            return chunks, reused, None
+        try:
+            best_score = float(rank_by_similarity(query_embedding, vectors).max())
+            # Drop hits past the score fall-off, then relevant but non-redundant chunks first
+            return select_context(chunks, vectors, query_embedding, intent.value), reused, best_score
+        except Exception as e:
+            logger.warning(f"Could not re-rank context chunks by similarity: {e}")
+            return chunks, reused, None
+
     async def _detect_intent_async(self, query: str) -> Dict[str, Any]:
-        """Detect intent asynchronously with retry logic."""
+        """Detect intent asynchronously, using the shared intent cache and coalescing concurrent lookups."""
+        cached = intent_cache.get(query, INTENT_CACHE_VERSION)
+        if cached is not None:
+            logger.info(f"Intent cache hit: {cached.get('intent')} for query: {query[:50]}...")
+            return cached
+        intent_key = f"intent:{INTENT_CACHE_VERSION}:{normalize_query(query)}"
+        intent_result = await self._inflight.do(intent_key, lambda: self._classify_intent_async(query))
+        return dict(intent_result)
+    
+    async def _classify_intent_async(self, query: str) -> Dict[str, Any]:
+        """Classify intent with the LLM with retry logic."""
         for attempt in range(self.max_retries):
             try:
                 # Get LLM for intent detection
@@ -238,17 +482,22 @@ class EnhancedChatService:
                 # Create intent chain
                 intent_chain = INTENT_ROUTING_PROMPT | llm
                 
-                # Execute with timeout
-                result = await asyncio.wait_for(
-                    asyncio.to_thread(intent_chain.invoke, {"query": query}),
-                    timeout=self.timeout_seconds
-                )
+                # Execute with timeout (the slot stays taken until the call itself ends)
+                result = await llm_scheduler.run(llm_executor, intent_chain.invoke, {"query": query},
+                                                 timeout=self.timeout_seconds)
                 
-                # Parse result
-                intent_result = self._parse_intent_result(result)
+                # Parse result; only LLM-produced classifications are worth caching
+                intent_result = self._parse_intent_json(result)
+                if intent_result is not None:
+                    intent_cache.set(query, INTENT_CACHE_VERSION, intent_result)
+                else:
+                    intent_result = self._parse_intent_result(result)
                 logger.info(f"Intent detected: {intent_result.get('intent')} (confidence: {intent_result.get('confidence')})")
                 return intent_result
                 
+            except SchedulerTimeout:
+                # Retrying would only wait in the same queue again
+                return self._fallback_intent_detection(query)
             except asyncio.TimeoutError:
                 logger.warning(f"Intent detection timeout on attempt {attempt + 1}")
                 if attempt == self.max_retries - 1:
@@ -260,6 +509,19 @@ class EnhancedChatService:
         
         return self._fallback_intent_detection(query)
     
+    def _parse_intent_json(self, result) -> Optional[Dict[str, Any]]:
+        """Return the intent result if the LLM produced a valid JSON classification, else None."""
+        content = result.content if hasattr(result, 'content') else str(result)
+        try:
+            intent_result = json.loads(content)
+        except (json.JSONDecodeError, TypeError):
+            return None
+        if not isinstance(intent_result, dict):
+            return None
+        if intent_result.get("intent") not in {intent.value for intent in IntentType}:
+            return None
+        return intent_result
+    
     def _parse_intent_result(self, result) -> Dict[str, Any]:
         """Parse intent detection result with error handling."""
         try:
@@ -322,7 +584,8 @@ class EnhancedChatService:
             "confidence": 0.6
         }
     
-    async def _retrieve_context_async(self, query: str, intent: IntentType) -> List[str]:
+    async def _retrieve_context_async(self, query: str, intent: IntentType,
+                                      query_embedding: Optional[List[float]] = None) -> List[str]:
         """Retrieve context asynchronously with namespace optimization."""
         try:
             # Tuned namespace mapping
@@ -335,19 +598,34 @@ class EnhancedChatService:
             }
             logger.info(f"[RAG] Query: '{query}' | Intent: {intent.value} | Target namespaces: {namespace_mapping.get(intent, ['background', 'projects'])}")
             # Use new metadata-aware retriever
-            context_chunks = smart_retrieve(query, top_k=8)
+            # Over-fetch when adaptive top-k / MMR pick the subset afterwards
+            fetch_k = settings.MMR_FETCH_K if settings.MMR_ENABLED or settings.ADAPTIVE_TOP_K_ENABLED else 8
+            context_chunks = await vector_executor.run(smart_retrieve, query, top_k=fetch_k)
             # If still empty, fallback to old per-namespace logic
             if not context_chunks:
                 target_namespaces = namespace_mapping.get(intent, ["background", "projects"])
+                if query_embedding is None:
+                    query_embedding = await vector_executor.run(self._embed_query, query)
+                if query_embedding is not None:
+                    target_namespaces = route_namespaces(query_embedding, target_namespaces)
                 for ns in target_namespaces:
                     try:
                         logger.info(f"[RAG] Fallback: Querying namespace '{ns}' for query '{query}'")
-                        chunks = get_category_specific_context(query, ns, top_k=2)
+                        if query_embedding is not None:
+                            matches = await vector_executor.run(query_namespace, ns, query_embedding, 2)
+                            chunks = [m.metadata.get('text', '') for m in matches if m.metadata.get('text')]
+                        else:
+                            chunks = get_category_specific_context(query, ns, top_k=2)
                         context_chunks.extend(chunks)
+                    except ExecutorSaturated:
+                        raise
                     except Exception:
                         continue
             logger.info(f"[RAG] Context chunks retrieved: {len(context_chunks)}")
-            return context_chunks[:8]
+            return context_chunks[:fetch_k]
+        except ExecutorSaturated:
+            # Shed the request rather than answer from an empty context
+            raise
         except Exception as e:
             logger.error(f"Error retrieving context: {str(e)}")
             return []
@@ -358,23 +636,26 @@ class EnhancedChatService:
         intent: IntentType, 
         context_chunks: List[str], 
         user_id: str, 
-        session_id: str
-    ) -> str:
-        """Generate response asynchronously with intent-specific prompts."""
+        session_id: str,
+        query_embedding: Optional[List[float]] = None
+    ) -> Tuple[str, bool]:
+        """
+        Generate response asynchronously with intent-specific prompts.
+        Returns (response, degraded); degraded answers were built without the LLM because it
+        was unavailable or failed, and feed the LLM circuit breaker.
+        """
+        # Provider outcome for the circuit breaker; None when the call never reached the provider
+        succeeded: Optional[bool] = None
         try:
             # Get LLM
             llm = self._get_llm_for_user()
             if not llm:
-                return self._get_fallback_response(intent, query)
+                succeeded = False
+                return await vector_executor.run(
+                    self._degraded_answer, intent, query, context_chunks, query_embedding, "no provider"
+                ), True
             # Select appropriate prompt based on intent
-            prompt_mapping = {
-                IntentType.CAREER_GUIDANCE: CAREER_PROMPT,
-                IntentType.AI_ADVICE: AI_PROMPT,
-                IntentType.CYBERSECURITY_ADVICE: CYBER_PROMPT,
-                IntentType.PERSONAL_INFO: PERSONAL_PROMPT,
-                IntentType.GENERAL_RAG: RAG_PROMPT
-            }
-            prompt = prompt_mapping.get(intent, SYSTEM_PROMPT)
+            prompt = PROMPT_MAPPING.get(intent, SYSTEM_PROMPT)
             # Prepare context
             context = "\n\n".join(context_chunks) if context_chunks else ""
             prompt_input = {
@@ -385,11 +666,9 @@ class EnhancedChatService:
             logger.info(f"Prompt size (chars): {len(str(prompt_input))}")
             # Create chain
             chain = prompt | llm
-            # Execute with timeout
-            result = await asyncio.wait_for(
-                asyncio.to_thread(chain.invoke, prompt_input),
-                timeout=self.timeout_seconds
-            )
+            # Execute with timeout. Fair share of provider slots across clients; a call that
+            # outlives the timeout keeps its slot until the provider returns
+            result = await llm_scheduler.run(llm_executor, chain.invoke, prompt_input, timeout=self.timeout_seconds)
             # Extract response
             if hasattr(result, 'content'):
                 response = result.content
@@ -397,14 +676,48 @@ class EnhancedChatService:
                 response = result
             else:
                 response = str(result)
+            succeeded = True
             logger.info(f"Generated response for intent: {intent.value}")
-            return response
+            return response, False
         except asyncio.TimeoutError:
             logger.error("Response generation timeout")
-            return self._get_fallback_response(intent, query)
+            succeeded = False
+            return await vector_executor.run(
+                self._degraded_answer, intent, query, context_chunks, query_embedding, "timeout"
+            ), True
+        except (ExecutorSaturated, SchedulerTimeout):
+            # Our own backlog, not a provider failure: no circuit breaker penalty
+            return await vector_executor.run(
+                self._degraded_answer, intent, query, context_chunks, query_embedding, "provider queue saturated"
+            ), True
         except Exception as e:
             logger.error(f"Error generating response: {str(e)}")
-            return self._get_fallback_response(intent, query)
+            succeeded = False
+            return await vector_executor.run(
+                self._degraded_answer, intent, query, context_chunks, query_embedding, "provider error"
+            ), True
+        finally:
+            # Also runs when the request is cancelled, so a half-open probe is never left reserved
+            if succeeded is True:
+                llm_circuit.record_success()
+            elif succeeded is False:
+                llm_circuit.record_failure()
+            else:
+                llm_circuit.release_probe()
+
+    def _degraded_reason(self) -> Optional[str]:
+        """Why generation should be skipped right now, or None to call the LLM."""
+        if not llm_circuit.allow():
+            return "circuit open"
+        return None
+
+    def _degraded_answer(self, intent: IntentType, query: str, context_chunks: List[str],
+                         query_embedding: Optional[List[float]], reason: str) -> str:
+        """Extractive answer from the retrieved context; the fixed intent reply when there is none."""
+        self.degraded_responses[reason] = self.degraded_responses.get(reason, 0) + 1
+        logger.warning(f"[LLM] Degraded mode ({reason}) for query: {query[:50]}...")
+        answer = extractive_answer(query, context_chunks, intent.value, query_embedding, self._embed_documents)
+        return answer or self._get_fallback_response(intent, query)
     
     def _get_fallback_response(self, intent: IntentType, query: str) -> str:
         """Get fallback response when LLM is unavailable."""
@@ -459,31 +772,84 @@ class EnhancedChatService:
     
     def clear_cache(self):
         """
-        Clear all chat response cache entries from memory.
+        Clear all chat response cache entries.
         """
         self.cache.clear()
+        self.semantic_cache.clear()
         logger.info("Response cache cleared")
     
+    def invalidate_cache(
+        self,
+        key: Optional[str] = None,
+        user_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+        query: Optional[str] = None
+    ) -> int:
+        """
+        Selectively invalidate chat response cache entries.
+        Args:
+            key: Exact cache key to delete.
+            user_id: Delete entries scoped to this user (personal intents).
+            session_id: Narrow a user_id invalidation to one session.
+            query: Delete entries for this query text (shared and per-user).
+        Returns:
+            Number of entries removed.
+        """
+        if key:
+            return int(self.cache.delete(key))
+        prefix = "chat_cache:"
+        if user_id:
+            prefix += f"user:{user_id}:"
+            if session_id:
+                prefix += f"{session_id}:"
+        suffix = f":{normalize_query(query)}" if query else ""
+        return self.cache.invalidate(lambda k: k.startswith(prefix) and k.endswith(suffix))
+    
     def get_cache_stats(self) -> Dict[str, Any]:
         """
-        Get statistics about the in-memory chat response cache.
+        Get statistics about the chat response cache.
         Returns:
-            A dictionary with cache size.
+            A dictionary with cache size, hit/miss/eviction counters and intent cache hit rate.
         """
-        size = len(self.cache)
+        stats = self.cache.get_stats()
         return {
-            "cache_size": size,
-            "cache_hits": None,  # Not tracked in in-memory version
-            "cache_misses": None
+            "cache_size": stats["entries"],
+            "cache_hits": stats["hits"],
+            "cache_misses": stats["misses"],
+            "response_cache": stats,
+            "semantic_cache": self.semantic_cache.get_stats(),
+            "singleflight": self._inflight.get_stats(),
+            "intent_cache": intent_cache.get_stats(),
+            "rate_limiter": self.rate_limiter.get_stats() if self.rate_limiter else None,
+            "session_history": session_history.get_stats(),
+            "session_retrieval": self.session_retrieval.get_stats(),
+            "chunk_token_counts": chunk_token_counts.get_stats(),
+            "project_catalog": project_catalog.get_stats(),
+            "namespace_router": namespace_router.get_stats(),
+            "relevance_gate": relevance_gate.get_stats(),
+            "llm_circuit": llm_circuit.get_stats(),
+            "degraded_responses": dict(self.degraded_responses),
+            "llm_scheduler": llm_scheduler.get_stats(),
+            "executors": get_executor_stats()
         } 
 
-    def _count_tokens(self, text: str, model: str = "gpt-3.5-turbo") -> int:
+    def _embed_query(self, text: str) -> Optional[List[float]]:
+        """Embed a query with the active embeddings provider, or None if unavailable."""
         try:
-            enc = tiktoken.encoding_for_model(model)
-            return len(enc.encode(text))
-        except Exception:
-            # Fallback: rough estimate
-            return len(text.split())
+            embeddings = provider_manager.get_embeddings()
+            return embeddings.embed_query(text) if embeddings else None
+        except Exception as e:
+            logger.warning(f"Could not embed query: {e}")
+            return None
+
+    def _embed_documents(self, texts: List[str]) -> Optional[List[List[float]]]:
+        """Embed chunk texts in one batch call, or None if unavailable."""
+        try:
+            embeddings = provider_manager.get_embeddings()
+            return embeddings.embed_documents(texts) if embeddings else None
+        except Exception as e:
+            logger.warning(f"Could not embed context chunks: {e}")
+            return None
 
     def _cosine_similarity(self, vec1, vec2):
         import numpy as np
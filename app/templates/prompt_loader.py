@@ -1,4 +1,5 @@
 # New helper module to load prompt text from external files
+import hashlib
 import importlib.resources as pkg_resources
 from pathlib import Path
 from typing import Optional
@@ -16,3 +17,13 @@ def load_prompt(file_name: str, fallback: str, subdir: str = "files") -> str:
         # Any problem just fall back
         pass
     return fallback
+
+
+def prompt_version(prompt, *extra: str) -> str:
+    """Return a short fingerprint of a prompt template (plus any extra version tags).
+
+    Used as a cache namespace so results produced by an older prompt are never reused.
+    """
+    template = getattr(prompt, "template", None) or str(prompt)
+    digest = hashlib.sha1("\x1f".join((template,) + extra).encode("utf-8")).hexdigest()
+    return digest[:12]
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Context Compression Benchmark for HanzlaGPT
+Prompt tokens, generation latency and answer overlap of compressed vs whole-chunk context
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tiktoken
+
+from app.core.context_compression import compress_chunks
+from app.core.llm_providers import provider_manager
+from app.core.retrieval_plans import plan_executor, select_plan
+from app.core.text_utils import tokenize
+from app.templates.prompts import RAG_PROMPT
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden_questions.jsonl")
+ENCODING = tiktoken.get_encoding("cl100k_base")
+
+
+def load_golden(path: str) -> List[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def count_tokens(text: str) -> int:
+    return len(ENCODING.encode(text))
+
+
+def answer_overlap(answer: str, reference: str) -> float:
+    """Token F1 of an answer against the answer generated from uncompressed context."""
+    a, r = tokenize(answer), tokenize(reference)
+    common = sum(min(a.count(t), r.count(t)) for t in set(a))
+    if not common:
+        return 0.0
+    precision, recall = common / len(a), common / len(r)
+    return 2 * precision * recall / (precision + recall)
+
+
+def generate(llm, query: str, context: str) -> Dict:
+    start = time.perf_counter()
+    response = llm.invoke(RAG_PROMPT.format(query=query, context=context))
+    return {"answer": getattr(response, "content", str(response)), "ms": (time.perf_counter() - start) * 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--golden", default=GOLDEN_PATH)
+    parser.add_argument("--ratios", type=float, nargs="+", default=[0.4, 0.6, 0.8])
+    parser.add_argument("--no-llm", action="store_true", help="only report prompt tokens")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    golden = load_golden(args.golden)
+    llm = None if args.no_llm else provider_manager.get_chat_model()
+    if not args.no_llm and llm is None:
+        sys.exit("No chat model available; rerun with --no-llm for token counts only")
+
+    ratios = [1.0] + [r for r in args.ratios if r < 1.0]
+    totals = {ratio: {"prompt_tokens": [], "ms": [], "overlap": []} for ratio in ratios}
+    for item in golden:
+        query = item["question"]
+        chunks = plan_executor.execute(select_plan(query), query).chunks
+        if not chunks:
+            continue
+        reference: Optional[str] = None
+        for ratio in ratios:
+            context = "\n\n".join(compress_chunks(query, chunks, ratio=ratio, count_tokens=count_tokens).chunks)
+            row = totals[ratio]
+            row["prompt_tokens"].append(count_tokens(RAG_PROMPT.format(query=query, context=context)))
+            if llm is None:
+                continue
+            result = generate(llm, query, context)
+            row["ms"].append(result["ms"])
+            if reference is None:
+                reference = result["answer"]
+            row["overlap"].append(answer_overlap(result["answer"], reference))
+
+    mean = lambda values: round(sum(values) / len(values), 3) if values else None
+    rows = [{"ratio": ratio, "prompt_tokens": mean(t["prompt_tokens"]), "generation_ms": mean(t["ms"]),
+             "answer_overlap": mean(t["overlap"])} for ratio, t in totals.items()]
+    print(f"{'ratio':>6} {'prompt_tokens':>14} {'generation_ms':>14} {'answer_overlap':>15}")
+    for row in rows:
+        print(f"{row['ratio']:>6} {row['prompt_tokens']!s:>14} {row['generation_ms']!s:>14} {row['answer_overlap']!s:>15}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
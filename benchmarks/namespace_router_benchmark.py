@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Namespace Router Benchmark for HanzlaGPT
+Recall vs fan-out of routed cross-namespace search on the golden question set
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.core.llm_providers import provider_manager
+from app.core.namespace_router import NamespaceRouter
+from app.core.retrieval_plans import ALL_NAMESPACES
+from app.core.vectorstore import query_namespace
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden_questions.jsonl")
+
+
+def load_golden(path: str) -> List[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def top_ids(results: Dict[str, List], namespaces: List[str], k: int) -> List[str]:
+    """Merge per-namespace matches like search_across_namespaces and keep the top k ids."""
+    merged = [(m.score, f"{ns}/{m.id}") for ns in namespaces for m in results.get(ns, [])]
+    merged.sort(key=lambda r: -r[0])
+    return [rid for _, rid in merged[:k]]
+
+
+def evaluate(golden: List[Dict], vectors: List[List[float]], results: List[Dict[str, List]],
+             router: NamespaceRouter, k: int) -> Dict:
+    recall, ns_recall, fanout = [], [], []
+    for item, vector, per_ns in zip(golden, vectors, results):
+        reference = top_ids(per_ns, list(ALL_NAMESPACES), k)
+        routed = router.route(vector, ALL_NAMESPACES)
+        retrieved = set(top_ids(per_ns, routed, k))
+        if reference:
+            recall.append(len(retrieved.intersection(reference)) / len(reference))
+        labels = item.get("namespaces", [])
+        if labels:
+            ns_recall.append(sum(ns in routed for ns in labels) / len(labels))
+        fanout.append(len(routed))
+    mean = lambda values: round(sum(values) / len(values), 3) if values else None
+    return {"top_m": router.top_m, "min_score": router.min_score, f"recall@{k}": mean(recall),
+            "ns_recall": mean(ns_recall), "fanout": mean(fanout)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--golden", default=GOLDEN_PATH)
+    parser.add_argument("--k", type=int, default=3, help="chunks kept after merging (chat uses 3)")
+    parser.add_argument("--per-namespace", type=int, default=5, help="top_k per namespace query")
+    parser.add_argument("--top-m", type=int, nargs="+", default=[1, 2, 3, 4, len(ALL_NAMESPACES)])
+    parser.add_argument("--min-score", type=float, default=settings.NAMESPACE_ROUTER_MIN_SCORE)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    golden = load_golden(args.golden)
+    embeddings = provider_manager.get_embeddings()
+    if not embeddings:
+        sys.exit("No embeddings provider available")
+    router = NamespaceRouter(min_score=args.min_score)
+    if not router.load():
+        sys.exit(f"No namespace router at {router.path}; run ingestion first")
+
+    start = time.perf_counter()
+    vectors = embeddings.embed_documents([item["question"] for item in golden])
+    # Namespace results are independent, so one full fan-out per question serves every top_m
+    results = [{ns: query_namespace(ns, vector, args.per_namespace) for ns in ALL_NAMESPACES} for vector in vectors]
+    print(f"Searched {len(golden)} questions x {len(ALL_NAMESPACES)} namespaces in {time.perf_counter() - start:.1f}s\n")
+
+    rows = []
+    for top_m in args.top_m:
+        router.top_m = top_m
+        rows.append(evaluate(golden, vectors, results, router, args.k))
+    print(f"{'top_m':>6} {'min_score':>10} {f'recall@{args.k}':>10} {'ns_recall':>10} {'fanout':>8}")
+    for row in rows:
+        print(f"{row['top_m']:>6} {row['min_score']:>10} {row[f'recall@{args.k}']!s:>10} {row['ns_recall']!s:>10} {row['fanout']!s:>8}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
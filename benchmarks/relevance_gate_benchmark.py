@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Relevance Gate Benchmark for HanzlaGPT
+Best retrieval scores of answerable vs off-topic questions, and the gate thresholds they support
+"""
+import argparse
+import json
+import os
+import sys
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.core.llm_providers import provider_manager
+from app.core.relevance_gate import MATCH_SCORE, RERANK_SCORE, is_greeting, parse_thresholds
+from app.core.retrieval_plans import plan_executor, select_plan
+from app.core.session_retrieval import rank_by_similarity
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+GOLDEN_PATH = os.path.join(BENCH_DIR, "golden_questions.jsonl")
+OFF_TOPIC_PATH = os.path.join(BENCH_DIR, "off_topic_questions.jsonl")
+
+
+def load_questions(path: str) -> List[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line)["question"] for line in f if line.strip()]
+
+
+def best_scores(embeddings, query: str) -> Optional[Dict[str, float]]:
+    """Best Pinecone match score and best re-embedded cosine similarity, as each chat path computes them."""
+    plan = select_plan(query)
+    if plan.name == "project_overview":
+        # Catalog-served overviews are never gated
+        return None
+    result = plan_executor.execute(plan, query)
+    if not result.chunks:
+        return {MATCH_SCORE: result.best_score or 0.0, RERANK_SCORE: 0.0}
+    vectors = embeddings.embed_documents(result.chunks)
+    rerank = float(rank_by_similarity(embeddings.embed_query(query), vectors).max())
+    return {MATCH_SCORE: result.best_score or 0.0, RERANK_SCORE: rerank}
+
+
+def suggest(answerable: List[float], off_topic: List[float], keep: float, margin: float) -> Dict:
+    """Highest threshold that still lets `keep` of the answerable questions through, less a margin."""
+    ranked = sorted(answerable)
+    floor = ranked[min(int(len(ranked) * (1 - keep)), len(ranked) - 1)]
+    threshold = round(max(floor - margin, 0.0), 3)
+    return {
+        "threshold": threshold,
+        "answerable_min": round(ranked[0], 3),
+        "answerable_median": round(ranked[len(ranked) // 2], 3),
+        "off_topic_max": round(max(off_topic), 3) if off_topic else None,
+        "answerable_passed": round(sum(s >= threshold for s in answerable) / len(answerable), 3),
+        "off_topic_skipped": round(sum(s < threshold for s in off_topic) / len(off_topic), 3) if off_topic else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--golden", default=GOLDEN_PATH)
+    parser.add_argument("--off-topic", default=OFF_TOPIC_PATH)
+    parser.add_argument("--keep", type=float, default=1.0, help="share of answerable questions that must pass")
+    parser.add_argument("--margin", type=float, default=0.02, help="subtracted from the answerable floor")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    embeddings = provider_manager.get_embeddings()
+    if embeddings is None:
+        sys.exit("No embeddings provider available")
+
+    scores = {MATCH_SCORE: {"answerable": [], "off_topic": []}, RERANK_SCORE: {"answerable": [], "off_topic": []}}
+    for label, path in (("answerable", args.golden), ("off_topic", args.off_topic)):
+        for query in load_questions(path):
+            if is_greeting(query):
+                continue
+            best = best_scores(embeddings, query)
+            for scale, score in (best or {}).items():
+                scores[scale][label].append(score)
+
+    rows = {scale: suggest(s["answerable"], s["off_topic"], args.keep, args.margin)
+            for scale, s in scores.items() if s["answerable"]}
+    print(f"{'scale':>7} {'threshold':>10} {'ans_min':>8} {'ans_median':>11} {'off_max':>8} {'ans_passed':>11} {'off_skipped':>12}")
+    for scale, row in rows.items():
+        print(f"{scale:>7} {row['threshold']:>10} {row['answerable_min']:>8} {row['answerable_median']:>11} "
+              f"{row['off_topic_max']!s:>8} {row['answerable_passed']:>11} {row['off_topic_skipped']!s:>12}")
+    intents = list(parse_thresholds(settings.RELEVANCE_GATE_THRESHOLDS)) or ["personal_info", "general_rag"]
+    for setting, scale in (("RELEVANCE_GATE_THRESHOLDS", MATCH_SCORE), ("RELEVANCE_GATE_RERANK_THRESHOLDS", RERANK_SCORE)):
+        if scale in rows:
+            threshold = rows[scale]["threshold"]
+            print(f"{setting}={','.join(f'{intent}={threshold}' for intent in intents)}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import os
 from app.core.config import settings
 from app.core.llm_providers import OpenAIProvider
+from app.core.index_version import bump_index_version
 import pinecone
 
 # List of new files to embed and their target namespaces
@@ -38,3 +39,5 @@ for file_path, namespace in FILES_TO_EMBED:
     }
     index.upsert(vectors=[{'id': vector_id, 'values': vector, 'metadata': metadata}], namespace=namespace)
     print(f"Uploaded {file_path} to Pinecone namespace '{namespace}' as ID '{vector_id}'.")
+
+bump_index_version("upserted focused chunks")
@@ -4,7 +4,11 @@ from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse
 from app.api.endpoints.router import api_router
 from app.core.config import settings
-from app.core.database import create_tables
+from app.core.database import create_tables, close_pools
+from app.core.chat_logger import chat_log_writer
+from app.core.chat_partitions import partition_maintainer
+from app.core.project_catalog import project_catalog
+from app.core.executors import shutdown_executors
 import uvicorn
 import time
 from loguru import logger
@@ -39,11 +43,21 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"Database initialization failed: {e}")
         logger.warning("App will continue without database functionality")
+    chat_log_writer.start()
+    partition_maintainer.start()
+    try:
+        logger.info(f"Project catalog loaded with {project_catalog.load()} projects")
+    except Exception as e:
+        logger.warning(f"Project catalog unavailable: {e}")
     
     yield
     
-    # Shutdown: Cleanup (if needed)
+    # Shutdown: flush buffered chat history before exiting
     logger.info("Shutting down...")
+    await partition_maintainer.stop()
+    await chat_log_writer.stop()
+    await close_pools()
+    shutdown_executors()
 
 # Create FastAPI app instance with lifespan
 app = FastAPI(
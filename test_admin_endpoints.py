@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test Admin Endpoints
+"""
+
+from loguru import logger
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan> - <level>{message}</level>",
+    level="INFO"
+)
+
+def _client():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.api.endpoints.admin import admin_router
+
+    app = FastAPI()
+    app.include_router(admin_router, prefix="/admin")
+    return TestClient(app)
+
+def test_chat_history_maintenance_runs_on_db_executor():
+    """The maintenance route runs run_maintenance on the DB executor and returns its result."""
+    from app.api.endpoints import admin
+    from app.core.config import settings
+    from app.core.executors import db_executor
+
+    original_key, original_run = settings.ADMIN_API_KEY, admin.run_maintenance
+    submitted = db_executor.submitted
+    try:
+        settings.ADMIN_API_KEY = "secret"
+        admin.run_maintenance = lambda: {"created": ["chat_history_p2026_10"], "archived": [], "dropped": []}
+        response = _client().post("/admin/chat-history/maintenance", headers={"X-Admin-Key": "secret"})
+        assert response.status_code == 200, response.text
+        assert response.json()["created"] == ["chat_history_p2026_10"]
+        assert db_executor.submitted == submitted + 1
+
+        def failing():
+            raise RuntimeError("database down")
+        admin.run_maintenance = failing
+        response = _client().post("/admin/chat-history/maintenance", headers={"X-Admin-Key": "secret"})
+        assert response.status_code == 503
+    finally:
+        settings.ADMIN_API_KEY, admin.run_maintenance = original_key, original_run
+
+def test_executor_status_requires_admin_key():
+    """Executor metrics are admin-only and list every bounded executor."""
+    from app.core.config import settings
+
+    original_key = settings.ADMIN_API_KEY
+    try:
+        settings.ADMIN_API_KEY = "secret"
+        assert _client().get("/admin/executors").status_code == 401
+        response = _client().get("/admin/executors", headers={"X-Admin-Key": "secret"})
+        assert set(response.json()["executors"]) == {"llm", "vector", "db"}
+    finally:
+        settings.ADMIN_API_KEY = original_key
+
+def test_cache_endpoints_run_blocking_backends_on_db_executor():
+    """Cache stats and invalidation go through the DB executor when the backend does I/O."""
+    from app.api.endpoints.admin import chat_service
+    from app.core.config import settings
+    from app.core.executors import db_executor
+
+    original_key, cache = settings.ADMIN_API_KEY, chat_service.cache
+    submitted = db_executor.submitted
+    try:
+        settings.ADMIN_API_KEY = "secret"
+        cache.blocking = True
+        cache.set("admin-test-key", {"response": "cached"})
+        response = _client().get("/admin/cache", headers={"X-Admin-Key": "secret"})
+        assert response.status_code == 200, response.text
+        assert response.json()["stats"]["cache_size"] >= 1
+        response = _client().delete("/admin/cache?key=admin-test-key", headers={"X-Admin-Key": "secret"})
+        assert response.json()["removed"] == 1
+        assert db_executor.submitted == submitted + 2
+    finally:
+        settings.ADMIN_API_KEY = original_key
+        del cache.blocking
+
+if __name__ == "__main__":
+    logger.info("🚀 Starting Admin Endpoints Test")
+    test_chat_history_maintenance_runs_on_db_executor()
+    test_executor_status_requires_admin_key()
+    test_cache_endpoints_run_blocking_backends_on_db_executor()
+    logger.info("✅ Admin endpoints test completed")
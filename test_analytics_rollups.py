@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test Latency Sketch and Analytics Rollups
+"""
+
+import json
+import random
+from datetime import datetime
+from loguru import logger
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan> - <level>{message}</level>",
+    level="INFO"
+)
+
+def test_sketch_quantiles_within_relative_error():
+    """Percentiles stay within the configured relative error, also after merging partial sketches."""
+    from app.core.sketch import LatencySketch
+
+    rng = random.Random(7)
+    values = [rng.lognormvariate(6.5, 0.8) for _ in range(20000)]
+    parts = [LatencySketch(0.01) for _ in range(4)]
+    for i, value in enumerate(values):
+        parts[i % 4].add(value)
+    merged = LatencySketch(0.01)
+    for part in parts:
+        merged.merge(LatencySketch.from_dict(json.loads(json.dumps(part.to_dict())), 0.01))
+
+    ordered = sorted(values)
+    assert merged.count == len(values)
+    for q in (0.5, 0.95, 0.99):
+        exact = ordered[int(q * (len(ordered) - 1))]
+        assert abs(merged.quantile(q) - exact) / exact <= 0.011, q
+    assert LatencySketch().quantile(0.5) is None
+
+def test_rollup_rows_and_summary():
+    """Records fold into hour and day rows that summarize back to the same counts."""
+    from app.core.analytics import rollup_rows, summarize_rollups
+
+    base = datetime(2024, 6, 1, 10, 15)
+    records = [
+        {"intent": "ai_advice", "provider": "OpenAI", "response_time_ms": 800, "created_at": base},
+        {"intent": "ai_advice", "provider": "OpenAI", "response_time_ms": 1200, "created_at": base.replace(minute=40)},
+        {"intent": "greeting", "provider": None, "response_time_ms": None, "created_at": base.replace(hour=11)},
+    ]
+    rows = rollup_rows(records)
+    # Sorted by conflict key, so concurrent batches take row locks in the same order
+    assert [r[:4] for r in rows] == sorted(r[:4] for r in rows)
+    assert [r[:4] for r in rollup_rows(reversed(records))] == [r[:4] for r in rows]
+    hourly = [r for r in rows if r[0] == "hour"]
+    daily = [r for r in rows if r[0] == "day"]
+    assert len(hourly) == 2 and len(daily) == 2
+    ai_hour = next(r for r in hourly if r[2] == "ai_advice")
+    assert ai_hour[1] == datetime(2024, 6, 1, 10) and ai_hour[4:9] == (2, 2, 2000, 800, 1200)
+
+    columns = ["granularity", "bucket_start", "intent", "provider", "count", "latency_count",
+               "latency_sum_ms", "latency_min_ms", "latency_max_ms", "latency_sketch"]
+    summary = summarize_rollups([dict(zip(columns, r[:9] + (json.loads(r[9]),))) for r in daily], "day")
+    assert summary["total"]["count"] == 3
+    assert summary["providers"]["unknown"]["count"] == 1
+    assert summary["intents"]["ai_advice"]["latency_ms"]["mean"] == 1000.0
+    assert summary["intents"]["greeting"]["latency_ms"]["p95"] is None
+
+if __name__ == "__main__":
+    logger.info("🚀 Starting Analytics Rollups Test")
+    test_sketch_quantiles_within_relative_error()
+    test_rollup_rows_and_summary()
+    logger.info("✅ Analytics rollups test completed")
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Test Write-Behind Chat Logger
+"""
+
+import asyncio
+import os
+import tempfile
+from loguru import logger
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan> - <level>{message}</level>",
+    level="INFO"
+)
+
+class FlakyDatabase:
+    """Collects batches and fails while ``down`` is set."""
+
+    def __init__(self):
+        self.batches = []
+        self.down = False
+
+    def __call__(self, records):
+        if self.down:
+            raise ConnectionError("database unavailable")
+        self.batches.append(list(records))
+
+    @property
+    def rows(self):
+        return [r for batch in self.batches for r in batch]
+
+def _writer(db, **kwargs):
+    from app.core.chat_logger import ChatLogWriter
+    spill_path = os.path.join(tempfile.mkdtemp(), "spill.jsonl")
+    return ChatLogWriter(spill_path=spill_path, writer=db, **kwargs)
+
+def test_records_are_flushed_in_batches():
+    """The background task writes on the size trigger and flushes the rest on stop."""
+    db = FlakyDatabase()
+    writer = _writer(db, batch_size=3, flush_interval=10.0)
+
+    async def scenario():
+        writer.start()
+        for i in range(7):
+            assert writer.log("u", "s", f"q{i}", f"a{i}", intent="general")
+        await asyncio.sleep(0.1)
+        # Size trigger fired without waiting for the interval
+        assert len(db.rows) >= 6
+        await writer.stop()
+
+    asyncio.run(scenario())
+    assert [r["query"] for r in db.rows] == [f"q{i}" for i in range(7)]
+    assert max(len(b) for b in db.batches) == 3
+    assert writer.get_stats()["pending"] == 0
+
+def test_spill_when_database_is_down_and_replay_after_recovery():
+    """Failed batches go to disk and are inserted, with their timestamps, once the DB is back."""
+    db = FlakyDatabase()
+    writer = _writer(db, batch_size=10, retry_backoff=0.0)
+
+    db.down = True
+    writer.log("u", "s", "lost?", "no")
+    writer.flush()
+    assert db.rows == []
+    assert writer.get_stats()["spill_pending"]
+
+    db.down = False
+    writer.log("u", "s", "later", "yes")
+    assert writer.flush() == 2
+    assert [r["query"] for r in db.rows] == ["lost?", "later"]
+    assert db.rows[0]["created_at"] <= db.rows[1]["created_at"]
+    stats = writer.get_stats()
+    assert stats["replayed"] == 1 and not stats["spill_pending"]
+
+def test_full_queue_applies_backpressure_to_disk():
+    """Records beyond the queue bound are spilled instead of growing memory."""
+    db = FlakyDatabase()
+    writer = _writer(db, max_queue=2, batch_size=10)
+    for i in range(5):
+        assert writer.log("u", "s", f"q{i}", "a")
+    stats = writer.get_stats()
+    assert stats["pending"] == 2 and stats["spilled"] == 3
+    writer.flush()
+    assert sorted(r["query"] for r in db.rows) == [f"q{i}" for i in range(5)]
+
+def test_corrupt_spill_lines_are_quarantined_and_leftover_replay_is_kept():
+    """A bad line does not abort the replay, and a replay file from an interrupted run is not overwritten."""
+    db = FlakyDatabase()
+    writer = _writer(db, batch_size=10, retry_backoff=60.0)
+
+    db.down = True
+    writer.log("u", "s", "before crash", "a")
+    writer.flush()
+    # Simulate a crash mid-replay: the spill was moved aside but never written
+    os.replace(writer.spill_path, f"{writer.spill_path}.replay")
+    # Still backing off, so this flush only spills
+    writer.log("u", "s", "after restart", "b")
+    writer.flush()
+    with open(writer.spill_path, "a", encoding="utf-8") as f:
+        f.write('{"user_id": "u", "query": "trunc')
+    assert os.path.exists(writer.spill_path) and os.path.exists(f"{writer.spill_path}.replay")
+
+    db.down = False
+    writer._db_down_until = 0.0
+    assert writer.flush() == 2
+    assert sorted(r["query"] for r in db.rows) == ["after restart", "before crash"]
+    with open(f"{writer.spill_path}.corrupt", encoding="utf-8") as f:
+        assert f.read().startswith('{"user_id": "u", "query": "trunc')
+    stats = writer.get_stats()
+    assert stats["corrupt"] == 1 and not stats["spill_pending"]
+
+def test_overlapping_flushes_replay_the_spill_once():
+    """A final flush that overlaps a periodic one (stop() during a slow write) inserts nothing twice."""
+    import threading
+    import time
+
+    class SlowDatabase(FlakyDatabase):
+        def __call__(self, records):
+            time.sleep(0.05)
+            super().__call__(records)
+
+    db = SlowDatabase()
+    writer = _writer(db, batch_size=10, retry_backoff=0.0)
+    db.down = True
+    writer.log("u", "s", "spilled", "a")
+    writer.flush()
+    db.down = False
+
+    errors = []
+
+    def flush():
+        try:
+            writer.flush()
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=flush) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert [r["query"] for r in db.rows] == ["spilled"]
+    assert writer.get_stats()["replayed"] == 1
+
+if __name__ == "__main__":
+    logger.info("🚀 Starting Chat Logger Test")
+    test_records_are_flushed_in_batches()
+    test_spill_when_database_is_down_and_replay_after_recovery()
+    test_full_queue_applies_backpressure_to_disk()
+    test_corrupt_spill_lines_are_quarantined_and_leftover_replay_is_kept()
+    test_overlapping_flushes_replay_the_spill_once()
+    logger.info("✅ Chat logger test completed")
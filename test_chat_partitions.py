@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test Chat History Partition Helpers
+"""
+
+import os
+import uuid
+from datetime import date, datetime
+from loguru import logger
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan> - <level>{message}</level>",
+    level="INFO"
+)
+
+def test_month_arithmetic_and_names():
+    """Month offsets roll over year boundaries in both directions."""
+    from app.core.chat_partitions import month_start, partition_name
+
+    assert month_start(date(2024, 11, 17), 1) == date(2024, 12, 1)
+    assert month_start(date(2024, 11, 17), 2) == date(2025, 1, 1)
+    assert month_start(date(2024, 1, 31), -13) == date(2022, 12, 1)
+    assert partition_name(date(2025, 3, 1)) == "chat_history_y2025m03"
+
+def test_partition_bounds():
+    """Bounds from pg_get_expr parse to [lower, upper) with MINVALUE/MAXVALUE as open ends."""
+    from app.core.chat_partitions import parse_partition_bound, Partition
+
+    lower, upper = parse_partition_bound("FOR VALUES FROM ('2024-05-01 00:00:00') TO ('2024-06-01 00:00:00')")
+    assert (lower, upper) == (datetime(2024, 5, 1), datetime(2024, 6, 1))
+    assert parse_partition_bound("FOR VALUES FROM (MINVALUE) TO ('2024-06-01 00:00:00')")[0] is None
+    assert parse_partition_bound("DEFAULT") is None
+
+    legacy = Partition("chat_history_legacy", None, datetime(2024, 6, 1))
+    assert legacy.overlaps(datetime(2024, 5, 1), datetime(2024, 6, 1))
+    assert not legacy.overlaps(datetime(2024, 6, 1), datetime(2024, 7, 1))
+
+def test_migrates_plain_table_into_partitions():
+    """A pre-partitioning chat_history (SERIAL PRIMARY KEY id) becomes the legacy partition.
+
+    Needs a scratch Postgres database in TEST_DATABASE_URL; runs in a throwaway schema.
+    """
+    dsn = os.getenv("TEST_DATABASE_URL")
+    if not dsn:
+        import pytest
+        pytest.skip("TEST_DATABASE_URL not set")
+    import psycopg
+    from app.core.chat_partitions import LEGACY_TABLE, create_partitioned_table, ensure_partitions, list_partitions
+
+    schema = f"test_partitions_{uuid.uuid4().hex[:8]}"
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        conn.execute(f"CREATE SCHEMA {schema}; SET search_path TO {schema};")
+        try:
+            # The table as the original create_tables() made it
+            conn.execute("""
+                CREATE TABLE chat_history (
+                    id SERIAL PRIMARY KEY,
+                    user_id VARCHAR(255) NOT NULL,
+                    session_id VARCHAR(255) NOT NULL,
+                    query TEXT NOT NULL,
+                    answer TEXT NOT NULL,
+                    intent VARCHAR(100),
+                    response_time_ms INTEGER,
+                    created_at TIMESTAMP DEFAULT NOW()
+                );
+            """)
+            conn.execute("INSERT INTO chat_history (user_id, session_id, query, answer, created_at) "
+                         "VALUES ('u', 's', 'old question', 'old answer', '2024-01-05'), "
+                         "('u', 's', 'undated question', 'undated answer', NULL);")
+            create_partitioned_table(conn)
+            ensure_partitions(conn, months_ahead=1)
+            create_partitioned_table(conn)  # idempotent once partitioned
+
+            names = [p.name for p in list_partitions(conn)]
+            assert names[0] == LEGACY_TABLE and len(names) >= 2
+            conn.execute("INSERT INTO chat_history (user_id, session_id, query, answer, provider) "
+                         "VALUES ('u', 's', 'new question', 'new answer', 'OpenAI');")
+            rows = conn.execute("SELECT id, query FROM chat_history ORDER BY id;").fetchall()
+            assert [q for _, q in rows] == ["old question", "undated question", "new question"]
+            assert rows[-1][0] > rows[-2][0]  # the id sequence carried over
+            pkey = conn.execute(
+                "SELECT pg_get_constraintdef(oid) FROM pg_constraint WHERE conname = %s;", (f"{LEGACY_TABLE}_pkey",)
+            ).fetchone()
+            assert pkey and pkey[0] == "PRIMARY KEY (id, created_at)"
+        finally:
+            conn.execute(f"DROP SCHEMA {schema} CASCADE;")
+
+def test_default_partition_rows_move_to_monthly_partitions():
+    """Rows outside every monthly partition land in the DEFAULT partition until ensure_partitions moves them.
+
+    Needs a scratch Postgres database in TEST_DATABASE_URL; runs in a throwaway schema.
+    """
+    dsn = os.getenv("TEST_DATABASE_URL")
+    if not dsn:
+        import pytest
+        pytest.skip("TEST_DATABASE_URL not set")
+    import psycopg
+    from app.core.chat_partitions import (DEFAULT_TABLE, create_partitioned_table, ensure_partitions,
+                                          month_start, partition_name)
+
+    schema = f"test_partitions_{uuid.uuid4().hex[:8]}"
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        conn.execute(f"CREATE SCHEMA {schema}; SET search_path TO {schema};")
+        try:
+            create_partitioned_table(conn)
+            ensure_partitions(conn, months_ahead=0)
+            late = datetime.combine(month_start(date.today(), 5), datetime.min.time())
+            conn.execute("INSERT INTO chat_history (user_id, session_id, query, answer, created_at) "
+                         "VALUES ('u', 's', 'late question', 'late answer', %s);", (late,))
+            where = "SELECT tableoid::regclass::text FROM chat_history WHERE query = 'late question';"
+            assert conn.execute(where).fetchone()[0] == DEFAULT_TABLE
+
+            created = ensure_partitions(conn, months_ahead=0)
+            assert created == [partition_name(late.date())]
+            assert conn.execute(where).fetchone()[0] == partition_name(late.date())
+            assert conn.execute(f"SELECT count(*) FROM {DEFAULT_TABLE};").fetchone()[0] == 0
+            assert ensure_partitions(conn, months_ahead=0) == []
+        finally:
+            conn.execute(f"DROP SCHEMA {schema} CASCADE;")
+
+if __name__ == "__main__":
+    logger.info("🚀 Starting Chat Partitions Test")
+    test_month_arithmetic_and_names()
+    test_partition_bounds()
+    test_migrates_plain_table_into_partitions()
+    test_default_partition_rows_move_to_monthly_partitions()
+    logger.info("✅ Chat partitions test completed")
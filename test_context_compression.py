@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test Query-Aware Context Compression
+"""
+
+from loguru import logger
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan> - <level>{message}</level>",
+    level="INFO"
+)
+
+CHUNKS = [
+    "[PROJECTS] Hanzla built CyberShield, a threat detection platform for small businesses. "
+    "He trained its anomaly models with scikit-learn. The UI was done in Streamlit. It was deployed on AWS.",
+    "Hanzla Nawaz is a Machine Learning Engineer at XEVEN Solutions. His work focuses on LLM evaluation. "
+    "He enjoys hiking.",
+]
+
+def test_bm25_prefers_rare_query_terms():
+    """Sentences sharing the rarer query terms score highest; no shared terms scores zero."""
+    from app.core.context_compression import bm25_scores
+
+    docs = [["hanzla", "built", "cybershield"], ["hanzla", "enjoys", "hiking"], ["streamlit", "ui"]]
+    scores = bm25_scores(["hanzla", "cybershield"], docs)
+    assert scores[0] > scores[1] > scores[2] == 0
+    assert len(bm25_scores(["x"], [])) == 0
+
+def test_compression_keeps_relevant_sentences_in_order():
+    """Every chunk keeps its best sentence, labels survive, irrelevant sentences go, and the target holds."""
+    from app.core.context_compression import compress_chunks
+
+    result = compress_chunks("What threat detection tool did Hanzla build with scikit-learn?", CHUNKS, ratio=0.6)
+    assert result.chunks[0] == ("[PROJECTS] Hanzla built CyberShield, a threat detection platform for small "
+                                "businesses. He trained its anomaly models with scikit-learn.")
+    assert result.chunks[1].startswith("Hanzla Nawaz is a Machine Learning Engineer")
+    assert "Streamlit" not in " ".join(result.chunks) and "hiking" not in " ".join(result.chunks)
+    assert result.compressed_tokens <= result.original_tokens * 0.6
+    assert result.sentences_kept + len(result.dropped) == result.sentences_total == 7
+
+def test_ratio_one_and_disabled_leave_context_untouched():
+    """Ratio 1.0 and CONTEXT_COMPRESSION_ENABLED=false are no-ops."""
+    from app.core.config import settings
+    from app.core.context_compression import compress_chunks, compress_context
+
+    assert compress_chunks("threat detection", CHUNKS, ratio=1.0).chunks == CHUNKS
+    original = settings.CONTEXT_COMPRESSION_ENABLED
+    try:
+        settings.CONTEXT_COMPRESSION_ENABLED = False
+        assert compress_context("threat detection", CHUNKS) == CHUNKS
+    finally:
+        settings.CONTEXT_COMPRESSION_ENABLED = original
+
+def test_hybrid_scoring_uses_sentence_embeddings():
+    """With no shared terms, the query embedding picks the sentence; a failing embedder falls back to BM25."""
+    from app.core.context_compression import compress_chunks
+
+    def embed(sentences):
+        return [[1.0, 0.0] if "hiking" in s else [0.0, 1.0] for s in sentences]
+    result = compress_chunks("outdoor hobbies", CHUNKS[1:], ratio=0.1, query_embedding=[1.0, 0.0], embed_fn=embed)
+    assert result.chunks == ["He enjoys hiking."]
+
+    def broken(sentences):
+        raise RuntimeError("embeddings down")
+    result = compress_chunks("outdoor hobbies", CHUNKS[1:], ratio=0.1, query_embedding=[1.0, 0.0], embed_fn=broken)
+    assert len(result.chunks) == 1 and result.sentences_kept == 1
+
+if __name__ == "__main__":
+    logger.info("🚀 Starting Context Compression Test")
+    test_bm25_prefers_rare_query_terms()
+    test_compression_keeps_relevant_sentences_in_order()
+    test_ratio_one_and_disabled_leave_context_untouched()
+    test_hybrid_scoring_uses_sentence_embeddings()
+    logger.info("✅ Context compression test completed")
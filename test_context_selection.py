@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test Context Selection (adaptive top-k and MMR)
+"""
+
+import numpy as np
+from loguru import logger
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan> - <level>{message}</level>",
+    level="INFO"
+)
+
+QUERY = [1.0, 0.0, 0.0]
+# Two near-identical chunks closest to the query, one slightly less relevant but different
+VECTORS = [[0.95, 0.31, 0.0], [0.96, 0.28, 0.0], [0.8, 0.0, 0.6], [0.0, 1.0, 0.0]]
+
+def test_mmr_skips_near_duplicates():
+    """MMR trades a little relevance for diversity; lambda=1 is plain relevance order."""
+    from app.core.context_selection import mmr_select
+
+    assert mmr_select(QUERY, VECTORS, 2, lambda_mult=0.5) == [1, 2]
+    assert mmr_select(QUERY, VECTORS, 2, lambda_mult=1.0) == [1, 0]
+    assert sorted(mmr_select(QUERY, VECTORS, 10)) == [0, 1, 2, 3]
+    assert mmr_select(QUERY, [], 3) == []
+
+def test_diversify_falls_back_without_vectors():
+    """Missing or mismatched vectors keep the retrieval order."""
+    from app.core.context_selection import diversify
+
+    chunks = ["a", "a'", "b", "c"]
+    assert diversify(chunks, VECTORS, QUERY, k=2, lambda_mult=0.5) == ["a'", "b"]
+    assert diversify(chunks, None, QUERY, k=2) == ["a", "a'"]
+    assert diversify(chunks, VECTORS[:2], QUERY, k=3) == ["a", "a'", "b"]
+
+def test_plan_stage_diversifies_over_fetched_candidates():
+    """Plan stages over-fetch and keep a diverse top-k when matches carry vectors."""
+    from app.core.config import settings
+    from app.core.retrieval_plans import PlanExecutor, RetrievalPlan, RetrievalStep, RetrievalStage
+
+    requested = []
+    def search(namespace, vector, top_k):
+        requested.append(top_k)
+        matches = [("dup one", 0.95, VECTORS[0]), ("dup two", 0.96, VECTORS[1]), ("other", 0.9, VECTORS[2]), ("far", 0.1, VECTORS[3])]
+        return matches[:top_k]
+
+    plan = RetrievalPlan("test", (RetrievalStage((RetrievalStep("projects", top_k=2),)),), max_chunks=2)
+    executor = PlanExecutor(search, lambda texts: [QUERY] * len(texts), local_sources={})
+    previous = settings.MMR_LAMBDA
+    settings.MMR_LAMBDA = 0.5
+    try:
+        result = executor.execute(plan, "query")
+    finally:
+        settings.MMR_LAMBDA = previous
+    assert requested == [4]
+    assert result.chunks == ["dup two", "other"]
+    assert any(t.get("step") == "mmr" for t in result.timings)
+
+def test_adaptive_cutoff_and_intent_limits():
+    """Hits past the relative drop-off or under the floor are cut, within per-intent bounds."""
+    from app.core.context_selection import adaptive_cutoff, parse_top_k_limits, select_context, top_k_limits
+    from app.core.config import settings
+
+    assert adaptive_cutoff([0.9, 0.85, 0.4, 0.39], relative_drop=0.15, floor=0.2) == 2
+    assert adaptive_cutoff([0.3, 0.1], min_k=1, relative_drop=0.5, floor=0.5) == 1
+    assert adaptive_cutoff([0.3, 0.1], min_k=0, relative_drop=0.5, floor=0.5) == 0
+    assert adaptive_cutoff([], min_k=2) == 0
+
+    assert parse_top_k_limits("default=1:4, general_rag=2:6,bogus") == {"default": (1, 4), "general_rag": (2, 6)}
+    previous = settings.ADAPTIVE_TOP_K_LIMITS
+    settings.ADAPTIVE_TOP_K_LIMITS = "default=1:4,general_rag=2:6"
+    try:
+        assert top_k_limits("general_rag") == (2, 6)
+        assert top_k_limits("ai_advice", ceiling=3) == (1, 3)
+        # The collapsed tail is dropped even though max_k would allow it
+        chunks = ["best", "close", "weak"]
+        vectors = [[1.0, 0.0], [0.98, 0.2], [0.2, 1.0]]
+        assert sorted(select_context(chunks, vectors, [1.0, 0.0], "ai_advice")) == ["best", "close"]
+        assert len(select_context(chunks, vectors, [0.0, 1.0], "general_rag")) >= 2
+    finally:
+        settings.ADAPTIVE_TOP_K_LIMITS = previous
+
+if __name__ == "__main__":
+    logger.info("🚀 Starting Context Selection Test")
+    test_mmr_skips_near_duplicates()
+    test_diversify_falls_back_without_vectors()
+    test_plan_stage_diversifies_over_fetched_candidates()
+    test_adaptive_cutoff_and_intent_limits()
+    logger.info("✅ Context selection test completed")
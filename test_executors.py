@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test Bounded Executors and Load Shedding
+"""
+
+import asyncio
+import threading
+from loguru import logger
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan> - <level>{message}</level>",
+    level="INFO"
+)
+
+def test_full_queue_rejects_with_retry_after():
+    """Workers plus queue slots are admitted; the next call is rejected immediately."""
+    from app.core.executors import BoundedExecutor, ExecutorSaturated, check_capacity
+
+    pool = BoundedExecutor("test", max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        running = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        assert pool.get_stats()["in_flight"] == 1 and pool.queue_depth == 1
+        try:
+            await pool.run(release.wait)
+            assert False, "expected ExecutorSaturated"
+        except ExecutorSaturated as e:
+            assert e.name == "test" and int(e.headers()["Retry-After"]) >= 1
+        try:
+            check_capacity(pool)
+            assert False, "expected ExecutorSaturated"
+        except ExecutorSaturated:
+            pass
+        release.set()
+        assert await asyncio.gather(*running) == [True, True]
+        check_capacity(pool)
+
+    asyncio.run(scenario())
+    stats = pool.get_stats()
+    assert stats["rejected"] == 2 and stats["submitted"] == 2 and stats["queue_depth"] == 0
+    pool.shutdown()
+
+def test_timed_out_call_holds_its_slot_until_done():
+    """A caller-side timeout does not free capacity while the thread is still running."""
+    from app.core.executors import BoundedExecutor, ExecutorSaturated
+
+    pool = BoundedExecutor("test", max_workers=1, max_queue=0)
+    release = threading.Event()
+
+    async def scenario():
+        try:
+            await pool.run(release.wait, timeout=0.05)
+            assert False, "expected timeout"
+        except asyncio.TimeoutError:
+            pass
+        try:
+            await pool.run(lambda: "late")
+            assert False, "expected ExecutorSaturated"
+        except ExecutorSaturated:
+            pass
+        release.set()
+        await asyncio.sleep(0.05)
+        assert await pool.run(lambda: "late") == "late"
+
+    asyncio.run(scenario())
+    assert pool.get_stats()["timeouts"] == 1
+    pool.shutdown()
+
+def test_cancelled_queued_call_frees_its_slot():
+    """A queued call whose caller goes away never runs and gives its slot back."""
+    from app.core.executors import BoundedExecutor
+
+    pool = BoundedExecutor("test", max_workers=1, max_queue=1)
+    release = threading.Event()
+    ran = []
+
+    async def scenario():
+        running = asyncio.ensure_future(pool.run(release.wait))
+        queued = asyncio.ensure_future(pool.run(ran.append, "queued"))
+        await asyncio.sleep(0.05)
+        queued.cancel()
+        await asyncio.sleep(0.01)
+        assert pool.queue_depth == 0 and pool.has_room()
+        release.set()
+        await running
+
+    asyncio.run(scenario())
+    assert ran == []
+    pool.shutdown()
+
+if __name__ == "__main__":
+    logger.info("🚀 Starting Bounded Executor Test")
+    test_full_queue_rejects_with_retry_after()
+    test_timed_out_call_holds_its_slot_until_done()
+    test_cancelled_queued_call_frees_its_slot()
+    logger.info("✅ Bounded executor test completed")
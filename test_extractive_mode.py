@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test Extractive Degraded Mode
+"""
+
+import time
+from loguru import logger
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan> - <level>{message}</level>",
+    level="INFO"
+)
+
+CHUNKS = [
+    "[PROJECTS] Hanzla built CyberShield, a threat detection platform for small businesses. "
+    "He trained its anomaly models with scikit-learn. The UI was done in Streamlit.",
+    "Hanzla Nawaz is a Machine Learning Engineer at XEVEN Solutions. His work focuses on LLM evaluation.",
+]
+
+def test_circuit_opens_probes_and_closes():
+    """Consecutive failures open the circuit; after recovery one probe decides what happens next."""
+    from app.core.circuit_breaker import CircuitBreaker
+
+    breaker = CircuitBreaker("test", failure_threshold=2, recovery_seconds=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()        # the probe
+    assert not breaker.allow()    # everyone else waits for it
+    breaker.record_failure()
+    assert breaker.state == "open"
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+    stats = breaker.get_stats()
+    assert stats["times_opened"] == 2 and stats["rejected"] == 2
+
+def test_extractive_answer_is_grounded_and_first_person():
+    """The best-matching context sentences are returned, rewritten in first person."""
+    from app.core.extractive import extractive_answer, to_first_person
+
+    answer = extractive_answer("What did you build for threat detection?", CHUNKS, "personal_info", max_sentences=1)
+    assert "I built CyberShield, a threat detection platform" in answer
+    assert "[PROJECTS]" not in answer and "XEVEN" not in answer
+    assert to_first_person("Hanzla Nawaz is an engineer and his models run in Hanzla's lab.") == \
+        "I am an engineer and my models run in my lab."
+    assert extractive_answer("anything", [], "general_rag") is None
+
+def test_embedding_similarity_breaks_overlap_ties():
+    """Without shared terms, sentence embeddings decide; a failing embedder falls back to overlap."""
+    from app.core.extractive import extractive_answer
+
+    def embed(sentences):
+        return [[1.0, 0.0] if "Machine Learning Engineer" in s else [0.0, 1.0] for s in sentences]
+    answer = extractive_answer("Where are you employed currently?", CHUNKS, "personal_info",
+                               query_embedding=[1.0, 0.0], embed_fn=embed, max_sentences=1)
+    assert "I am a Machine Learning Engineer at XEVEN Solutions." in answer
+
+    def broken(sentences):
+        raise RuntimeError("embeddings down")
+    assert extractive_answer("threat detection", CHUNKS, "personal_info", query_embedding=[1.0, 0.0],
+                             embed_fn=broken, max_sentences=1).count("CyberShield") == 1
+
+def test_half_open_probe_is_released_when_the_llm_is_never_reached():
+    """A probe request that is shed by our own queue or cancelled gives the probe slot back."""
+    import asyncio
+    from langchain_core.runnables import RunnableLambda
+    import app.services.enhanced_chat_service as service_module
+    from app.core.circuit_breaker import CircuitBreaker
+    from app.core.config import settings
+    from app.core.llm_scheduler import FairScheduler
+    from app.services.enhanced_chat_service import EnhancedChatService, IntentType
+
+    original = (settings.CACHE_BACKEND, settings.RATE_LIMIT_ENABLED, service_module.llm_circuit,
+                service_module.llm_scheduler)
+    try:
+        settings.CACHE_BACKEND, settings.RATE_LIMIT_ENABLED = "memory", False
+        service = EnhancedChatService()
+        service._embed_documents = lambda texts: None
+        breaker = CircuitBreaker("test", failure_threshold=1, recovery_seconds=0.0)
+        breaker.record_failure()
+        service_module.llm_circuit = breaker
+
+        async def generate():
+            assert service._degraded_reason() is None        # this request becomes the probe
+            return await service._generate_response_async("threat detection", IntentType.PERSONAL_INFO,
+                                                          CHUNKS, "u", "s")
+
+        # Every provider slot is taken and nobody waits: SchedulerTimeout, degraded answer
+        busy = FairScheduler(1, {"interactive": 0.01, "background": 0.01})
+        busy.acquire(flow="someone else")
+        service_module.llm_scheduler = busy
+        response, degraded = asyncio.run(generate())
+        assert degraded and "CyberShield" in response
+        assert breaker.state == "half_open" and breaker.allow()  # the next caller may probe
+        breaker.release_probe()
+
+        # Client disconnects while the probe call is running
+        service_module.llm_scheduler = FairScheduler(1, {"interactive": 1.0, "background": 1.0})
+        service._get_llm_for_user = lambda: RunnableLambda(lambda prompt: __import__("time").sleep(0.2) or "late")
+
+        async def cancelled():
+            task = asyncio.ensure_future(generate())
+            await asyncio.sleep(0.05)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        asyncio.run(cancelled())
+        assert breaker.allow()
+    finally:
+        (settings.CACHE_BACKEND, settings.RATE_LIMIT_ENABLED, service_module.llm_circuit,
+         service_module.llm_scheduler) = original
+
+if __name__ == "__main__":
+    logger.info("🚀 Starting Extractive Mode Test")
+    test_circuit_opens_probes_and_closes()
+    test_extractive_answer_is_grounded_and_first_person()
+    test_embedding_similarity_breaks_overlap_ties()
+    test_half_open_probe_is_released_when_the_llm_is_never_reached()
+    logger.info("✅ Extractive mode test completed")
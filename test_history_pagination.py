@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Test Chat History Keyset Pagination
+"""
+
+from datetime import datetime, timedelta
+from loguru import logger
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan> - <level>{message}</level>",
+    level="INFO"
+)
+
+def test_cursor_round_trip():
+    """Cursors are opaque, URL-safe and decode to the exact (created_at, id) position."""
+    from app.core.database import encode_history_cursor, decode_history_cursor
+
+    created_at = datetime(2024, 5, 17, 13, 45, 12, 123456)
+    cursor = encode_history_cursor(created_at, 4242)
+    assert all(c.isalnum() or c in "-_" for c in cursor)
+    assert decode_history_cursor(cursor) == (created_at, 4242)
+
+    for bad in ["", "not-a-cursor", encode_history_cursor(created_at, 1)[:-3]]:
+        try:
+            decode_history_cursor(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"{bad!r} should be rejected")
+
+def test_page_query_and_next_cursor():
+    """Pages fetch one extra row to detect more results; the cursor points at the last returned row."""
+    from app.core import database
+
+    sql, params, limit = database._history_page_query("u", "s", 10_000, None)
+    assert sql == database.GET_CHAT_HISTORY_PAGE_SQL
+    assert limit == database.MAX_HISTORY_PAGE_SIZE and params[-1] == limit + 1
+
+    base = datetime(2024, 1, 1)
+    rows = [{"id": 10 - i, "created_at": base - timedelta(minutes=i)} for i in range(4)]
+    page = database._history_page(rows, 3)
+    assert len(page["messages"]) == 3
+    sql, params, _ = database._history_page_query("u", "s", 3, page["next_cursor"])
+    assert sql == database.GET_CHAT_HISTORY_PAGE_AFTER_SQL
+    assert params[2:4] == (rows[2]["created_at"], rows[2]["id"])
+
+    assert database._history_page(rows[:2], 3)["next_cursor"] is None
+
+if __name__ == "__main__":
+    logger.info("🚀 Starting History Pagination Test")
+    test_cursor_round_trip()
+    test_page_query_and_next_cursor()
+    logger.info("✅ History pagination test completed")
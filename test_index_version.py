@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test Index-Version-Aware Cache Keys
+"""
+
+import os
+import tempfile
+from loguru import logger
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan> - <level>{message}</level>",
+    level="INFO"
+)
+
+def _use_temp_version_file():
+    from app.core.config import settings
+    settings.INDEX_VERSION_PATH = os.path.join(tempfile.mkdtemp(), "index_version.json")
+
+def test_bump_changes_version():
+    """Bumping persists a new version that other readers pick up."""
+    from app.core.index_version import get_index_version, bump_index_version
+
+    _use_temp_version_file()
+    assert get_index_version() == "0"
+    new_version = bump_index_version("test")
+    assert get_index_version() == new_version
+    assert bump_index_version("again") != new_version
+
+def test_cache_key_sharing_and_invalidation():
+    """Non-personal answers are shared across users and invalidated by re-ingestion."""
+    from app.core.index_version import bump_index_version
+    from app.services.enhanced_chat_service import EnhancedChatService, IntentType
+
+    _use_temp_version_file()
+    service = EnhancedChatService.__new__(EnhancedChatService)
+
+    alice = service._cache_key("Tell me about your projects?", IntentType.PERSONAL_INFO, "alice", "s1")
+    bob = service._cache_key("tell me about your projects", IntentType.PERSONAL_INFO, "bob", "s9")
+    assert alice == bob
+
+    other_intent = service._cache_key("tell me about your projects", IntentType.GENERAL_RAG, "bob", "s9")
+    assert other_intent != alice
+
+    personal_a = service._cache_key("what was my last question", IntentType.USER_LAST_QUESTION, "alice", "s1")
+    personal_b = service._cache_key("what was my last question", IntentType.USER_LAST_QUESTION, "bob", "s1")
+    assert personal_a != personal_b
+
+    bump_index_version("re-ingest")
+    assert service._cache_key("tell me about your projects", IntentType.PERSONAL_INFO, "alice", "s1") != alice
+
+if __name__ == "__main__":
+    logger.info("🚀 Starting Index Version Test")
+    test_bump_changes_version()
+    test_cache_key_sharing_and_invalidation()
+    logger.info("✅ Index version test completed")
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test Intent Cache
+"""
+
+from loguru import logger
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan> - <level>{message}</level>",
+    level="INFO"
+)
+
+def test_normalize_query():
+    """Case, whitespace and punctuation variants should share a key."""
+    from app.core.intent_cache import normalize_query
+
+    assert normalize_query("Tell me about your   PROJECTS!") == "tell me about your projects"
+    assert normalize_query("What's your background?") == normalize_query("whats your background")
+    assert normalize_query("  hello,world ") == "hello world"
+
+def test_intent_cache_lru_and_stats():
+    """Entries are evicted least-recently-used first and hits are counted."""
+    from app.core.intent_cache import IntentCache
+
+    cache = IntentCache(max_entries=2)
+    cache.set("tell me about your projects", "v1", {"intent": "personal_info", "confidence": 0.9})
+    cache.set("what is your background", "v1", {"intent": "personal_info", "confidence": 0.8})
+
+    assert cache.get("Tell me about your projects?", "v1")["intent"] == "personal_info"
+    cache.set("hi", "v1", {"intent": "greeting", "confidence": 0.9})
+
+    # "what is your background" was least recently used
+    assert cache.get("what is your background", "v1") is None
+    assert cache.get("hi", "v1") is not None
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+    assert abs(stats["hit_rate"] - 2 / 3) < 1e-9
+
+def test_intent_cache_version_invalidation():
+    """A new prompt/classifier version never sees results from the old one."""
+    from app.core.intent_cache import IntentCache
+    from app.templates.prompt_loader import prompt_version
+
+    old_version = prompt_version("classify {query}", "1")
+    new_version = prompt_version("classify {query}", "2")
+    assert old_version != new_version
+
+    cache = IntentCache(max_entries=10)
+    cache.set("hello", old_version, {"intent": "greeting"})
+    assert cache.get("hello", new_version) is None
+    assert cache.get("hello", old_version) == {"intent": "greeting"}
+
+if __name__ == "__main__":
+    logger.info("🚀 Starting Intent Cache Test")
+    test_normalize_query()
+    test_intent_cache_lru_and_stats()
+    test_intent_cache_version_invalidation()
+    logger.info("✅ Intent cache test completed")
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Test Fair LLM Scheduling
+"""
+
+import asyncio
+import threading
+from loguru import logger
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan> - <level>{message}</level>",
+    level="INFO"
+)
+
+def _scheduler(capacity=1, max_wait=1.0, weights=None):
+    from app.core.llm_scheduler import BACKGROUND, INTERACTIVE, FairScheduler
+    return FairScheduler(capacity, {INTERACTIVE: max_wait, BACKGROUND: max_wait}, weights)
+
+def _serve_order(scheduler, requests):
+    """Queue (flow, priority) calls behind one held slot, then record the order they are served."""
+    order = []
+
+    async def call(flow, priority):
+        async with scheduler.slot_async(priority, flow):
+            order.append(flow)
+            await asyncio.sleep(0)
+
+    async def scenario():
+        await scheduler.acquire_async(flow="holder")
+        tasks = []
+        for flow, priority in requests:
+            tasks.append(asyncio.ensure_future(call(flow, priority)))
+            await asyncio.sleep(0)
+        scheduler.release()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+    return order
+
+def test_heavy_client_cannot_starve_others():
+    """A light client's single call is served right after the heavy client's first, not after all."""
+    order = _serve_order(_scheduler(), [("scraper", "interactive")] * 4 + [("visitor", "interactive")])
+    assert order.index("visitor") <= 1
+    assert order.count("scraper") == 4
+
+def test_weights_and_priority_classes():
+    """Weighted flows get proportionally more turns; interactive always goes before background."""
+    order = _serve_order(_scheduler(weights={"vip": 2.0}), [("vip", "interactive")] * 4 + [("guest", "interactive")] * 4)
+    assert order[:3].count("vip") == 2 and order[:6].count("vip") >= 4
+    order = _serve_order(_scheduler(), [("warmer", "background")] * 3 + [("visitor", "interactive")])
+    assert order[0] == "visitor"
+
+def test_max_wait_raises_and_releases_nothing():
+    """Giving up after max wait leaves capacity intact; sync (thread) callers work too."""
+    from app.core.llm_scheduler import SchedulerTimeout
+
+    scheduler = _scheduler(max_wait=0.05)
+    scheduler.acquire(flow="holder")
+    try:
+        scheduler.acquire(flow="late")
+        assert False, "expected SchedulerTimeout"
+    except SchedulerTimeout:
+        pass
+
+    async def late_async():
+        try:
+            await scheduler.acquire_async(flow="late")
+            assert False, "expected SchedulerTimeout"
+        except SchedulerTimeout:
+            pass
+    asyncio.run(late_async())
+    stats = scheduler.get_stats()
+    assert stats["timeouts"]["interactive"] == 2 and stats["active"] == 1 and stats["waiting"]["interactive"] == 0
+
+    served = threading.Event()
+    worker = threading.Thread(target=lambda: (scheduler.acquire(flow="next"), served.set()))
+    scheduler.max_wait["interactive"] = 1.0
+    worker.start()
+    scheduler.release()
+    worker.join(1.0)
+    assert served.is_set() and scheduler.get_stats()["active"] == 1
+
+def test_request_flow():
+    """Endpoints key flows by address when known; the flow follows the request's context."""
+    from app.core.llm_scheduler import _request_flow, flow_key, parse_weights, set_request_flow
+
+    assert flow_key("alice", "10.0.0.5") == "ip:10.0.0.5"
+    assert flow_key("alice") == "user:alice" and flow_key("anonymous") == "anonymous"
+    assert parse_weights("ip:10.0.0.5=4, user:bot=0.25,bad,zero=0") == {"ip:10.0.0.5": 4.0, "user:bot": 0.25}
+
+    async def request():
+        set_request_flow("alice")
+        return _request_flow.get()
+    assert asyncio.run(request()) == "user:alice"
+    assert _request_flow.get() == "anonymous"
+
+def test_run_holds_slot_until_timed_out_call_finishes():
+    """A caller that gives up on a provider call does not free its slot while the call still runs."""
+    from app.core.executors import BoundedExecutor
+    from app.core.llm_scheduler import FairScheduler
+
+    scheduler = FairScheduler(1, {"interactive": 5.0, "background": 5.0})
+    pool = BoundedExecutor("test-llm", max_workers=2, max_queue=0)
+    provider_done = threading.Event()
+
+    async def scenario():
+        try:
+            await scheduler.run(pool, provider_done.wait, timeout=0.05)
+            assert False, "expected a timeout"
+        except asyncio.TimeoutError:
+            pass
+        assert scheduler.get_stats()["active"] == 1
+        provider_done.set()
+        await asyncio.sleep(0.05)
+        assert scheduler.get_stats()["active"] == 0
+        assert await scheduler.run(pool, lambda: "next") == "next"
+    try:
+        asyncio.run(scenario())
+    finally:
+        provider_done.set()
+        pool.shutdown()
+
+def test_legacy_endpoint_waits_for_a_slot_before_using_an_executor_thread():
+    """/chat generation takes the scheduler slot first, so waiting calls never pin LLM executor threads."""
+    import app.api.endpoints.chat as chat
+    from langchain_core.runnables import RunnableLambda
+    from app.core.executors import BoundedExecutor
+    from app.core.llm_scheduler import FairScheduler
+
+    original = (chat.llm_scheduler, chat.llm_executor)
+    scheduler = FairScheduler(1, {"interactive": 5.0, "background": 5.0})
+    pool = BoundedExecutor("test-llm", max_workers=1, max_queue=4)
+    chat.llm_scheduler, chat.llm_executor = scheduler, pool
+    try:
+        pending = chat.PendingGeneration(RunnableLambda(lambda inputs: f"answer to {inputs['query']}"),
+                                         {"query": "q", "context": ""}, "q", "general_rag", "")
+
+        async def scenario():
+            scheduler.acquire(flow="someone else")
+            task = asyncio.ensure_future(chat.generate_async(pending))
+            await asyncio.sleep(0.05)
+            assert scheduler.get_stats()["waiting"]["interactive"] == 1
+            assert pool.get_stats()["submitted"] == 0
+            scheduler.release()
+            return await task
+        assert asyncio.run(scenario()) == "answer to q"
+        assert scheduler.get_stats()["active"] == 0
+    finally:
+        chat.llm_scheduler, chat.llm_executor = original
+        pool.shutdown()
+
+if __name__ == "__main__":
+    logger.info("🚀 Starting LLM Scheduler Test")
+    test_heavy_client_cannot_starve_others()
+    test_weights_and_priority_classes()
+    test_max_wait_raises_and_releases_nothing()
+    test_request_flow()
+    test_run_holds_slot_until_timed_out_call_finishes()
+    test_legacy_endpoint_waits_for_a_slot_before_using_an_executor_thread()
+    logger.info("✅ LLM scheduler test completed")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test Namespace Router
+"""
+
+import os
+import tempfile
+import numpy as np
+from loguru import logger
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan> - <level>{message}</level>",
+    level="INFO"
+)
+
+def _cluster(center, n=20, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.asarray(center, dtype=np.float32) + rng.normal(0, 0.05, size=(n, len(center))).astype(np.float32)
+
+def test_routes_to_closest_namespaces_and_persists():
+    """Queries go to the top-m namespaces; codebooks survive a save/load round trip."""
+    from app.core.namespace_router import NamespaceRouter
+
+    with tempfile.TemporaryDirectory() as tmp:
+        router = NamespaceRouter(path=os.path.join(tmp, "router.npz"), top_m=1, min_score=0.99, codebook_size=2)
+        sizes = router.fit({
+            "projects": _cluster([1, 0, 0, 0]),
+            "cybersecurity": _cluster([0, 1, 0, 0], seed=1),
+            "background": np.vstack([_cluster([0, 0, 1, 0], seed=2), _cluster([0, 0, 0, 1], seed=3)]),
+        })
+        assert sizes == {"projects": 2, "cybersecurity": 2, "background": 2}
+        assert router.save()
+
+        restored = NamespaceRouter(path=router.path, top_m=1, min_score=0.99)
+        assert restored.route([0.1, 0.9, 0, 0], ["projects", "cybersecurity", "background"]) == ["cybersecurity"]
+        # Both background sub-clusters are covered by its codebook
+        assert restored.route([0, 0, 0, 1], ["projects", "cybersecurity", "background"]) == ["background"]
+        # Namespaces without a codebook are always searched
+        assert restored.route([1, 0, 0, 0], ["projects", "general"]) == ["projects", "general"]
+        restored.min_score = 0.5
+        routed = restored.route([0.7, 0.7, 0, 0], ["projects", "cybersecurity", "background"])
+        assert sorted(routed) == ["cybersecurity", "projects"]
+        assert restored.get_stats()["fanout_ratio"] < 1
+
+def test_unfitted_or_mismatched_router_searches_everything():
+    """Without usable codebooks the full fan-out is kept."""
+    from app.core.namespace_router import NamespaceRouter
+
+    with tempfile.TemporaryDirectory() as tmp:
+        router = NamespaceRouter(path=os.path.join(tmp, "missing.npz"), top_m=1)
+        candidates = ["projects", "background"]
+        assert router.route([1.0, 0.0], candidates) == candidates
+        router.fit({"projects": _cluster([1, 0, 0])})
+        assert router.route([1.0, 0.0], candidates) == candidates
+        assert router.route(None, candidates) == candidates
+        assert router.get_stats()["passthrough"] == 3
+
+if __name__ == "__main__":
+    logger.info("🚀 Starting Namespace Router Test")
+    test_routes_to_closest_namespaces_and_persists()
+    test_unfitted_or_mismatched_router_searches_everything()
+    logger.info("✅ Namespace router test completed")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test Project Catalog
+"""
+
+import os
+import tempfile
+from loguru import logger
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan> - <level>{message}</level>",
+    level="INFO"
+)
+
+MELANOMA = """Melanoma Cancer Prediction
+
+A deep learning model that classifies dermoscopic images as benign or malignant melanoma using transfer learning on EfficientNet.
+
+Tech stack: TensorFlow, Keras, Streamlit.
+"""
+
+def _write(directory, name, text):
+    with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+        f.write(text)
+
+def test_catalog_builds_persists_and_refreshes():
+    """Ingestion builds the catalog with chunk ids; it reloads from disk and follows file changes."""
+    from app.core.enhanced_data_loader import EnhancedDataLoader
+    from app.core.project_catalog import ProjectCatalog
+
+    with tempfile.TemporaryDirectory() as tmp:
+        projects_dir = os.path.join(tmp, "projects")
+        os.makedirs(projects_dir)
+        _write(projects_dir, "melanoma_project_summary.txt", MELANOMA)
+        path = os.path.join(tmp, "catalog.json")
+
+        loader = EnhancedDataLoader()
+        documents = loader.load_projects_directory(projects_dir)
+        chunks = loader.create_namespaced_chunks(documents)["projects"]
+        catalog = ProjectCatalog(path=path, projects_dir=projects_dir, check_interval=0)
+        entries = catalog.build(documents, chunks)
+        assert catalog.save()
+        assert [e.name for e in entries] == ["melanoma"]
+        assert entries[0].title == "Melanoma Cancer Prediction"
+        assert entries[0].summary.startswith("A deep learning model")
+        assert entries[0].chunk_ids == [c.metadata["chunk_id"] for c in chunks]
+
+        # Startup load needs no rebuild while the files are unchanged
+        restored = ProjectCatalog(path=path, projects_dir=projects_dir, check_interval=0)
+        assert restored.load() == 1
+        assert restored.get_stats()["rebuilds"] == 0
+        assert "Melanoma Cancer Prediction" in restored.render()
+
+        _write(projects_dir, "nutrition_analyzer.txt", "Nutrition Analyzer\n\nAn app that estimates calories and macros from meal photos using a vision model.\n")
+        assert [e.name for e in restored.entries()] == ["melanoma", "nutrition_analyzer"]
+        assert restored.get_stats()["rebuilds"] == 1
+        assert ProjectCatalog(path=path, projects_dir=projects_dir).load() == 2
+
+def test_overview_plan_is_served_from_catalog():
+    """The catalog step answers generic project questions without embedding or searching."""
+    from app.core.retrieval_plans import PlanExecutor, select_plan
+
+    calls = []
+    executor = PlanExecutor(lambda *a: calls.append(a) or [], lambda texts: calls.append(texts) or [[0.0]] * len(texts),
+                            local_sources={"@catalog": lambda top_k: [("[PROJECTS] catalog", 1.0)]})
+    result = executor.execute(select_plan("What projects have you done?"), "What projects have you done?")
+    assert result.stage == 0 and result.chunks == ["[PROJECTS] catalog"] and result.from_catalog
+    assert calls == []
+
+    # An empty catalog falls through to the vector stages, whose chunks are not the catalog
+    executor = PlanExecutor(lambda *a: [("projects chunk", 0.8)], lambda texts: [[0.0]] * len(texts),
+                            local_sources={"@catalog": lambda top_k: []})
+    result = executor.execute(select_plan("What projects have you done?"), "What projects have you done?")
+    assert result.stage == 1 and result.chunks and not result.from_catalog
+
+if __name__ == "__main__":
+    logger.info("🚀 Starting Project Catalog Test")
+    test_catalog_builds_persists_and_refreshes()
+    test_overview_plan_is_served_from_catalog()
+    logger.info("✅ Project catalog test completed")
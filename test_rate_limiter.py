@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test GCRA Rate Limiter
+"""
+
+import os
+import tempfile
+from loguru import logger
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan> - <level>{message}</level>",
+    level="INFO"
+)
+
+def test_parse_rate():
+    """Rate strings accept plain and multiplied units; empty or zero disables the rule."""
+    from app.core.rate_limiter import parse_rate
+
+    assert parse_rate("3/day").period == 86400
+    assert parse_rate("60 / hours").limit == 60
+    assert parse_rate("10/30s").period == 30
+    assert parse_rate("") is None
+    assert parse_rate("0/day") is None
+    try:
+        parse_rate("lots")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("invalid rate should raise")
+
+def _exercise_store(store):
+    from app.core.rate_limiter import RateLimiter, Rate
+
+    limiter = RateLimiter(store, per_user=Rate(3, 300), per_ip=None)
+    decisions = [limiter.check("alice", None) for _ in range(4)]
+    assert [d.allowed for d in decisions] == [True, True, True, False]
+    assert [d.remaining for d in decisions[:3]] == [2, 1, 0]
+    rejected = decisions[3]
+    # One slot frees up every period / limit seconds
+    assert 99 <= rejected.retry_after <= 100
+    assert rejected.headers()["Retry-After"] == "100"
+    assert rejected.headers()["X-RateLimit-Limit"] == "3"
+    # Other users are unaffected
+    assert limiter.check("bob", None).allowed
+
+def test_memory_store_limits_burst_then_refills():
+    """The burst is capped at the limit and capacity refills continuously."""
+    import time
+    from app.core.rate_limiter import MemoryRateLimitStore, Rate
+
+    _exercise_store(MemoryRateLimitStore())
+
+    store = MemoryRateLimitStore()
+    rate = Rate(2, 10)
+    now = time.time()
+    assert store.acquire("k", rate, now)[0]
+    assert store.acquire("k", rate, now)[0]
+    assert not store.acquire("k", rate, now + 4.9)[0]
+    assert store.acquire("k", rate, now + 5.0)[0]
+    # Idle keys expire once their TAT has passed
+    store.acquire("other", rate, now + 100)
+    assert len(store) == 1
+
+def test_sqlite_store_is_shared_between_instances():
+    """Two stores on the same file (e.g. two workers) enforce one combined limit."""
+    from app.core.rate_limiter import SQLiteRateLimitStore, RateLimiter, Rate
+
+    path = os.path.join(tempfile.mkdtemp(), "rate_limits.sqlite3")
+    _exercise_store(SQLiteRateLimitStore(path))
+
+    worker_a = RateLimiter(SQLiteRateLimitStore(path), per_user=Rate(2, 60), per_ip=None)
+    worker_b = RateLimiter(SQLiteRateLimitStore(path), per_user=Rate(2, 60), per_ip=None)
+    assert worker_a.check("carol", None).allowed
+    assert worker_b.check("carol", None).allowed
+    assert not worker_a.check("carol", None).allowed
+
+def test_ip_limit_applies_across_users():
+    """The per-IP rule catches clients rotating user ids."""
+    from app.core.rate_limiter import MemoryRateLimitStore, RateLimiter, Rate
+
+    limiter = RateLimiter(MemoryRateLimitStore(), per_user=Rate(5, 60), per_ip=Rate(2, 60))
+    assert limiter.check("u1", "10.0.0.1").allowed
+    assert limiter.check("u2", "10.0.0.1").allowed
+    decision = limiter.check("u3", "10.0.0.1")
+    assert not decision.allowed and decision.scope == "ip"
+    assert limiter.check("u3", "10.0.0.2").allowed
+    assert limiter.get_stats()["rejected"] == 1
+
+def test_rejected_request_uses_no_quota():
+    """A request rejected by the user limit does not count against the IP limit (and vice versa)."""
+    from app.core.rate_limiter import MemoryRateLimitStore, RateLimiter, Rate, SQLiteRateLimitStore
+
+    path = os.path.join(tempfile.mkdtemp(), "limits.sqlite3")
+    for store in (MemoryRateLimitStore(), SQLiteRateLimitStore(path)):
+        limiter = RateLimiter(store, per_user=Rate(1, 60), per_ip=Rate(3, 60))
+        assert limiter.check("dave", "10.0.0.9").allowed
+        for _ in range(3):
+            decision = limiter.check("dave", "10.0.0.9")
+            assert not decision.allowed and decision.scope == "user"
+        # The IP still has two of its three requests left
+        assert limiter.check("erin", "10.0.0.9").allowed
+        assert limiter.check("frank", "10.0.0.9").allowed
+        assert limiter.check("gina", "10.0.0.9").scope == "ip"
+
+if __name__ == "__main__":
+    logger.info("🚀 Starting Rate Limiter Test")
+    test_parse_rate()
+    test_memory_store_limits_burst_then_refills()
+    test_sqlite_store_is_shared_between_instances()
+    test_ip_limit_applies_across_users()
+    test_rejected_request_uses_no_quota()
+    logger.info("✅ Rate limiter test completed")
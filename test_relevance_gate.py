@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test Relevance Gate
+"""
+
+from loguru import logger
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan> - <level>{message}</level>",
+    level="INFO"
+)
+
+def test_gate_skips_low_relevance_for_gated_intents():
+    """Only configured intents are gated, and only when retrieval produced a score."""
+    from app.core.config import settings
+    from app.core.relevance_gate import RelevanceGate, parse_thresholds
+
+    assert parse_thresholds("personal_info=0.3, general_rag=0.25,oops") == {"personal_info": 0.3, "general_rag": 0.25}
+    previous = settings.RELEVANCE_GATE_THRESHOLDS
+    settings.RELEVANCE_GATE_THRESHOLDS = "personal_info=0.3"
+    try:
+        gate = RelevanceGate()
+        assert gate.should_skip_llm("personal_info", 0.1)
+        assert gate.should_skip_llm("personal_info", 0.0)
+        assert not gate.should_skip_llm("personal_info", 0.45)
+        assert not gate.should_skip_llm("personal_info", None)
+        assert not gate.should_skip_llm("ai_advice", 0.01)
+        stats = gate.get_stats()
+        assert (stats["checked"], stats["passed"], stats["llm_calls_saved"]) == (3, 1, 2)
+        assert stats["saved_by_intent"] == {"personal_info": 2}
+    finally:
+        settings.RELEVANCE_GATE_THRESHOLDS = previous
+
+def test_gate_thresholds_per_score_scale_and_greetings_pass():
+    """Match and rerank scores have their own thresholds; greetings are never gated."""
+    from app.core.config import settings
+    from app.core.relevance_gate import MATCH_SCORE, RERANK_SCORE, RelevanceGate, is_greeting
+
+    previous = settings.RELEVANCE_GATE_THRESHOLDS, settings.RELEVANCE_GATE_RERANK_THRESHOLDS
+    settings.RELEVANCE_GATE_THRESHOLDS = "personal_info=0.5"
+    settings.RELEVANCE_GATE_RERANK_THRESHOLDS = "personal_info=0.2"
+    try:
+        gate = RelevanceGate()
+        assert gate.should_skip_llm("personal_info", 0.3, MATCH_SCORE, "What's your favourite food?")
+        assert not gate.should_skip_llm("personal_info", 0.3, RERANK_SCORE, "What's your favourite food?")
+        assert not gate.should_skip_llm("personal_info", 0.05, MATCH_SCORE, "Hi there!")
+        assert not gate.should_skip_llm("personal_info", 0.05, RERANK_SCORE, "Who are you?")
+        stats = gate.get_stats()
+        assert stats["thresholds"] == {MATCH_SCORE: {"personal_info": 0.5}, RERANK_SCORE: {"personal_info": 0.2}}
+        assert (stats["checked"], stats["greetings_exempted"], stats["llm_calls_saved"]) == (2, 2, 1)
+    finally:
+        settings.RELEVANCE_GATE_THRESHOLDS, settings.RELEVANCE_GATE_RERANK_THRESHOLDS = previous
+    assert is_greeting("Good morning") and is_greeting("hello, what's your name?")
+    assert not is_greeting("What is the hierarchy of your projects?")
+
+def test_fallback_search_scores_the_gate():
+    """When the plan fails, the similarity_search fallback's scores still feed the gate."""
+    from langchain_core.documents import Document
+    from langchain_core.runnables import RunnableLambda
+    from app.api.endpoints import chat
+    from app.core.config import settings
+
+    class Store:
+        def similarity_search_with_score(self, query, k=3):
+            return [(Document(page_content="Hanzla studied at university."), 0.05)]
+
+    def broken_plan(*args, **kwargs):
+        raise RuntimeError("index unavailable")
+
+    previous = settings.RELEVANCE_GATE_THRESHOLDS, chat.plan_executor.execute, chat.get_llm
+    settings.RELEVANCE_GATE_THRESHOLDS = "personal_info=0.3"
+    chat.plan_executor.execute = broken_plan
+    chat.get_llm = lambda *a, **k: RunnableLambda(lambda prompt: "generated answer")
+    try:
+        answer = chat.prepare_response("What car do you drive?", "personal_info", Store())
+        assert answer == chat.no_information_answer("What car do you drive?", "personal_info")
+        assert isinstance(chat.prepare_response("Hello!", "personal_info", Store()), chat.PendingGeneration)
+    finally:
+        settings.RELEVANCE_GATE_THRESHOLDS, chat.plan_executor.execute, chat.get_llm = previous
+
+def test_templated_answer_links_relevant_profile():
+    """The reply follows PERSONAL_CONTEXT's template with a profile link picked by query or intent."""
+    from app.core.relevance_gate import PROFILE_LINKS, no_information_answer
+
+    assert PROFILE_LINKS["GitHub"] == "https://github.com/Hanzla-Nawaz"
+    answer = no_information_answer("Is that code on your repo?", "personal_info")
+    assert answer.startswith("I don't have that specific information in my knowledge base.")
+    assert "GitHub (https://github.com/Hanzla-Nawaz)" in answer
+    assert "LinkedIn" in no_information_answer("What's your favourite career advice?", "career_guidance")
+    assert "Portfolio" in no_information_answer("What's your favourite colour?", "personal_info")
+
+def test_plan_result_reports_best_score():
+    """Plans expose the best match score, 0.0 when nothing matched and None when nothing was searched."""
+    from app.core.retrieval_plans import PlanExecutor, RetrievalPlan, RetrievalStage, RetrievalStep
+
+    plan = RetrievalPlan("test", (RetrievalStage((RetrievalStep("projects"),)),))
+    embed = lambda texts: [[1.0]] * len(texts)
+    assert PlanExecutor(lambda *a: [("hit", 0.42)], embed, local_sources={}).execute(plan, "q").best_score == 0.42
+    assert PlanExecutor(lambda *a: [], embed, local_sources={}).execute(plan, "q").best_score == 0.0
+    def broken(texts):
+        raise RuntimeError("no embeddings")
+    assert PlanExecutor(lambda *a: [], broken, local_sources={}).execute(plan, "q").best_score is None
+
+if __name__ == "__main__":
+    logger.info("🚀 Starting Relevance Gate Test")
+    test_gate_skips_low_relevance_for_gated_intents()
+    test_gate_thresholds_per_score_scale_and_greetings_pass()
+    test_fallback_search_scores_the_gate()
+    test_templated_answer_links_relevant_profile()
+    test_plan_result_reports_best_score()
+    logger.info("✅ Relevance gate test completed")
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Test Response Cache
+"""
+
+import os
+import tempfile
+import time
+from loguru import logger
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan> - <level>{message}</level>",
+    level="INFO"
+)
+
+def test_lru_eviction_by_entry_count():
+    """The least recently used entry is evicted once max_entries is exceeded."""
+    from app.core.cache import MemoryCacheBackend
+
+    cache = MemoryCacheBackend(max_entries=2, max_bytes=1024 * 1024, default_ttl=None)
+    cache.set("a", "answer a")
+    cache.set("b", "answer b")
+    assert cache.get("a") == "answer a"
+    cache.set("c", "answer c")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "answer a"
+    stats = cache.get_stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+
+def test_byte_budget_is_respected():
+    """Total cached bytes never exceed max_bytes."""
+    from app.core.cache import MemoryCacheBackend
+
+    cache = MemoryCacheBackend(max_entries=1000, max_bytes=2000, default_ttl=None)
+    for i in range(50):
+        cache.set(f"key-{i}", "x" * 300)
+    stats = cache.get_stats()
+    assert stats["bytes"] <= 2000
+    assert stats["entries"] < 50
+    assert stats["evictions"] == 50 - stats["entries"]
+
+def test_ttl_expiry():
+    """Expired entries count as misses and are removed."""
+    from app.core.cache import MemoryCacheBackend
+
+    cache = MemoryCacheBackend(max_entries=10, max_bytes=1024 * 1024, default_ttl=0.05)
+    cache.set("short", "value")
+    cache.set("long", "value", ttl=60)
+    time.sleep(0.1)
+    assert cache.get("short") is None
+    assert cache.get("long") == "value"
+    assert cache.get_stats()["expirations"] == 1
+    assert cache.get_stats()["bytes"] == cache._entries["long"].size_bytes
+
+def test_selective_invalidation():
+    """Predicate invalidation removes only matching keys."""
+    from app.core.cache import MemoryCacheBackend
+
+    cache = MemoryCacheBackend(max_entries=10, max_bytes=1024 * 1024, default_ttl=None)
+    cache.set("chat_cache:alice:s1:hi", 1)
+    cache.set("chat_cache:alice:s2:hello", 2)
+    cache.set("chat_cache:bob:s1:hi", 3)
+    assert cache.invalidate(lambda k: k.startswith("chat_cache:alice:")) == 2
+    assert len(cache) == 1
+    assert "chat_cache:bob:s1:hi" in cache
+
+def test_sqlite_backend_survives_restart():
+    """Entries written by one worker are visible after a restart or from another worker."""
+    from app.core.cache import SQLiteCacheBackend
+
+    path = os.path.join(tempfile.mkdtemp(), "cache.sqlite3")
+    worker_a = SQLiteCacheBackend(path, max_entries=10, max_bytes=1024 * 1024, default_ttl=60)
+    worker_a.set("chat_cache:u:s:hello", {"response": "Hi there!", "sources": ["kb"]})
+
+    # A fresh instance stands in for another worker / a restarted worker
+    worker_b = SQLiteCacheBackend(path, max_entries=10, max_bytes=1024 * 1024, default_ttl=60)
+    assert worker_b.get("chat_cache:u:s:hello") == {"response": "Hi there!", "sources": ["kb"]}
+    assert worker_b.get("missing") is None
+
+    # Reads are counted in worker_b until its next flush
+    worker_b.flush()
+    stats = worker_a.get_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["entries"] == 1
+
+def test_sqlite_backend_bounds_and_ttl():
+    """The shared backend evicts least recently used entries and honours TTLs."""
+    from app.core.cache import SQLiteCacheBackend
+
+    path = os.path.join(tempfile.mkdtemp(), "cache.sqlite3")
+    cache = SQLiteCacheBackend(path, max_entries=2, max_bytes=1024 * 1024, default_ttl=60)
+    cache.set("a", 1)
+    time.sleep(0.01)
+    cache.set("b", 2)
+    time.sleep(0.01)
+    assert cache.get("a") == 1
+    time.sleep(0.01)
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert len(cache) == 2
+
+    cache.set("short", "x", ttl=0.05)
+    time.sleep(0.1)
+    assert cache.get("short") is None
+    assert cache.get_stats()["evictions"] >= 1
+
+def test_sqlite_reads_do_not_take_the_write_lock():
+    """Gets succeed while another worker holds the write lock; totals track replaces and deletes."""
+    import sqlite3
+    from app.core.cache import SQLiteCacheBackend, encode_value
+
+    path = os.path.join(tempfile.mkdtemp(), "cache.sqlite3")
+    cache = SQLiteCacheBackend(path, max_entries=10, max_bytes=1024 * 1024, default_ttl=60, flush_interval=3600)
+    cache.set("a", "first")
+    cache.set("a", "second answer")
+    cache.set("b", "other")
+    stats = cache.get_stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] == len(encode_value("second answer")) + len(encode_value("other"))
+
+    writer = sqlite3.connect(path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    started = time.time()
+    assert cache.get("a") == "second answer"
+    assert cache.get("missing") is None
+    assert time.time() - started < 1.0
+    writer.execute("ROLLBACK")
+
+    assert cache.get_stats()["hits"] == 1
+    assert cache.delete("a") and not cache.delete("a")
+    assert cache.get_stats()["entries"] == len(cache) == 1
+
+class LocalRedisStandIn:
+    """Minimal in-process stand-in for the Redis commands used by RedisCacheBackend."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, name):
+        return self.data.get(name)
+
+    def set(self, name, value, ex=None):
+        self.data[name] = value
+
+    def delete(self, name):
+        return 1 if self.data.pop(name, None) is not None else 0
+
+    def incr(self, name):
+        self.data[name] = int(self.data.get(name) or 0) + 1
+        return self.data[name]
+
+    def scan_iter(self, match=None):
+        prefix = (match or "*").rstrip("*")
+        return [key for key in list(self.data) if key.startswith(prefix)]
+
+    def ttl(self, name):
+        return -1
+
+    def strlen(self, name):
+        return len(self.data.get(name) or b"")
+
+def test_redis_backend_against_stand_in():
+    """The Redis-protocol backend round-trips compressed values and counts hits."""
+    from app.core.cache import RedisCacheBackend
+
+    cache = RedisCacheBackend(client=LocalRedisStandIn(), default_ttl=60)
+    cache.set("chat_cache:u:s:projects", {"response": "CyberShield, GenEval"})
+    assert cache.get("chat_cache:u:s:projects") == {"response": "CyberShield, GenEval"}
+    assert cache.get("nope") is None
+    assert len(cache) == 1
+    assert cache.invalidate(lambda k: k.endswith(":projects")) == 1
+    stats = cache.get_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["entries"] == 0
+
+if __name__ == "__main__":
+    logger.info("🚀 Starting Response Cache Test")
+    test_lru_eviction_by_entry_count()
+    test_byte_budget_is_respected()
+    test_ttl_expiry()
+    test_selective_invalidation()
+    test_sqlite_backend_survives_restart()
+    test_sqlite_backend_bounds_and_ttl()
+    test_sqlite_reads_do_not_take_the_write_lock()
+    test_redis_backend_against_stand_in()
+    logger.info("✅ Response cache test completed")
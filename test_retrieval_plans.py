@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Test Retrieval Plans
+"""
+
+import threading
+import time
+from loguru import logger
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan> - <level>{message}</level>",
+    level="INFO"
+)
+
+class StubIndex:
+    """Fake namespace search: canned matches per (namespace, query) with an optional delay."""
+
+    def __init__(self, matches, delay=0.0):
+        self.matches = matches
+        self.delay = delay
+        self.calls = []
+        self.embedded = []
+        self.lock = threading.Lock()
+
+    def embed(self, texts):
+        self.embedded.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+    def search(self, namespace, vector, top_k):
+        with self.lock:
+            self.calls.append((namespace, top_k))
+        time.sleep(self.delay)
+        return self.matches.get((namespace, vector[0]), [])[:top_k]
+
+def test_plan_selection():
+    """Keyword rules pick the plan and intents add their namespace as a last resort."""
+    from app.core.retrieval_plans import select_plan
+
+    assert select_plan("What is Hanzla's education?").name == "background"
+    assert select_plan("Show me your projects").name == "project_overview"
+    assert select_plan("Tell me about the melanoma project").name == "project_specific"
+    assert select_plan("What is a transformer?").name == "general"
+    plan = select_plan("What is a transformer?", "ai_advice")
+    assert plan.stages[-1].steps[0].namespace == "ai_ml"
+
+def test_fallback_and_cross_namespace_ranking():
+    """Empty stages fall through; "*" steps are ranked by score, labelled and de-duplicated."""
+    from app.core.retrieval_plans import PlanExecutor, select_plan
+
+    query = "Tell me about Hanzla's background"
+    key = float(len(query))
+    index = StubIndex({
+        ("cybersecurity", key): [("SOC analyst", 0.85)],
+        ("ai_ml", key): [("LLM evals", 0.9), ("SOC analyst", 0.8)],
+    })
+    result = PlanExecutor(index.search, index.embed).execute(select_plan(query), query)
+    assert result.plan == "background" and result.stage == 1
+    assert result.chunks == ["[AI_ML] LLM evals", "[CYBERSECURITY] SOC analyst"]
+    assert index.embedded == [[query], [query]]
+    assert any(t.get("namespace") == "background" for t in result.timings)
+
+def test_overview_runs_concurrently_and_stops_early():
+    """Without a catalog, showcase queries run in parallel, are embedded in one batch, and stop once enough chunks arrive."""
+    from app.core.executors import BoundedExecutor
+    from app.core.retrieval_plans import PROJECT_SHOWCASE_QUERIES, PlanExecutor, select_plan
+
+    matches = {("projects", float(len(q))): [(f"about {q}", 0.5)] for q in PROJECT_SHOWCASE_QUERIES}
+    index = StubIndex(matches, delay=0.1)
+    pool = BoundedExecutor("test-vector", max_workers=8, max_queue=8)
+    executor = PlanExecutor(index.search, index.embed, pool=pool,
+                            local_sources={"@catalog": lambda top_k: []})
+    start = time.perf_counter()
+    result = executor.execute(select_plan("What projects have you done?"), "What projects have you done?")
+    assert time.perf_counter() - start < 0.3
+    assert result.stage == 1 and len(result.chunks) == 3
+    assert len(index.embedded) == 1 and len(index.embedded[0]) == len(PROJECT_SHOWCASE_QUERIES)
+
+def test_steps_are_shed_when_the_vector_pool_is_full():
+    """Plan steps share the bounded vector pool, so a full queue sheds instead of queueing privately."""
+    from app.core.executors import BoundedExecutor, ExecutorSaturated
+    from app.core.retrieval_plans import PlanExecutor, select_plan
+
+    pool = BoundedExecutor("test-vector", max_workers=1, max_queue=0)
+    release = threading.Event()
+    pool.submit(release.wait)
+    index = StubIndex({("background", 1.0): [("MSc graduate", 0.9)]})
+    try:
+        PlanExecutor(index.search, index.embed, pool=pool).execute(select_plan("your background"), "your background")
+        assert False, "expected ExecutorSaturated"
+    except ExecutorSaturated as e:
+        assert e.name == "test-vector"
+    finally:
+        release.set()
+        pool.shutdown()
+
+def test_shed_stage_cancels_the_steps_it_queued():
+    """When the pool fills up partway through a stage, the steps already queued are cancelled."""
+    from app.core.executors import BoundedExecutor, ExecutorSaturated
+    from app.core.retrieval_plans import PlanExecutor, RetrievalPlan, RetrievalStage, RetrievalStep
+
+    pool = BoundedExecutor("test-vector", max_workers=1, max_queue=1)
+    release = threading.Event()
+    blocker = pool.submit(release.wait)
+    index = StubIndex({})
+    plan = RetrievalPlan("test", (RetrievalStage(tuple(RetrievalStep(ns) for ns in ("a", "b", "c"))),))
+    try:
+        PlanExecutor(index.search, index.embed, pool=pool, local_sources={}).execute(plan, "q")
+        assert False, "expected ExecutorSaturated"
+    except ExecutorSaturated:
+        assert pool.queue_depth == 0
+    finally:
+        release.set()
+        blocker.result()
+        pool.shutdown()
+    assert index.calls == []
+
+if __name__ == "__main__":
+    logger.info("🚀 Starting Retrieval Plans Test")
+    test_plan_selection()
+    test_fallback_and_cross_namespace_ranking()
+    test_overview_runs_concurrently_and_stops_early()
+    test_steps_are_shed_when_the_vector_pool_is_full()
+    test_shed_stage_cancels_the_steps_it_queued()
+    logger.info("✅ Retrieval plans test completed")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test Semantic Answer Cache
+"""
+
+import numpy as np
+from loguru import logger
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan> - <level>{message}</level>",
+    level="INFO"
+)
+
+PROJECTS = [1.0, 0.0, 0.0, 0.0]
+PROJECTS_PARAPHRASE = [0.98, 0.15, 0.0, 0.0]
+EDUCATION = [0.0, 0.0, 1.0, 0.0]
+
+def test_paraphrase_hits_within_namespace():
+    """A close embedding in the same namespace reuses the stored answer."""
+    from app.core.semantic_cache import SemanticCache
+
+    cache = SemanticCache(capacity=4, threshold=0.95)
+    cache.add(PROJECTS, "shared:personal_info:p1:i1", "personal_info", "tell me about your projects", {"response": "CyberShield"})
+
+    hit = cache.lookup(PROJECTS_PARAPHRASE, "shared:personal_info:p1:i1", "personal_info")
+    assert hit is not None and hit.entry.value == {"response": "CyberShield"}
+    assert hit.similarity > 0.95
+
+    # Different intent/prompt/index namespace, or an unrelated question, never match
+    assert cache.lookup(PROJECTS_PARAPHRASE, "shared:personal_info:p1:i2", "personal_info") is None
+    assert cache.lookup(EDUCATION, "shared:personal_info:p1:i1", "personal_info") is None
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2
+
+def test_intent_opt_out():
+    """Opted-out intents are neither stored nor looked up."""
+    from app.core.semantic_cache import SemanticCache
+
+    cache = SemanticCache(capacity=4, threshold=0.9, disabled_intents=["user_last_question"])
+    cache.add(PROJECTS, "ns", "user_last_question", "what was my last question", {"response": "x"})
+    assert cache.lookup(PROJECTS, "ns", "user_last_question") is None
+    assert cache.get_stats()["entries"] == 0
+    assert cache.get_stats()["skipped"] == 1
+
+def test_lru_eviction_and_false_hits():
+    """The least recently used entry is evicted; reported false hits are removed and counted."""
+    from app.core.semantic_cache import SemanticCache
+
+    cache = SemanticCache(capacity=2, threshold=0.9)
+    cache.add(PROJECTS, "ns", "general_rag", "projects?", {"response": "a"})
+    cache.add(EDUCATION, "ns", "general_rag", "education?", {"response": "b"})
+    assert cache.lookup(PROJECTS, "ns", "general_rag") is not None
+    cache.add([0.0, 1.0, 0.0, 0.0], "ns", "general_rag", "skills?", {"response": "c"})
+
+    assert cache.lookup(EDUCATION, "ns", "general_rag") is None
+    assert cache.get_stats()["evictions"] == 1
+
+    assert cache.report_false_hit("Projects") == 1
+    assert cache.lookup(PROJECTS, "ns", "general_rag") is None
+    stats = cache.get_stats()
+    assert stats["false_hits"] == 1
+    assert stats["entries"] == 1
+
+if __name__ == "__main__":
+    logger.info("🚀 Starting Semantic Cache Test")
+    test_paraphrase_hits_within_namespace()
+    test_intent_opt_out()
+    test_lru_eviction_and_false_hits()
+    logger.info("✅ Semantic cache test completed")
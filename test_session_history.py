@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test Session History Ring Buffer
+"""
+
+from loguru import logger
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan> - <level>{message}</level>",
+    level="INFO"
+)
+
+def test_recent_turns_newest_first_and_bounded():
+    """Each session keeps its last max_turns turns, returned newest first."""
+    from app.core.session_history import SessionHistory
+
+    history = SessionHistory(max_turns=3)
+    for i in range(5):
+        history.append("u", "s", f"q{i}", f"a{i}")
+    history.append("u", "other", "elsewhere", "x")
+    assert [t["query"] for t in history.recent("u", "s", limit=10)] == ["q4", "q3", "q2"]
+    assert history.recent("u", "s", limit=1)[0]["answer"] == "a4"
+
+def test_cold_miss_loads_once():
+    """Unknown sessions are seeded from the loader once; empty results are remembered too."""
+    from app.core.session_history import SessionHistory
+
+    calls = []
+
+    def loader(user_id, session_id, limit):
+        calls.append(session_id)
+        if session_id == "old":
+            return [{"query": "newer", "answer": "b"}, {"query": "older", "answer": "a"}]
+        return []
+
+    history = SessionHistory(max_turns=5)
+    assert [t["query"] for t in history.recent("u", "old", limit=2, loader=loader)] == ["newer", "older"]
+    history.append("u", "old", "latest", "c")
+    assert [t["query"] for t in history.recent("u", "old", limit=3, loader=loader)] == ["latest", "newer", "older"]
+    assert history.recent("u", "new", loader=loader) == []
+    assert history.recent("u", "new", loader=loader) == []
+    assert calls == ["old", "new"]
+    assert history.get_stats()["misses"] == 2
+
+def test_async_cold_miss_uses_async_loader():
+    """recent_async() seeds the buffer through an awaited loader and then serves from memory."""
+    import asyncio
+    from app.core.session_history import SessionHistory
+
+    calls = []
+
+    async def loader(user_id, session_id, limit):
+        calls.append(session_id)
+        return [{"query": "stored", "answer": "a"}]
+
+    history = SessionHistory(max_turns=5)
+    assert [t["query"] for t in asyncio.run(history.recent_async("u", "s", loader=loader))] == ["stored"]
+    history.append("u", "s", "latest", "b")
+    assert [t["query"] for t in asyncio.run(history.recent_async("u", "s", limit=1, loader=loader))] == ["latest"]
+    assert calls == ["s"]
+
+def test_lru_eviction_by_sessions_and_bytes():
+    """Least recently used sessions go first when either cap is exceeded."""
+    from app.core.session_history import SessionHistory
+
+    history = SessionHistory(max_turns=10, max_sessions=2)
+    history.append("u", "a", "q", "a")
+    history.append("u", "b", "q", "a")
+    history.recent("u", "a", loader=lambda *_: [])
+    history.append("u", "c", "q", "a")
+    assert history.recent("u", "b", loader=lambda *_: []) == []
+    assert history.get_stats()["evictions"] >= 1
+
+    history = SessionHistory(max_turns=10, max_bytes=1000)
+    for i in range(10):
+        history.append("u", f"s{i}", "x" * 200, "y" * 200)
+    stats = history.get_stats()
+    assert stats["bytes"] <= 1000 and stats["sessions"] == 2
+
+def test_stale_sessions_reload_turns_from_other_workers():
+    """With a TTL, a buffered session is reloaded, keeping local turns the database doesn't have yet."""
+    import time
+    from datetime import datetime, timedelta
+    from app.core.session_history import SessionHistory
+
+    start = datetime(2025, 1, 1, 12, 0)
+    stored = [{"query": "first", "answer": "a", "created_at": start}]
+    calls = []
+
+    def loader(user_id, session_id, limit):
+        calls.append(session_id)
+        return list(reversed(stored))
+
+    history = SessionHistory(max_turns=5, ttl_seconds=0.05)
+    assert [t["query"] for t in history.recent("u", "s", limit=5, loader=loader)] == ["first"]
+    # Another worker answers a turn; this one logs a turn that is still in the write-behind queue
+    stored.append({"query": "elsewhere", "answer": "b", "created_at": start + timedelta(seconds=1)})
+    history.append("u", "s", "unflushed", "c", created_at=start + timedelta(seconds=2))
+    assert [t["query"] for t in history.recent("u", "s", limit=5, loader=loader)] == ["unflushed", "first"]
+    time.sleep(0.06)
+    assert [t["query"] for t in history.recent("u", "s", limit=5, loader=loader)] == ["unflushed", "elsewhere", "first"]
+    assert calls == ["s", "s"] and history.get_stats()["reloads"] == 1
+
+    # A session this worker only appended to is loaded on its first lookup
+    history.append("u", "fresh", "here", "d", created_at=start + timedelta(seconds=3))
+    assert [t["query"] for t in history.recent("u", "fresh", limit=5, loader=loader)] == ["here", "elsewhere", "first"]
+
+if __name__ == "__main__":
+    logger.info("🚀 Starting Session History Test")
+    test_recent_turns_newest_first_and_bounded()
+    test_cold_miss_loads_once()
+    test_async_cold_miss_uses_async_loader()
+    test_lru_eviction_by_sessions_and_bytes()
+    test_stale_sessions_reload_turns_from_other_workers()
+    logger.info("✅ Session history test completed")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test Singleflight Coalescing
+"""
+
+import asyncio
+from loguru import logger
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan> - <level>{message}</level>",
+    level="INFO"
+)
+
+def test_concurrent_calls_share_one_computation():
+    """Identical concurrent keys run the computation once and share its result."""
+    from app.core.singleflight import SingleFlight
+
+    async def scenario():
+        flight = SingleFlight()
+        runs = []
+
+        async def compute():
+            runs.append(1)
+            await asyncio.sleep(0.05)
+            return "answer"
+
+        results = await asyncio.gather(*[flight.do("q", compute) for _ in range(5)])
+        assert results == ["answer"] * 5
+        assert len(runs) == 1
+        assert flight.get_stats() == {"in_flight": 0, "leaders": 1, "coalesced": 4}
+
+        # Once finished, the next call starts a fresh computation
+        assert await flight.do("q", compute) == "answer"
+        assert len(runs) == 2
+
+    asyncio.run(scenario())
+
+def test_errors_propagate_to_every_waiter():
+    """A failing computation raises the same error in every coalesced caller."""
+    from app.core.singleflight import SingleFlight
+
+    async def scenario():
+        flight = SingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0.01)
+            raise ValueError("provider down")
+
+        results = await asyncio.gather(*[flight.do("q", compute) for _ in range(3)], return_exceptions=True)
+        assert all(isinstance(r, ValueError) and str(r) == "provider down" for r in results)
+
+    asyncio.run(scenario())
+
+def test_cancelling_one_caller_keeps_computation_for_others():
+    """Cancellation only cancels the shared task when every caller has gone."""
+    from app.core.singleflight import SingleFlight
+
+    async def scenario():
+        flight = SingleFlight()
+        finished = []
+
+        async def compute():
+            await asyncio.sleep(0.05)
+            finished.append(1)
+            return "answer"
+
+        first = asyncio.ensure_future(flight.do("q", compute))
+        second = asyncio.ensure_future(flight.do("q", compute))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await second == "answer"
+        assert first.cancelled()
+        assert finished == [1]
+
+        lone = asyncio.ensure_future(flight.do("other", compute))
+        await asyncio.sleep(0.01)
+        lone.cancel()
+        await asyncio.sleep(0.08)
+        # The abandoned computation was cancelled rather than run to completion
+        assert finished == [1]
+        assert flight.get_stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
+
+def test_caller_after_abandoned_computation_starts_fresh():
+    """A caller arriving while an abandoned computation is being cancelled gets its own run."""
+    from app.core.singleflight import SingleFlight
+
+    async def scenario():
+        flight = SingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0.05)
+            return "answer"
+
+        lone = asyncio.ensure_future(flight.do("q", compute))
+        await asyncio.sleep(0.01)
+        lone.cancel()
+        await asyncio.sleep(0)  # lone's cleanup cancels the task, which has not finished yet
+        assert await flight.do("q", compute) == "answer"
+        assert flight.get_stats()["leaders"] == 2
+
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    logger.info("🚀 Starting Singleflight Test")
+    test_concurrent_calls_share_one_computation()
+    test_errors_propagate_to_every_waiter()
+    test_cancelling_one_caller_keeps_computation_for_others()
+    test_caller_after_abandoned_computation_starts_fresh()
+    logger.info("✅ Singleflight test completed")
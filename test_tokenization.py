@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test Tokenization and Context Packing
+"""
+
+from loguru import logger
+
+# Configure logging
+logger.remove()
+logger.add(
+    lambda msg: print(msg, end=""),
+    format="<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan> - <level>{message}</level>",
+    level="INFO"
+)
+
+def test_pack_chunks_beats_greedy_cutoff():
+    """A chunk that doesn't fit no longer stops packing; smaller later chunks still get in."""
+    from app.core.tokenization import pack_chunks
+
+    costs = {"a": 400, "b": 700, "c": 300, "d": 250}
+    packed = pack_chunks(list(costs), 1000, costs.get)
+    assert packed == ["a", "c", "d"]                      # greedy stopped after "a"
+    assert pack_chunks(list(costs), 1000, costs.get, scores=[0.9, 0.9, 0.1, 0.1]) == ["a", "c", "d"]
+    assert pack_chunks(list(costs), 1200, costs.get, scores=[0.9, 0.8, 0.2, 0.2]) == ["a", "b"]
+    assert pack_chunks(["a", "b"], 100, costs.get) == ["a"]  # the top chunk is always kept
+    assert pack_chunks([], 100, costs.get) == []
+
+def test_pack_chunks_large_budget_never_overflows():
+    """Coarse units for large budgets round costs up, so the packed set stays within budget."""
+    from app.core.tokenization import pack_chunks
+
+    chunks = [f"c{i}" for i in range(12)]
+    costs = {c: 1000 + 37 * i for i, c in enumerate(chunks)}
+    packed = pack_chunks(chunks, 9000, costs.get)
+    assert packed[0] == "c0" and sum(costs[c] for c in packed) <= 9000 and len(packed) == 7
+
+def test_chunk_counts_come_from_metadata():
+    """Counts recorded at ingestion are reused, labels are counted on top, and the memo is bounded."""
+    from app.core.tokenization import ChunkTokenCounts, encoding_name
+
+    counts = ChunkTokenCounts(max_entries=2)
+    model = "gpt-4o-mini"
+    counts.remember("Hanzla built CyberShield.", {"token_count": 42, "token_encoding": encoding_name(model)})
+    assert counts.count("Hanzla built CyberShield.", model) == 42
+    assert counts.count("[PROJECTS] Hanzla built CyberShield.", model) > 42
+    assert counts.get_stats()["hits"] == 2
+    counts.count("one", model)
+    counts.count("two", model)
+    assert counts.get_stats()["entries"] == 2
+
+def test_context_budget_follows_model_window():
+    """The configured budget applies unless the model's window leaves less room."""
+    from app.core.config import settings
+    from app.core.tokenization import context_budget, context_window, get_encoding
+
+    assert context_window("gpt-4o-mini") == 128000
+    assert context_window("llama3-8b-8192") == 8192
+    assert context_window("some-unknown-model") == 4096
+    original = settings.CONTEXT_TOKEN_BUDGET
+    try:
+        settings.CONTEXT_TOKEN_BUDGET = 5000
+        assert context_budget("gpt-4o-mini") == 5000
+        assert context_budget("llama2") == 4096 - settings.CONTEXT_RESERVED_TOKENS
+    finally:
+        settings.CONTEXT_TOKEN_BUDGET = original
+    assert get_encoding("gpt-4o-mini") is get_encoding("gpt-4o-mini")
+
+if __name__ == "__main__":
+    logger.info("🚀 Starting Tokenization Test")
+    test_pack_chunks_beats_greedy_cutoff()
+    test_pack_chunks_large_budget_never_overflows()
+    test_chunk_counts_come_from_metadata()
+    test_context_budget_follows_model_window()
+    logger.info("✅ Tokenization test completed")